@@ -0,0 +1,52 @@
+"""add offer versions table
+
+Revision ID: a3f1c9d27e54
+Revises: 7b36cfdd382d
+Create Date: 2026-10-19 10:12:41.532107
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3f1c9d27e54"
+down_revision: Union[str, None] = "7b36cfdd382d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("offers_base", sa.Column("content_hash", sa.String, nullable=True))
+    op.create_table(
+        "offer_versions",
+        sa.Column("id", sa.Integer, sa.Identity(start=1, cycle=True), primary_key=True),
+        sa.Column("clasfieds_id", sa.Integer, nullable=False),
+        sa.Column("content_hash", sa.String, nullable=False),
+        sa.Column("title", sa.String, nullable=True),
+        sa.Column("description", sa.String, nullable=True),
+        sa.Column("price", sa.BigInteger, nullable=True),
+        sa.Column("milage", sa.BigInteger, nullable=True),
+        sa.Column("recorded_time", sa.DateTime, nullable=False),
+        sa.ForeignKeyConstraint(
+            ["clasfieds_id"],
+            ["offers_base.clasfieds_id"],
+            name="fk_offer_versions_clasfieds_id",
+        ),
+    )
+    op.create_index(
+        "ix_offer_versions_clasfieds_id_recorded_time",
+        "offer_versions",
+        ["clasfieds_id", "recorded_time"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_offer_versions_clasfieds_id_recorded_time", table_name="offer_versions"
+    )
+    op.drop_table("offer_versions")
+    op.drop_column("offers_base", "content_hash")
@@ -0,0 +1,39 @@
+"""add offer rollups table
+
+Revision ID: a6e0c2d94f17
+Revises: d3a9f6c81b42
+Create Date: 2026-10-19 16:05:31.774019
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a6e0c2d94f17"
+down_revision: Union[str, None] = "d3a9f6c81b42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "offer_rollups",
+        sa.Column("day", sa.Date, primary_key=True),
+        sa.Column("region", sa.String, primary_key=True),
+        sa.Column("city", sa.String, primary_key=True),
+        sa.Column("brand", sa.String, primary_key=True),
+        sa.Column("label_source", sa.String, primary_key=True),
+        sa.Column("offers", sa.Integer, nullable=False),
+        sa.Column("labeled_offers", sa.Integer, nullable=False),
+        sa.Column("suspicious_offers", sa.Integer, nullable=False),
+        sa.Column("offer_version_id", sa.Integer, nullable=False),
+        sa.Column("labeled_time", sa.DateTime, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("offer_rollups")
@@ -0,0 +1,42 @@
+"""add offer images table
+
+Revision ID: a8d3f0b52c71
+Revises: f5a2c8e61d34
+Create Date: 2026-10-19 18:57:13.208455
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a8d3f0b52c71"
+down_revision: Union[str, None] = "f5a2c8e61d34"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # No foreign key to offers_base, images outlive archived offers
+    op.create_table(
+        "offer_images",
+        sa.Column("id", sa.Integer, sa.Identity(start=1, cycle=True), primary_key=True),
+        sa.Column("clasfieds_id", sa.Integer, nullable=False),
+        sa.Column("position", sa.Integer, nullable=False),
+        sa.Column("url", sa.String, nullable=False),
+        sa.Column("sha256", sa.String, nullable=True),
+        sa.Column("width", sa.Integer, nullable=True),
+        sa.Column("height", sa.Integer, nullable=True),
+        sa.Column("size", sa.Integer, nullable=True),
+        sa.Column("fetched_time", sa.DateTime, nullable=False),
+        sa.UniqueConstraint("clasfieds_id", "position", name="uc_offer_images_key"),
+    )
+    op.create_index("ix_offer_images_sha256", "offer_images", ["sha256"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_offer_images_sha256", table_name="offer_images")
+    op.drop_table("offer_images")
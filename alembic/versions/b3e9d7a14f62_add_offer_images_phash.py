@@ -0,0 +1,27 @@
+"""add offer images phash
+
+Revision ID: b3e9d7a14f62
+Revises: a8d3f0b52c71
+Create Date: 2026-10-19 20:14:36.581904
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b3e9d7a14f62"
+down_revision: Union[str, None] = "a8d3f0b52c71"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("offer_images", sa.Column("phash", sa.String, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("offer_images", "phash")
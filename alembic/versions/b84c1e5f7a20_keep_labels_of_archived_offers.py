@@ -0,0 +1,40 @@
+"""keep labels of archived offers
+
+Revision ID: b84c1e5f7a20
+Revises: f09b6e3a41d7
+Create Date: 2026-10-19 14:52:08.613204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b84c1e5f7a20"
+down_revision: Union[str, None] = "f09b6e3a41d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LABEL_FOREIGN_KEYS = (
+    ("fk_offer_labels_clasfieds_id", "offer_labels", "clasfieds_id"),
+    ("fk_suspicious_clasfieds_id", "suspicious_offers", "suspicious_clasfieds_id"),
+    ("fk_suspicious_clasfieds_id", "suspicious_offers_v2", "suspicious_clasfieds_id"),
+)
+
+
+def upgrade() -> None:
+    # labels outlive the hot offer rows moved to the archive by retention
+    for constraint_name, table_name, _ in LABEL_FOREIGN_KEYS:
+        op.drop_constraint(constraint_name, table_name, type_="foreignkey")
+
+
+def downgrade() -> None:
+    for constraint_name, table_name, column_name in LABEL_FOREIGN_KEYS:
+        op.create_foreign_key(
+            constraint_name,
+            table_name,
+            "offers_base",
+            [column_name],
+            ["clasfieds_id"],
+        )
@@ -0,0 +1,31 @@
+"""add offer version of offer labels
+
+Revision ID: c4f7e2a90b15
+Revises: a6e0c2d94f17
+Create Date: 2026-10-19 17:12:08.530172
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4f7e2a90b15"
+down_revision: Union[str, None] = "a6e0c2d94f17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Training offer version a label was computed from, NULL for labels
+    # written before it was tracked
+    op.add_column(
+        "offer_labels", sa.Column("offer_version_id", sa.Integer, nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("offer_labels", "offer_version_id")
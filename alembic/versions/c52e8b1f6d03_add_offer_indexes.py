@@ -0,0 +1,79 @@
+"""add offer indexes
+
+Revision ID: c52e8b1f6d03
+Revises: a3f1c9d27e54
+Create Date: 2026-10-19 11:03:17.218450
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c52e8b1f6d03"
+down_revision: Union[str, None] = "a3f1c9d27e54"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_offers_base_vin",
+            "offers_base",
+            ["vin"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_offers_base_lower_brand",
+            "offers_base",
+            [sa.text("lower(brand)")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # scraperd_time grows with insertion order, so a BRIN index prunes
+        # time ranges at a fraction of the size of a btree
+        op.create_index(
+            "ix_offers_base_scraperd_time_brin",
+            "offers_base",
+            ["scraperd_time"],
+            postgresql_using="brin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_suspicious_offers_suspicious_clasfieds_id",
+            "suspicious_offers",
+            ["suspicious_clasfieds_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_suspicious_offers_v2_suspicious_clasfieds_id",
+            "suspicious_offers_v2",
+            ["suspicious_clasfieds_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table_name in (
+            ("ix_suspicious_offers_v2_suspicious_clasfieds_id", "suspicious_offers_v2"),
+            ("ix_suspicious_offers_suspicious_clasfieds_id", "suspicious_offers"),
+            ("ix_offers_base_scraperd_time_brin", "offers_base"),
+            ("ix_offers_base_lower_brand", "offers_base"),
+            ("ix_offers_base_vin", "offers_base"),
+        ):
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,64 @@
+"""add offer search vector
+
+Revision ID: d3a9f6c81b42
+Revises: b84c1e5f7a20
+Create Date: 2026-10-19 15:21:44.093517
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d3a9f6c81b42"
+down_revision: Union[str, None] = "b84c1e5f7a20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # stock Postgres has no Polish dictionary, fall back to a copy of simple
+    # so a real polish configuration (e.g. with an ispell dictionary) can be
+    # installed later without changing the column
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'polish') THEN
+                CREATE TEXT SEARCH CONFIGURATION polish (COPY = simple);
+            END IF;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        ALTER TABLE offers_base ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('polish', coalesce(title, '')), 'A')
+            || setweight(to_tsvector('polish', coalesce(description, '')), 'B')
+        ) STORED
+        """
+    )
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_offers_base_search_vector",
+            "offers_base",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_offers_base_search_vector",
+            table_name="offers_base",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("offers_base", "search_vector")
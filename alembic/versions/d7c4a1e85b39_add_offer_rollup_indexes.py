@@ -0,0 +1,53 @@
+"""add offer rollup indexes
+
+Revision ID: d7c4a1e85b39
+Revises: b3e9d7a14f62
+Create Date: 2026-10-19 22:41:09.316527
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d7c4a1e85b39"
+down_revision: Union[str, None] = "b3e9d7a14f62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        # must match offer_day in db_schema, so the planner can use it
+        op.create_index(
+            "ix_offers_base_day",
+            "offers_base",
+            [sa.text("date(coalesce(created_time, scraperd_time))")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_offer_labels_labeled_time",
+            "offer_labels",
+            ["labeled_time"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table_name in (
+            ("ix_offer_labels_labeled_time", "offer_labels"),
+            ("ix_offers_base_day", "offers_base"),
+        ):
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,39 @@
+"""add vin features to offer details
+
+Revision ID: e1b8d5c37a96
+Revises: c4f7e2a90b15
+Create Date: 2026-10-19 17:48:26.104957
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1b8d5c37a96"
+down_revision: Union[str, None] = "c4f7e2a90b15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VIN_FEATURE_COLUMNS = (
+    ("vin_manufacturer", sa.String),
+    ("vin_region", sa.String),
+    ("vin_check_digit_valid", sa.Boolean),
+    ("vin_model_year", sa.Integer),
+    ("vin_brand_match", sa.Boolean),
+    ("vin_year_match", sa.Boolean),
+)
+
+
+def upgrade() -> None:
+    # Filled in at ingest, offers scraped before stay NULL until updated
+    for name, type_ in VIN_FEATURE_COLUMNS:
+        op.add_column("offers_details", sa.Column(name, type_, nullable=True))
+
+
+def downgrade() -> None:
+    for name, _ in reversed(VIN_FEATURE_COLUMNS):
+        op.drop_column("offers_details", name)
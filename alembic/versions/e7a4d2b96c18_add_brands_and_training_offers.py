@@ -0,0 +1,66 @@
+"""add brands and training offers
+
+Revision ID: e7a4d2b96c18
+Revises: c52e8b1f6d03
+Create Date: 2026-10-19 12:26:05.774193
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a4d2b96c18"
+down_revision: Union[str, None] = "c52e8b1f6d03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "brands",
+        sa.Column("id", sa.Integer, sa.Identity(start=1, cycle=True), primary_key=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.UniqueConstraint("name", name="uc_brands_name"),
+    )
+    op.create_table(
+        "brand_aliases",
+        sa.Column("alias", sa.String, primary_key=True),
+        sa.Column("brand_id", sa.Integer, nullable=False),
+        sa.ForeignKeyConstraint(
+            ["brand_id"], ["brands.id"], name="fk_brand_aliases_brand_id"
+        ),
+    )
+    op.create_table(
+        "training_offers",
+        sa.Column("clasfieds_id", sa.Integer, primary_key=True),
+        sa.Column("brand_id", sa.Integer, nullable=False),
+        sa.Column("title", sa.String, nullable=False),
+        sa.Column("description", sa.String, nullable=True),
+        sa.Column("vin", sa.String, nullable=True),
+        sa.Column("model", sa.String, nullable=False),
+        sa.Column("price", sa.BigInteger, nullable=False),
+        sa.Column("milage", sa.BigInteger, nullable=False),
+        sa.Column("condition", sa.String, nullable=False),
+        sa.Column("country_origin", sa.String, nullable=False),
+        sa.Column("offer_version_id", sa.Integer, nullable=False),
+        sa.ForeignKeyConstraint(
+            ["clasfieds_id"],
+            ["offers_base.clasfieds_id"],
+            name="fk_training_offers_clasfieds_id",
+        ),
+        sa.ForeignKeyConstraint(
+            ["brand_id"], ["brands.id"], name="fk_training_offers_brand_id"
+        ),
+    )
+    op.create_index("ix_training_offers_brand_id", "training_offers", ["brand_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_training_offers_brand_id", table_name="training_offers")
+    op.drop_table("training_offers")
+    op.drop_table("brand_aliases")
+    op.drop_table("brands")
@@ -0,0 +1,67 @@
+"""add offer labels table
+
+Revision ID: f09b6e3a41d7
+Revises: e7a4d2b96c18
+Create Date: 2026-10-19 13:48:52.390611
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f09b6e3a41d7"
+down_revision: Union[str, None] = "e7a4d2b96c18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "offer_labels",
+        sa.Column("id", sa.Integer, sa.Identity(start=1, cycle=True), primary_key=True),
+        sa.Column("clasfieds_id", sa.Integer, nullable=False),
+        sa.Column("label_source", sa.String, nullable=False),
+        sa.Column("label_version", sa.Integer, nullable=False),
+        sa.Column("is_suspicious", sa.Boolean, nullable=False),
+        sa.Column("labeled_time", sa.DateTime, nullable=False),
+        sa.UniqueConstraint(
+            "clasfieds_id",
+            "label_source",
+            "label_version",
+            name="uc_offer_labels_key",
+        ),
+        sa.ForeignKeyConstraint(
+            ["clasfieds_id"],
+            ["offers_base.clasfieds_id"],
+            name="fk_offer_labels_clasfieds_id",
+        ),
+    )
+    op.create_index(
+        "ix_offer_labels_source_clasfieds_id_version",
+        "offer_labels",
+        ["label_source", "clasfieds_id", "label_version"],
+    )
+    # Collapse the duplicated rows of the legacy label tables into version 1
+    for table_name, label_source in (
+        ("suspicious_offers", "vin"),
+        ("suspicious_offers_v2", "description"),
+    ):
+        op.execute(f"""
+            INSERT INTO offer_labels
+                (clasfieds_id, label_source, label_version, is_suspicious, labeled_time)
+            SELECT suspicious_clasfieds_id, '{label_source}', 1,
+                bool_or(is_suspicious), now() AT TIME ZONE 'utc'
+            FROM {table_name}
+            GROUP BY suspicious_clasfieds_id
+            """)
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_offer_labels_source_clasfieds_id_version", table_name="offer_labels"
+    )
+    op.drop_table("offer_labels")
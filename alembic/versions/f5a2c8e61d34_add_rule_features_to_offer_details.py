@@ -0,0 +1,31 @@
+"""add rule features to offer details
+
+Revision ID: f5a2c8e61d34
+Revises: e1b8d5c37a96
+Create Date: 2026-10-19 18:21:40.662318
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f5a2c8e61d34"
+down_revision: Union[str, None] = "e1b8d5c37a96"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RULE_FEATURE_COLUMNS = ("rule_hits", "contact_phones", "contact_emails")
+
+
+def upgrade() -> None:
+    for name in RULE_FEATURE_COLUMNS:
+        op.add_column("offers_details", sa.Column(name, sa.JSON, nullable=True))
+
+
+def downgrade() -> None:
+    for name in reversed(RULE_FEATURE_COLUMNS):
+        op.drop_column("offers_details", name)
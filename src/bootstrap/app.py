@@ -1,7 +1,5 @@
 from dataclasses import dataclass
 
-from sqlalchemy.ext.asyncio import AsyncEngine
-
 from src.config.bezwypadkowe_net_config import (
     BEZWYPADKOWE_MAIN_URL,
     BEZWYPADKOWE_STARTING_POINT,
@@ -17,8 +15,8 @@ from src.raw_offer_producer.base import BaseRawOfferProducer
 from src.raw_offer_producer.bezwypadkowe_net import BezwypadkoweTrainingDataProducer
 from src.raw_offer_producer.olx import OlxRawOfferProducer
 from src.raw_offer_producer.otomoto import OtomotoRawOfferProducer
-from src.repositories.helpers import get_engine
-from src.repositories.offer.sql_alchemy import SqlAlchemyOfferRepository
+from src.repositories.offer.base import OfferRepository
+from src.repositories.offer.factory import get_offer_repository
 
 
 @dataclass
@@ -26,16 +24,15 @@ class AppContainer:
     olx_raw_offer_producer: BaseRawOfferProducer
     otomoto_raw_offer_producer: BaseRawOfferProducer
     get_training_data_raw_offer_producer: BaseRawOfferProducer
-    scraped_offer_repository: SqlAlchemyOfferRepository
+    scraped_offer_repository: OfferRepository
 
 
 def build_app_container() -> AppContainer:
-    engine = get_engine()
     return AppContainer(
         olx_raw_offer_producer=get_olx_raw_offer_producer(),
         otomoto_raw_offer_producer=get_otomoto_raw_offer_producer(),
         get_training_data_raw_offer_producer=get_training_data_raw_offer_producer(),
-        scraped_offer_repository=get_scraped_offer_repository(engine),
+        scraped_offer_repository=get_scraped_offer_repository(),
     )
 
 
@@ -66,5 +63,5 @@ def get_training_data_raw_offer_producer() -> BaseRawOfferProducer:
     )
 
 
-def get_scraped_offer_repository(engine: AsyncEngine) -> SqlAlchemyOfferRepository:
-    return SqlAlchemyOfferRepository(engine)
+def get_scraped_offer_repository() -> OfferRepository:
+    return get_offer_repository()
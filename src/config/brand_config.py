@@ -0,0 +1,91 @@
+BRAND_ALIASES: dict[str, list[str]] = {
+    "Aixam": ["aixam"],
+    "Alfa Romeo": ["alfa romeo", "alfa"],
+    "Audi": ["audi"],
+    "BMW": ["bmw"],
+    "Cadillac": ["cadillac"],
+    "Chevrolet": ["chevrolet"],
+    "Chrysler": ["chrysler"],
+    "Citroën": ["citroën", "citroen"],
+    "Dacia": ["dacia"],
+    "Daewoo": ["daewoo"],
+    "Daihatsu": ["daihatsu"],
+    "Dodge": ["dodge"],
+    "Fiat": ["fiat"],
+    "Ford": ["ford"],
+    "Honda": ["honda"],
+    "Hyundai": ["hyundai"],
+    "Infiniti": ["infiniti"],
+    "Jaguar": ["jaguar"],
+    "Jeep": ["jeep"],
+    "Kia": ["kia"],
+    "Lancia": ["lancia"],
+    "Land Rover": ["land rover", "land"],
+    "Lexus": ["lexus"],
+    "Mazda": ["mazda"],
+    "Mercedes-Benz": ["mercedes-benz", "mercedes"],
+    "MINI": ["mini"],
+    "Mitsubishi": ["mitsubishi"],
+    "Nissan": ["nissan"],
+    "Opel": ["opel"],
+    "Peugeot": ["peugeot"],
+    "Polonez": ["polonez"],
+    "Porsche": ["porsche"],
+    "Renault": ["renault"],
+    "Saab": ["saab"],
+    "Seat": ["seat"],
+    "Skoda": ["skoda", "škoda"],
+    "Smart": ["smart"],
+    "SsangYong": ["ssangyong"],
+    "Subaru": ["subaru"],
+    "Suzuki": ["suzuki"],
+    "Toyota": ["toyota"],
+    "Volkswagen": ["volkswagen", "vw"],
+    "Volvo": ["volvo"],
+}
+
+# world manufacturer identifiers, the first three characters of a VIN
+BRAND_WMIS: dict[str, list[str]] = {
+    "Alfa Romeo": ["ZAR"],
+    "Audi": ["WAU", "TRU"],
+    "BMW": ["WBA", "WBS", "WBY"],
+    "Cadillac": ["1G6"],
+    "Chevrolet": ["1G1", "KL1"],
+    "Chrysler": ["1C3"],
+    "Citroën": ["VF7", "VR7"],
+    "Dacia": ["UU1"],
+    "Daewoo": ["KLA"],
+    "Daihatsu": ["JDA"],
+    "Dodge": ["1B3"],
+    "Fiat": ["ZFA"],
+    "Ford": ["WF0", "1FA"],
+    "Honda": ["JHM", "SHH"],
+    "Hyundai": ["KMH", "TMA"],
+    "Infiniti": ["JNK"],
+    "Jaguar": ["SAJ"],
+    "Jeep": ["1J4", "1C4"],
+    "Kia": ["KNA", "U5Y"],
+    "Lancia": ["ZLA"],
+    "Land Rover": ["SAL"],
+    "Lexus": ["JTH"],
+    "Mazda": ["JMZ"],
+    "Mercedes-Benz": ["WDB", "WDD", "W1K"],
+    "MINI": ["WMW"],
+    "Mitsubishi": ["JMB"],
+    "Nissan": ["JN1", "SJN", "VSK"],
+    "Opel": ["W0L", "W0V"],
+    "Peugeot": ["VF3"],
+    "Polonez": ["SUP"],
+    "Porsche": ["WP0"],
+    "Renault": ["VF1"],
+    "Saab": ["YS3"],
+    "Seat": ["VSS"],
+    "Skoda": ["TMB"],
+    "Smart": ["WME"],
+    "SsangYong": ["KPT"],
+    "Subaru": ["JF1"],
+    "Suzuki": ["JSA", "TSM"],
+    "Toyota": ["JTD", "JTE", "SB1"],
+    "Volkswagen": ["WVW", "WVG", "WV2"],
+    "Volvo": ["YV1"],
+}
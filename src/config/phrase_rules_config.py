@@ -0,0 +1,74 @@
+# phrases of scam offers by rule name, matched after lowercasing and folding
+# Polish diacritics, at the start of a word, so a stem matches all its forms
+PHRASE_RULES: dict[str, list[str]] = {
+    "email_contact_only": [
+        "tylko kontakt mailowy",
+        "wylacznie kontakt mailowy",
+        "kontakt wylacznie mailowy",
+        "kontakt tylko mailowy",
+        "tylko mailowo",
+        "wylacznie mailowo",
+        "prosze pisac na maila",
+        "prosze o kontakt mailowy",
+        "nie odbieram telefon",
+        "kontakt tylko przez email",
+        "kontakt tylko e mail",
+    ],
+    "messenger_contact": [
+        "whatsapp",
+        "whats app",
+        "watsap",
+        "wats app",
+        "viber",
+        "telegram",
+    ],
+    "shipping_from_abroad": [
+        "wysylka z zagranicy",
+        "wysylka z niemiec",
+        "wysylka z anglii",
+        "wysylka z wielkiej brytanii",
+        "auto znajduje sie za granica",
+        "samochod znajduje sie za granica",
+        "auto znajduje sie w niemczech",
+        "auto znajduje sie w anglii",
+        "samochod jest w niemczech",
+        "dostarczymy pod dom",
+        "transport pod dom gratis",
+        "dostawa pod wskazany adres",
+    ],
+    "advance_payment": [
+        "zaliczk",
+        "przedplat",
+        "wplata z gory",
+        "platnosc z gory",
+        "platnosc przez firme spedycyjn",
+        "platnosc przez spedytor",
+        "oplata za transport z gory",
+        "western union",
+        "moneygram",
+    ],
+    "seller_abroad": [
+        "wyjazd za granice",
+        "wyjazdu za granice",
+        "wyjezdzam za granice",
+        "przeprowadzk za granice",
+        "jestem na kontrakcie",
+        "pracuje za granica",
+        "jestem za granica",
+    ],
+    "suspicious_price": [
+        "wyjatkowo niska cena",
+        "cena okazyjna z powodu",
+        "pilnie sprzedam z powodu",
+        "cena do negocjacji tylko dzisiaj",
+        "sprzedam ponizej wartosci",
+    ],
+}
+
+# words negating a phrase that follows within NEGATION_WINDOW words, e.g.
+# "bez zaliczki" or "nie biore zaliczki", folded like the phrases
+NEGATIONS = ("bez", "nie", "brak", "zadnych", "zadnej", "zadnego")
+NEGATION_WINDOW = 2
+
+# phone numbers without a country code belong to this country
+HOME_COUNTRY_CODE = "48"
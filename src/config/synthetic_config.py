@@ -0,0 +1,83 @@
+# rough shares of the Polish used car market, brands not listed get weight 1
+SYNTHETIC_BRAND_WEIGHTS: dict[str, int] = {
+    "Volkswagen": 120,
+    "Opel": 100,
+    "Ford": 90,
+    "Audi": 80,
+    "BMW": 75,
+    "Toyota": 70,
+    "Skoda": 65,
+    "Renault": 55,
+    "Peugeot": 50,
+    "Mercedes-Benz": 50,
+    "Citroën": 40,
+    "Fiat": 35,
+    "Hyundai": 30,
+    "Kia": 30,
+    "Volvo": 25,
+    "Seat": 25,
+    "Nissan": 25,
+    "Mazda": 20,
+    "Honda": 15,
+    "Dacia": 15,
+}
+
+SYNTHETIC_BRAND_MODELS: dict[str, list[str]] = {
+    "Volkswagen": ["Golf", "Passat", "Polo", "Tiguan", "Touran"],
+    "Opel": ["Astra", "Corsa", "Insignia", "Zafira", "Vectra"],
+    "Ford": ["Focus", "Mondeo", "Fiesta", "Kuga", "S-Max"],
+    "Audi": ["A3", "A4", "A6", "Q5", "Q7"],
+    "BMW": ["Seria 3", "Seria 5", "X3", "X5", "Seria 1"],
+    "Toyota": ["Corolla", "Yaris", "Avensis", "RAV4", "Auris"],
+    "Skoda": ["Octavia", "Fabia", "Superb", "Rapid", "Kodiaq"],
+    "Renault": ["Megane", "Clio", "Scenic", "Laguna", "Captur"],
+    "Peugeot": ["308", "208", "3008", "508", "207"],
+    "Mercedes-Benz": ["Klasa C", "Klasa E", "Klasa A", "GLC", "ML"],
+    "Citroën": ["C4", "C5", "C3", "Berlingo", "C4 Picasso"],
+}
+SYNTHETIC_DEFAULT_MODELS = ["Inny"]
+
+SYNTHETIC_LOCATIONS: dict[str, list[str]] = {
+    "Mazowieckie": ["Warszawa", "Radom", "Płock", "Siedlce"],
+    "Śląskie": ["Katowice", "Gliwice", "Częstochowa", "Bielsko-Biała"],
+    "Wielkopolskie": ["Poznań", "Kalisz", "Konin", "Piła"],
+    "Małopolskie": ["Kraków", "Tarnów", "Nowy Sącz"],
+    "Dolnośląskie": ["Wrocław", "Wałbrzych", "Legnica"],
+    "Łódzkie": ["Łódź", "Piotrków Trybunalski", "Skierniewice"],
+    "Pomorskie": ["Gdańsk", "Gdynia", "Słupsk"],
+    "Zachodniopomorskie": ["Szczecin", "Koszalin"],
+    "Lubelskie": ["Lublin", "Zamość", "Biała Podlaska"],
+    "Podkarpackie": ["Rzeszów", "Przemyśl", "Krosno"],
+}
+
+SYNTHETIC_PARAMETER_CHOICES: dict[str, list[str]] = {
+    "petrol": ["Benzyna", "Diesel", "Benzyna+LPG", "Hybryda", "Elektryczny"],
+    "car_body": ["Sedan", "Kombi", "Hatchback", "SUV", "Minivan", "Coupe"],
+    "color": ["Czarny", "Srebrny", "Biały", "Szary", "Niebieski", "Czerwony"],
+    "condition": ["Nieuszkodzony", "Uszkodzony"],
+    "transmission": ["Manualna", "Automatyczna"],
+    "drive": ["Na przednie koła", "Na tylne koła", "4x4 (stały)"],
+    "country_origin": ["Polska", "Niemcy", "Francja", "Belgia", "Holandia", "USA"],
+    "righthanddrive": ["Nie", "Tak"],
+}
+
+SYNTHETIC_DESCRIPTION_PHRASES = [
+    "Samochód w bardzo dobrym stanie technicznym.",
+    "Auto bezwypadkowe, serwisowane w ASO.",
+    "Pierwszy właściciel w kraju.",
+    "Niski przebieg, udokumentowana historia serwisowa.",
+    "Klimatyzacja automatyczna, nawigacja, czujniki parkowania.",
+    "Nowe opony i rozrząd wymieniony przy ostatnim przeglądzie.",
+    "Zarejestrowany i ubezpieczony, gotowy do jazdy.",
+    "Możliwość sprawdzenia na stacji diagnostycznej.",
+    "Cena do negocjacji przy szybkiej transakcji.",
+    "Zapraszam na jazdę próbną, faktura VAT marża.",
+    "Komplet kluczy, książka serwisowa, dwa komplety kół.",
+    "Wnętrze zadbane, niepalący właściciel.",
+]
+SYNTHETIC_SUSPICIOUS_PHRASES = [
+    "Auto znajduje się za granicą, wysyłka po wpłacie zaliczki.",
+    "Proszę o kontakt wyłącznie mailowy, nie odbieram telefonów.",
+    "Płatność przez firmę spedycyjną, samochód dostarczymy pod dom.",
+    "Wyjątkowo niska cena z powodu wyjazdu za granicę.",
+]
@@ -0,0 +1,22 @@
+import asyncio
+import logging
+
+from src.config import log_init
+from src.repositories.offer.archive import OfferArchive
+from src.repositories.offer.factory import get_offer_repository
+from src.services.offer_retention import archive_stale_offers
+
+log_init.setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    logger.info("Running...")
+    archived = await archive_stale_offers(get_offer_repository(), OfferArchive())
+    logger.info(f"Moved {archived} stale offers to the archive")
+    logger.info("Done!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
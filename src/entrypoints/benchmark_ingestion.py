@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+
+from src.config import log_init
+from src.config.main_config import (
+    BENCHMARK_BATCH_SIZE,
+    BENCHMARK_OFFERS,
+    BENCHMARK_RESULTS_PATH,
+    BENCHMARK_SEED,
+    BENCHMARK_TRAINING_DATA,
+)
+from src.raw_offer_producer.synthetic import (
+    SyntheticOfferGenerator,
+    SyntheticRawOfferProducer,
+    SyntheticTrainingDataProducer,
+)
+from src.repositories.offer.factory import get_offer_repository
+from src.services.ingestion_benchmark import (
+    benchmark_ingestion,
+    store_result,
+    table_stats,
+)
+
+log_init.setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    logger.info("Running...")
+    scraped_offer_repository = get_offer_repository()
+    generator = SyntheticOfferGenerator(seed=BENCHMARK_SEED)
+    with tempfile.TemporaryDirectory() as spool_dir:
+        # the shared generator gives every write path new offer ids
+        result = await benchmark_ingestion(
+            scraped_offer_repository,
+            lambda: SyntheticRawOfferProducer(BENCHMARK_OFFERS, generator).get_offers(),
+            SyntheticTrainingDataProducer(
+                BENCHMARK_TRAINING_DATA, generator
+            ).get_offers(),
+            BENCHMARK_BATCH_SIZE,
+            Path(spool_dir) / "offers.spool",
+        )
+    engine = getattr(scraped_offer_repository, "engine", None)
+    if engine is not None:
+        result["tables"] = await table_stats(engine)
+    result["parameters"] = {
+        "offers": BENCHMARK_OFFERS,
+        "training_data": BENCHMARK_TRAINING_DATA,
+        "batch_size": BENCHMARK_BATCH_SIZE,
+        "seed": BENCHMARK_SEED,
+    }
+    record = store_result(result, BENCHMARK_RESULTS_PATH)
+    for name, stats in (
+        ("offers upsert_offer", record["offers"]),
+        ("offers upsert_offers", record["offers_batched"]),
+        ("offers spool append", record["offers_spooled"]["append"]),
+        ("offers spool drain", record["offers_spooled"]["drain"]),
+        ("labeling_data", record["labeling_data"]),
+    ):
+        logger.info(
+            f"{name}: {stats['rows_per_second']:.0f} rows/s, "
+            f"p99 batch {stats['p99_batch_seconds'] * 1000:.1f} ms"
+        )
+    logger.info("Done!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import time
+
+from src.config import log_init
+from src.config.main_config import (
+    BENCHMARK_SEED,
+    BENCHMARK_TEXT_CLEANING_DOCS,
+    BENCHMARK_TEXT_CLEANING_RESULTS_PATH,
+    TEXT_CLEANING_BATCH_SIZE,
+    TEXT_CLEANING_PROCESSES,
+)
+from src.raw_offer_producer.synthetic import SyntheticOfferGenerator
+from src.services.helpers.data_normalizer import clean_text, clean_texts
+from src.services.ingestion_benchmark import store_result
+
+log_init.setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+def _docs_per_second(clean, texts: list[str]) -> float:
+    start = time.perf_counter()
+    clean(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+async def main():
+    logger.info("Running...")
+    generator = SyntheticOfferGenerator(seed=BENCHMARK_SEED)
+    texts = [
+        f"{offer.title} {offer.description}"
+        for offer in (generator.offer() for _ in range(BENCHMARK_TEXT_CLEANING_DOCS))
+    ]
+    result = {
+        "docs": len(texts),
+        "single_docs_per_second": _docs_per_second(
+            lambda texts: [clean_text(text) for text in texts], texts
+        ),
+        "batch_docs_per_second": _docs_per_second(
+            lambda texts: clean_texts(texts, n_process=1), texts
+        ),
+        "parallel_docs_per_second": _docs_per_second(clean_texts, texts),
+        "parameters": {
+            "processes": TEXT_CLEANING_PROCESSES,
+            "batch_size": TEXT_CLEANING_BATCH_SIZE,
+            "seed": BENCHMARK_SEED,
+        },
+    }
+    store_result(result, BENCHMARK_TEXT_CLEANING_RESULTS_PATH)
+    for name in ("single", "batch", "parallel"):
+        logger.info(f"{name}: {result[f'{name}_docs_per_second']:.0f} docs/s")
+    logger.info("Done!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
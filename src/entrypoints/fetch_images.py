@@ -0,0 +1,28 @@
+import asyncio
+import logging
+
+from src.config import log_init
+from src.repositories.offer.factory import get_offer_repository
+from src.services.helpers.photo_hashes import PhotoHashIndex
+from src.services.image_fetcher import ImageFetcher, fetch_offer_images
+
+log_init.setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    logger.info("Running...")
+    fetcher = ImageFetcher()
+    try:
+        fetched = await fetch_offer_images(
+            get_offer_repository(), fetcher, PhotoHashIndex()
+        )
+    finally:
+        fetcher.close()
+    logger.info(f"Fetched {fetched} offer images")
+    logger.info("Done!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
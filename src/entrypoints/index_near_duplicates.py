@@ -0,0 +1,30 @@
+import asyncio
+import logging
+
+from src.config import log_init
+from src.repositories.offer.factory import get_offer_repository
+from src.services.helpers.near_duplicates import NearDuplicateIndex
+
+log_init.setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    logger.info("Running...")
+    near_duplicates = NearDuplicateIndex()
+    indexed = len(near_duplicates)
+    async for chunk in get_offer_repository().iter_all_offers():
+        for offer in chunk:
+            near_duplicates.add(offer.clasfieds_id, offer.description)
+    logger.info(f"Indexed {len(near_duplicates) - indexed} new offer descriptions")
+    clusters = near_duplicates.clusters()
+    logger.info(
+        f"Found {len(clusters)} clusters of near duplicate descriptions, "
+        f"covering {sum(len(cluster) for cluster in clusters)} offers"
+    )
+    logger.info("Done!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
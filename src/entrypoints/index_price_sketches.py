@@ -0,0 +1,37 @@
+import asyncio
+import logging
+
+from src.config import log_init
+from src.repositories.offer.factory import get_offer_repository
+from src.services.helpers.price_sketches import PriceSketches
+
+log_init.setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    logger.info("Running...")
+    repository = get_offer_repository()
+    price_sketches = PriceSketches()
+    indexed = len(price_sketches)
+    await repository.refresh_training_offers()
+    # training offers carry no production year, backfilled offers land in
+    # the year-free segments until they are scraped again
+    async for chunk in repository.iter_training_offers():
+        for offer in chunk:
+            if offer.clasfieds_id not in price_sketches.offers:
+                price_sketches.add(
+                    offer.clasfieds_id,
+                    offer.brand,
+                    offer.model,
+                    None,
+                    offer.milage,
+                    offer.price,
+                )
+    logger.info(f"Indexed prices of {len(price_sketches) - indexed} new offers")
+    logger.info("Done!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
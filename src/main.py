@@ -1,13 +1,23 @@
 import logging
+from typing import Iterable
 
 from src.config import log_init
+from src.config.main_config import (
+    LABELING_DATA_BATCH_SIZE,
+    OFFER_SPOOL_DRAIN_TIMEOUT,
+    OFFER_SPOOL_PATH,
+)
 from src.models.labeling import TrainingData
 from src.models.raw_offer import RawOffer, RawOfferLocation, RawOfferParameters
 from src.raw_offer_producer.bezwypadkowe_net import BezwypadkoweTrainingDataProducer
 from src.raw_offer_producer.olx import OlxRawOfferProducer
 from src.raw_offer_producer.otomoto import OtomotoRawOfferProducer
-from src.repositories.helpers import get_engine
-from src.repositories.offer.sql_alchemy import SqlAlchemyOfferRepository
+from src.repositories.helpers import batched
+from src.repositories.offer.base import OfferRepository
+from src.repositories.offer.factory import get_offer_repository
+from src.repositories.offer.spool import OfferSpool, SpooledOfferRepository
+from src.services.helpers.near_duplicates import NearDuplicateIndex
+from src.services.helpers.price_sketches import PriceSketches
 
 log_init.setup_logging()
 
@@ -57,44 +67,80 @@ async def map_offer_data(
 
 
 async def upsert_olx_otomoto_data(
-    offer: RawOffer, scraped_offer_repository: SqlAlchemyOfferRepository
-):
+    offer: RawOffer, scraped_offer_repository: OfferRepository
+) -> bool:
     raw_offer, offer_parameters, offer_location = await map_offer_data(offer=offer)
-    await scraped_offer_repository.add_base_offer_info(raw_offer)
-    await scraped_offer_repository.add_location_offer_info(offer_location)
-    await scraped_offer_repository.add_params_offer_info(offer_parameters)
+    return await scraped_offer_repository.upsert_offer(
+        raw_offer, offer_parameters, offer_location
+    )
 
 
 async def upsert_labeling_data(
-    offer: TrainingData, scraped_offer_repository: SqlAlchemyOfferRepository
-):
-    assert offer.vin
-    is_present = await scraped_offer_repository.select_labeling_data(offer.vin)
-    if not is_present:
-        await scraped_offer_repository.add_labeling_data(vin=offer.vin)
+    training_data: Iterable[TrainingData],
+    scraped_offer_repository: OfferRepository,
+    batch_size: int = LABELING_DATA_BATCH_SIZE,
+) -> int:
+    added = 0
+    for batch in batched(training_data, batch_size):
+        vins = [data.vin for data in batch if data.vin]
+        added += await scraped_offer_repository.add_labeling_data_bulk(vins)
+    return added
 
 
 async def process():
-    engine = get_engine()
-    scraped_offer_repository = SqlAlchemyOfferRepository(engine)
+    scraped_offer_repository = SpooledOfferRepository(
+        get_offer_repository(), OfferSpool(OFFER_SPOOL_PATH)
+    )
+    await scraped_offer_repository.start()
+    try:
+        await _scrape(scraped_offer_repository, NearDuplicateIndex(), PriceSketches())
+    finally:
+        await scraped_offer_repository.close(timeout=OFFER_SPOOL_DRAIN_TIMEOUT)
+    await scraped_offer_repository.refresh_offer_rollups()
+
+
+def _index_offer(
+    offer: RawOffer,
+    near_duplicates: NearDuplicateIndex,
+    price_sketches: PriceSketches,
+) -> None:
+    parameters = offer.parameters[0]
+    near_duplicates.add(offer.id, offer.description)
+    price_sketches.add(
+        offer.id,
+        offer.brand,
+        parameters.model,
+        parameters.manufactured_year,
+        parameters.milage,
+        parameters.price,
+    )
+
+
+async def _scrape(
+    scraped_offer_repository: OfferRepository,
+    near_duplicates: NearDuplicateIndex,
+    price_sketches: PriceSketches,
+):
     olx_raw_offer_producer = OlxRawOfferProducer()
     training_data_producer = BezwypadkoweTrainingDataProducer()
     otomoto_raw_offer_producer = OtomotoRawOfferProducer()
 
     logger.info("Scraping labeling data from BEZWYPADKOWE.NET")
-    vins = list(training_data_producer.get_offers())
-
-    for vin in vins:
-        await upsert_labeling_data(vin, scraped_offer_repository)
+    added = await upsert_labeling_data(
+        training_data_producer.get_offers(), scraped_offer_repository
+    )
+    logger.info(f"Added {added} new VINs to labeling data")
 
     logger.info("Scraping offer data from OLX data")
     olx_offers = list(olx_raw_offer_producer.get_offers())
 
     for offer in olx_offers:
-        await upsert_olx_otomoto_data(offer, scraped_offer_repository)
+        if await upsert_olx_otomoto_data(offer, scraped_offer_repository):
+            _index_offer(offer, near_duplicates, price_sketches)
 
     logger.info("Scraping offer data from OTOMOTO")
     otomoto_offers = list(otomoto_raw_offer_producer.get_offers())
 
     for offer in otomoto_offers:
-        await upsert_olx_otomoto_data(offer, scraped_offer_repository)
+        if await upsert_olx_otomoto_data(offer, scraped_offer_repository):
+            _index_offer(offer, near_duplicates, price_sketches)
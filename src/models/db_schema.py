@@ -3,13 +3,16 @@ from sqlalchemy import (
     BigInteger,
     Boolean,
     Column,
+    Date,
     DateTime,
     Identity,
+    Index,
     Integer,
     MetaData,
     String,
     Table,
     UniqueConstraint,
+    func,
 )
 
 metadata_obj = MetaData()
@@ -26,8 +29,23 @@ offers_base = Table(
     Column("image_links", JSON, nullable=True),
     Column("vin", String, nullable=True),
     Column("scraperd_time", DateTime, nullable=True),
+    Column("content_hash", String, nullable=True),
     UniqueConstraint("clasfieds_id", name="clasfieds_id"),
+    Index("ix_offers_base_vin", "vin"),
+    Index(
+        "ix_offers_base_scraperd_time_brin", "scraperd_time", postgresql_using="brin"
+    ),
 )
+Index("ix_offers_base_lower_brand", func.lower(offers_base.c.brand))
+# day an offer is rolled up under, indexed so rollup refreshes read only the
+# offers of the affected days
+offer_day = func.date(
+    func.coalesce(offers_base.c.created_time, offers_base.c.scraperd_time),
+    type_=Date,
+)
+Index("ix_offers_base_day", offer_day)
+# offers_base.search_vector is a Postgres generated tsvector column with a GIN
+# index, managed by migrations only so the schema stays portable to SQLite
 
 offers_details = Table(
     "offers_details",
@@ -48,6 +66,15 @@ offers_details = Table(
     Column("drive", String, nullable=True),
     Column("country_origin", String, nullable=True),
     Column("righthanddrive", String, nullable=True),
+    Column("vin_manufacturer", String, nullable=True),
+    Column("vin_region", String, nullable=True),
+    Column("vin_check_digit_valid", Boolean, nullable=True),
+    Column("vin_model_year", Integer, nullable=True),
+    Column("vin_brand_match", Boolean, nullable=True),
+    Column("vin_year_match", Boolean, nullable=True),
+    Column("rule_hits", JSON, nullable=True),
+    Column("contact_phones", JSON, nullable=True),
+    Column("contact_emails", JSON, nullable=True),
     UniqueConstraint("clasfieds_id", name="clasfieds_id"),
 )
 
@@ -74,6 +101,7 @@ suspicious_offers = Table(
     Column("id", Integer, Identity(start=1, cycle=True), primary_key=True),
     Column("suspicious_clasfieds_id", Integer, nullable=False),
     Column("is_suspicious", Boolean, nullable=True),
+    Index("ix_suspicious_offers_suspicious_clasfieds_id", "suspicious_clasfieds_id"),
 )
 
 suspicious_offers_v2 = Table(
@@ -82,4 +110,107 @@ suspicious_offers_v2 = Table(
     Column("id", Integer, Identity(start=1, cycle=True), primary_key=True),
     Column("suspicious_clasfieds_id", Integer, nullable=False),
     Column("is_suspicious", Boolean, nullable=True),
+    Index("ix_suspicious_offers_v2_suspicious_clasfieds_id", "suspicious_clasfieds_id"),
+)
+
+offer_versions = Table(
+    "offer_versions",
+    metadata_obj,
+    Column("id", Integer, Identity(start=1, cycle=True), primary_key=True),
+    Column("clasfieds_id", Integer, nullable=False),
+    Column("content_hash", String, nullable=False),
+    Column("title", String, nullable=True),
+    Column("description", String, nullable=True),
+    Column("price", BigInteger, nullable=True),
+    Column("milage", BigInteger, nullable=True),
+    Column("recorded_time", DateTime, nullable=False),
+    Index(
+        "ix_offer_versions_clasfieds_id_recorded_time", "clasfieds_id", "recorded_time"
+    ),
+)
+
+brands = Table(
+    "brands",
+    metadata_obj,
+    Column("id", Integer, Identity(start=1, cycle=True), primary_key=True),
+    Column("name", String, nullable=False),
+    UniqueConstraint("name", name="uc_brands_name"),
+)
+
+brand_aliases = Table(
+    "brand_aliases",
+    metadata_obj,
+    Column("alias", String, primary_key=True),
+    Column("brand_id", Integer, nullable=False),
+)
+
+training_offers = Table(
+    "training_offers",
+    metadata_obj,
+    Column("clasfieds_id", Integer, primary_key=True),
+    Column("brand_id", Integer, nullable=False),
+    Column("title", String, nullable=False),
+    Column("description", String, nullable=True),
+    Column("vin", String, nullable=True),
+    Column("model", String, nullable=False),
+    Column("price", BigInteger, nullable=False),
+    Column("milage", BigInteger, nullable=False),
+    Column("condition", String, nullable=False),
+    Column("country_origin", String, nullable=False),
+    Column("offer_version_id", Integer, nullable=False),
+    Index("ix_training_offers_brand_id", "brand_id"),
+)
+
+offer_labels = Table(
+    "offer_labels",
+    metadata_obj,
+    Column("id", Integer, Identity(start=1, cycle=True), primary_key=True),
+    Column("clasfieds_id", Integer, nullable=False),
+    Column("label_source", String, nullable=False),
+    Column("label_version", Integer, nullable=False),
+    Column("is_suspicious", Boolean, nullable=False),
+    Column("labeled_time", DateTime, nullable=False),
+    Column("offer_version_id", Integer, nullable=True),
+    UniqueConstraint(
+        "clasfieds_id", "label_source", "label_version", name="uc_offer_labels_key"
+    ),
+    Index(
+        "ix_offer_labels_source_clasfieds_id_version",
+        "label_source",
+        "clasfieds_id",
+        "label_version",
+    ),
+    Index("ix_offer_labels_labeled_time", "labeled_time"),
+)
+
+offer_images = Table(
+    "offer_images",
+    metadata_obj,
+    Column("id", Integer, Identity(start=1, cycle=True), primary_key=True),
+    Column("clasfieds_id", Integer, nullable=False),
+    Column("position", Integer, nullable=False),
+    Column("url", String, nullable=False),
+    Column("sha256", String, nullable=True),
+    Column("width", Integer, nullable=True),
+    Column("height", Integer, nullable=True),
+    Column("size", Integer, nullable=True),
+    Column("fetched_time", DateTime, nullable=False),
+    Column("phash", String, nullable=True),
+    UniqueConstraint("clasfieds_id", "position", name="uc_offer_images_key"),
+    Index("ix_offer_images_sha256", "sha256"),
+)
+
+offer_rollups = Table(
+    "offer_rollups",
+    metadata_obj,
+    Column("day", Date, primary_key=True),
+    Column("region", String, primary_key=True),
+    Column("city", String, primary_key=True),
+    Column("brand", String, primary_key=True),
+    Column("label_source", String, primary_key=True),
+    Column("offers", Integer, nullable=False),
+    Column("labeled_offers", Integer, nullable=False),
+    Column("suspicious_offers", Integer, nullable=False),
+    Column("offer_version_id", Integer, nullable=False),
+    Column("labeled_time", DateTime, nullable=True),
 )
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, kw_only=True)
+class OfferImage:
+    clasfieds_id: int
+    position: int
+    url: str
+    sha256: str | None
+    width: int | None = None
+    height: int | None = None
+    size: int | None = None
+    phash: str | None = None
@@ -1,6 +1,22 @@
 from dataclasses import dataclass
+from enum import StrEnum
 
 
 @dataclass(frozen=True, kw_only=True)
 class TrainingData:
     vin: str | None
+
+
+class LabelSource(StrEnum):
+    vin = "vin"
+    description = "description"
+    rules = "rules"
+
+
+@dataclass(frozen=True, kw_only=True)
+class OfferLabel:
+    clasfieds_id: int
+    label_source: LabelSource
+    label_version: int
+    is_suspicious: bool
+    offer_version_id: int | None = None
@@ -14,9 +14,9 @@ class RawOfferParameters:
     id: int
     model: str | None
     price: int | None
-    engine_size: str | None
-    manufactured_year: str | None
-    engine_power: str | None
+    engine_size: int | None
+    manufactured_year: int | None
+    engine_power: int | None
     petrol: str | None
     car_body: str | None
     milage: int | None
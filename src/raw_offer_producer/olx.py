@@ -15,6 +15,7 @@ from src.config.olx_config import (
 )
 from src.models.raw_offer import RawOffer, RawOfferLocation, RawOfferParameters
 from src.raw_offer_producer.base import BaseRawOfferProducer
+from src.raw_offer_producer.parameters import normalize_parameters
 
 log_init.setup_logging()
 
@@ -102,12 +103,7 @@ class OlxRawOfferProducer(BaseRawOfferProducer):
         }
         offer_id = offer.get("id", 0)
 
-        if "price" in params:
-            params["price"] = self.parse_price_to_int(params["price"])
-
-        if "milage" in params:
-            params["milage"] = self.parse_milage_to_int(params["milage"])
-
+        params = normalize_parameters(params)
         params_defaults = {
             key: params.get(key, None)
             for key in RawOfferParameters.__annotations__.keys()
@@ -115,23 +111,3 @@ class OlxRawOfferProducer(BaseRawOfferProducer):
         params_defaults["id"] = offer_id
 
         return from_dict(data_class=RawOfferParameters, data=params_defaults)
-
-    def parse_price_to_int(self, price_str: str) -> int | None:
-        price_str_cleaned = (
-            price_str.replace("zł", "").replace(" ", "").replace(",", "")
-        )
-        try:
-            return int(price_str_cleaned)
-        except ValueError:
-            return None
-
-    def parse_milage_to_int(self, milage_str: str) -> int | None:
-        if milage_str is None:
-            return None
-        milage_str_cleaned = (
-            milage_str.replace("km", "").replace(" ", "").replace(",", "")
-        )
-        try:
-            return int(milage_str_cleaned)
-        except ValueError:
-            return None
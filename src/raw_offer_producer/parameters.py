@@ -0,0 +1,27 @@
+from price_parser import Price  # type: ignore
+
+# offer parameters holding a number with an optional unit or currency label,
+# e.g. "35 000 zł", "186 000 km", "1 598 cm³", "150 KM" or "2015"
+NUMERIC_PARAMETERS = (
+    "price",
+    "milage",
+    "engine_size",
+    "engine_power",
+    "manufactured_year",
+)
+
+
+def parse_number(label: str | int | None) -> int | None:
+    if label is None or isinstance(label, int):
+        return label
+    amount = Price.fromstring(label).amount
+    if amount is None:
+        return None
+    return int(amount)
+
+
+def normalize_parameters(params: dict) -> dict:
+    return {
+        key: parse_number(value) if key in NUMERIC_PARAMETERS else value
+        for key, value in params.items()
+    }
@@ -0,0 +1,171 @@
+import html
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator
+
+from src.config.phrase_rules_config import (
+    HOME_COUNTRY_CODE,
+    NEGATION_WINDOW,
+    NEGATIONS,
+    PHRASE_RULES,
+)
+
+RULES_LABEL_VERSION = 2
+
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+_NON_ALPHANUMERIC_PATTERN = re.compile(r"[^a-z0-9]+")
+_EMAIL_AT_PATTERN = re.compile(r"\s*[(\[]\s*(?:at|malpa|małpa)\s*[)\]]\s*")
+_EMAIL_DOT_PATTERN = re.compile(r"\s*[(\[]\s*(?:dot|kropka)\s*[)\]]\s*")
+_EMAIL_PATTERN = re.compile(r"[a-z0-9._%+-]+@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}")
+_PHONE_PATTERN = re.compile(
+    r"(?<![\d+])(?:(?:\+|00)(\d{1,3})[\s.-]?)?(\d{2,4}(?:[\s.-]?\d{2,4}){2,3})(?!\d)"
+)
+# letters NFKD does not decompose into a base letter
+_FOLDED_LETTERS = str.maketrans({"ł": "l", "ß": "ss", "ø": "o", "đ": "d"})
+
+
+def strip_html(text: str | None) -> str:
+    return _TAG_PATTERN.sub(" ", html.unescape(text or ""))
+
+
+def fold_text(text: str) -> str:
+    """Lowercase text without diacritics and punctuation, words separated by
+    single spaces."""
+    # combining marks left by NFKD are not ASCII and get dropped
+    text = (
+        unicodedata.normalize("NFKD", text.lower().translate(_FOLDED_LETTERS))
+        .encode("ascii", "ignore")
+        .decode()
+    )
+    return _NON_ALPHANUMERIC_PATTERN.sub(" ", text).strip()
+
+
+def extract_emails(text: str) -> list[str]:
+    text = _EMAIL_DOT_PATTERN.sub(".", _EMAIL_AT_PATTERN.sub("@", text.lower()))
+    return list(dict.fromkeys(_EMAIL_PATTERN.findall(text)))
+
+
+def extract_phones(text: str) -> list[str]:
+    """Phone numbers in E.164 format."""
+    phones = []
+    for country_code, number in _PHONE_PATTERN.findall(text):
+        digits = re.sub(r"\D", "", number)
+        if not country_code and len(digits) == 9:
+            phones.append(f"+{HOME_COUNTRY_CODE}{digits}")
+        elif country_code and 8 <= len(country_code + digits) <= 15:
+            phones.append(f"+{country_code}{digits}")
+    return list(dict.fromkeys(phones))
+
+
+class AhoCorasick:
+    """Automaton matching all patterns in a single pass over a text."""
+
+    def __init__(self, patterns: list[str]) -> None:
+        self.patterns = patterns
+        self.goto: list[dict[str, int]] = [{}]
+        self.outputs: list[list[int]] = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for character in pattern:
+                if character not in self.goto[state]:
+                    self.goto.append({})
+                    self.outputs.append([])
+                    self.goto[state][character] = len(self.goto) - 1
+                state = self.goto[state][character]
+            self.outputs[state].append(pattern_id)
+
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and character not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(character, 0)
+                self.outputs[next_state] += self.outputs[self.fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int]]:
+        """(start position, pattern id) of every occurrence of a pattern."""
+        goto, fail, outputs, patterns = (
+            self.goto,
+            self.fail,
+            self.outputs,
+            self.patterns,
+        )
+        state = 0
+        for position, character in enumerate(text):
+            while state and character not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(character, 0)
+            for pattern_id in outputs[state]:
+                yield position - len(patterns[pattern_id]) + 1, pattern_id
+
+
+@dataclass(frozen=True, kw_only=True)
+class RuleHits:
+    """Scam phrase rules matched in an offer and the contacts found in it.
+    Contacts are features only, most honest sellers leave a phone number."""
+
+    rules: tuple[str, ...]
+    phones: tuple[str, ...]
+    emails: tuple[str, ...]
+
+    @property
+    def is_suspicious(self) -> bool:
+        return bool(self.rules)
+
+    @property
+    def has_foreign_phone(self) -> bool:
+        return any(
+            not phone.startswith(f"+{HOME_COUNTRY_CODE}") for phone in self.phones
+        )
+
+
+class PhraseRuleEngine:
+    def __init__(
+        self,
+        rules: dict[str, list[str]] = PHRASE_RULES,
+        negations: tuple[str, ...] = NEGATIONS,
+        negation_window: int = NEGATION_WINDOW,
+    ) -> None:
+        self.negations = frozenset(negations)
+        self.negation_window = negation_window
+        phrase_rules: dict[str, set[str]] = {}
+        for rule, phrases in rules.items():
+            for phrase in phrases:
+                phrase_rules.setdefault(fold_text(phrase), set()).add(rule)
+        self.phrases = list(phrase_rules)
+        self.phrase_rules = [phrase_rules[phrase] for phrase in self.phrases]
+        self.automaton = AhoCorasick(self.phrases)
+
+    def _is_negated(self, folded: str, start: int) -> bool:
+        preceding = folded[:start].split()[-self.negation_window :]
+        return not self.negations.isdisjoint(preceding)
+
+    def match_rules(self, text: str) -> set[str]:
+        folded = fold_text(text)
+        rules: set[str] = set()
+        for start, phrase_id in self.automaton.iter_matches(folded):
+            if (start == 0 or folded[start - 1] == " ") and not self._is_negated(
+                folded, start
+            ):
+                rules |= self.phrase_rules[phrase_id]
+        return rules
+
+    def match(self, title: str | None, description: str | None) -> RuleHits:
+        text = strip_html(f"{title or ''}\n{description or ''}")
+        return RuleHits(
+            rules=tuple(sorted(self.match_rules(text))),
+            phones=tuple(extract_phones(text)),
+            emails=tuple(extract_emails(text)),
+        )
+
+
+@lru_cache(maxsize=None)
+def phrase_rule_engine() -> PhraseRuleEngine:
+    return PhraseRuleEngine()
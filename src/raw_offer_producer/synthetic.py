@@ -0,0 +1,162 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from src.config.brand_config import BRAND_ALIASES, BRAND_WMIS
+from src.config.synthetic_config import (
+    SYNTHETIC_BRAND_MODELS,
+    SYNTHETIC_BRAND_WEIGHTS,
+    SYNTHETIC_DEFAULT_MODELS,
+    SYNTHETIC_DESCRIPTION_PHRASES,
+    SYNTHETIC_LOCATIONS,
+    SYNTHETIC_PARAMETER_CHOICES,
+    SYNTHETIC_SUSPICIOUS_PHRASES,
+)
+from src.models.labeling import TrainingData
+from src.models.raw_offer import RawOffer, RawOfferLocation, RawOfferParameters
+from src.raw_offer_producer.base import BaseRawOfferProducer
+from src.raw_offer_producer.vin import vin_check_digit, vin_year_code
+
+VIN_ALPHABET = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+SUSPICIOUS_VINS = [
+    "zapytaj",
+    "kontakt tel",
+    "WAUZZZXXXXXXXXXXX",
+    "11111111111111111",
+    "123456789ABCDEFGH",
+    "nrvin w wiadomosci",
+]
+
+
+class SyntheticOfferGenerator:
+    """Seeded generator of offers and labeling data with field distributions
+    close to scraped OLX and Otomoto data, for benchmarks and fixtures."""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        start_id: int = 1,
+        suspicious_rate: float = 0.03,
+        missing_vin_rate: float = 0.1,
+        now: datetime = datetime(2026, 1, 1, tzinfo=timezone.utc),
+    ) -> None:
+        self.random = random.Random(seed)
+        self.next_id = start_id
+        self.suspicious_rate = suspicious_rate
+        self.missing_vin_rate = missing_vin_rate
+        self.now = now
+        self.brands = list(BRAND_ALIASES)
+        self.brand_weights = [
+            SYNTHETIC_BRAND_WEIGHTS.get(brand, 1) for brand in self.brands
+        ]
+        self.regions = list(SYNTHETIC_LOCATIONS)
+
+    def vin(self, brand: str, year: int) -> str:
+        wmi = self.random.choice(BRAND_WMIS.get(brand, ["ZZZ"]))
+        vds = "".join(self.random.choices(VIN_ALPHABET, k=5))
+        vis = (
+            vin_year_code(year)
+            + self.random.choice(VIN_ALPHABET)
+            + "".join(self.random.choices("0123456789", k=6))
+        )
+        return wmi + vds + vin_check_digit(wmi + vds + "0" + vis) + vis
+
+    def description(self, suspicious: bool) -> str:
+        phrases = self.random.sample(
+            SYNTHETIC_DESCRIPTION_PHRASES, k=self.random.randint(2, 6)
+        )
+        if suspicious:
+            phrases.insert(
+                self.random.randrange(len(phrases) + 1),
+                self.random.choice(SYNTHETIC_SUSPICIOUS_PHRASES),
+            )
+        # scraped descriptions keep the HTML line breaks of the offer form
+        return "<br />\n".join(phrases)
+
+    def offer(self) -> RawOffer:
+        offer_id = self.next_id
+        self.next_id += 1
+        suspicious = self.random.random() < self.suspicious_rate
+
+        brand = self.random.choices(self.brands, weights=self.brand_weights)[0]
+        model = self.random.choice(
+            SYNTHETIC_BRAND_MODELS.get(brand, SYNTHETIC_DEFAULT_MODELS)
+        )
+        year = min(int(self.random.triangular(1998, 2026, 2016)), 2025)
+        age = 2026 - year
+        milage = max(int(self.random.gauss(17000 * age, 6000 * age + 5000)), 0)
+        price = int(self.random.lognormvariate(10.9 - 0.08 * age, 0.45)) // 100 * 100
+        if suspicious:
+            price = price * 6 // 10
+
+        if suspicious and self.random.random() < 0.5:
+            vin: str | None = self.random.choice(SUSPICIOUS_VINS)
+        elif self.random.random() < self.missing_vin_rate:
+            vin = None
+        else:
+            vin = self.vin(brand, year)
+
+        region = self.random.choice(self.regions)
+        created_time = self.now - timedelta(
+            minutes=self.random.randint(0, 60 * 24 * 365)
+        )
+        parameters = RawOfferParameters(
+            id=offer_id,
+            model=model,
+            price=price,
+            engine_size=self.random.choice([999, 1199, 1398, 1598, 1968, 2993]),
+            manufactured_year=year,
+            engine_power=self.random.randint(60, 350),
+            milage=milage,
+            vin=vin,
+            **{
+                key: self.random.choice(choices)
+                for key, choices in SYNTHETIC_PARAMETER_CHOICES.items()
+            },
+        )
+        return RawOffer(
+            brand=brand,
+            id=offer_id,
+            link=f"https://www.olx.pl/d/oferta/{brand.lower()}-{offer_id}.html",
+            title=f"{brand} {model} {year}",
+            created_time=created_time,
+            description=self.description(suspicious),
+            image_links=[
+                f"https://ireland.apollo.olxcdn.com/v1/files/{offer_id}-{index}/image"
+                for index in range(self.random.randint(1, 12))
+            ],
+            parameters=[parameters],
+            location=[
+                RawOfferLocation(
+                    id=offer_id,
+                    region=region,
+                    city=self.random.choice(SYNTHETIC_LOCATIONS[region]),
+                )
+            ],
+            vin=vin,
+            scraped_time=created_time + timedelta(hours=self.random.randint(0, 72)),
+        )
+
+    def training_data(self) -> TrainingData:
+        brand = self.random.choices(self.brands, weights=self.brand_weights)[0]
+        return TrainingData(vin=self.vin(brand, self.random.randint(1998, 2025)))
+
+
+class SyntheticRawOfferProducer(BaseRawOfferProducer):
+    def __init__(self, count: int, generator: SyntheticOfferGenerator | None = None):
+        self.count = count
+        self.generator = generator or SyntheticOfferGenerator()
+
+    def get_offers(self) -> Iterator[RawOffer]:
+        for _ in range(self.count):
+            yield self.generator.offer()
+
+
+class SyntheticTrainingDataProducer(BaseRawOfferProducer):
+    def __init__(self, count: int, generator: SyntheticOfferGenerator | None = None):
+        self.count = count
+        self.generator = generator or SyntheticOfferGenerator()
+
+    def get_offers(self) -> Iterator[TrainingData]:
+        for _ in range(self.count):
+            yield self.generator.training_data()
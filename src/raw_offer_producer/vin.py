@@ -0,0 +1,174 @@
+import re
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.config.brand_config import BRAND_ALIASES, BRAND_WMIS
+from src.config.main_config import VIN_DECODE_CACHE_SIZE
+
+VIN_PATTERN = r"[A-HJ-NPR-Z0-9]{17}"
+_VIN_PATTERN = re.compile(VIN_PATTERN)
+VIN_YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+VIN_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+VIN_TRANSLITERATION = {
+    **{str(digit): digit for digit in range(10)},
+    **dict(zip("ABCDEFGH", range(1, 9))),
+    **dict(zip("JKLMN", range(1, 6))),
+    "P": 7,
+    "R": 9,
+    **dict(zip("STUVWXYZ", range(2, 10))),
+}
+# region of the manufacturer by the first character of the WMI
+VIN_REGIONS = {
+    **dict.fromkeys("ABCDEFGH", "africa"),
+    **dict.fromkeys("JKLMNPR", "asia"),
+    **dict.fromkeys("STUVWXYZ", "europe"),
+    **dict.fromkeys("12345", "north_america"),
+    **dict.fromkeys("67", "oceania"),
+    **dict.fromkeys("89", "south_america"),
+}
+
+WMI_MANUFACTURERS = {wmi: brand for brand, wmis in BRAND_WMIS.items() for wmi in wmis}
+BRAND_NAMES = {
+    alias: name for name, aliases in BRAND_ALIASES.items() for alias in aliases
+}
+
+# lookup tables indexed by ASCII code, for the vectorized decoding
+_TRANSLITERATION_TABLE = np.zeros(128, dtype=np.int64)
+for _character, _value in VIN_TRANSLITERATION.items():
+    _TRANSLITERATION_TABLE[ord(_character)] = _value
+_YEAR_CODE_TABLE = np.full(128, -1, dtype=np.int64)
+for _index, _character in enumerate(VIN_YEAR_CODES):
+    _YEAR_CODE_TABLE[ord(_character)] = _index
+
+VIN_FEATURES = (
+    "vin_manufacturer",
+    "vin_region",
+    "vin_check_digit_valid",
+    "vin_model_year",
+    "vin_brand_match",
+    "vin_year_match",
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class VinInfo:
+    wmi: str
+    manufacturer: str | None
+    region: str | None
+    check_digit_valid: bool
+    model_year: int | None
+
+
+def vin_check_digit(vin: str) -> str:
+    total = sum(
+        VIN_TRANSLITERATION[character] * weight
+        for character, weight in zip(vin.upper(), VIN_WEIGHTS)
+    )
+    remainder = total % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def vin_year_code(year: int) -> str:
+    # the code alphabet repeats every 30 years, starting from 1980
+    return VIN_YEAR_CODES[(year - 1980) % 30]
+
+
+def max_model_year() -> int:
+    # model years run up to a year ahead of the calendar
+    return date.today().year + 1
+
+
+def vin_model_year(code: str, max_year: int) -> int | None:
+    index = VIN_YEAR_CODES.find(code)
+    if index < 0:
+        return None
+    year = 1980 + index
+    return year + 30 if year + 30 <= max_year else year
+
+
+@lru_cache(maxsize=VIN_DECODE_CACHE_SIZE)
+def decode_vin(vin: str) -> VinInfo | None:
+    vin = vin.strip().upper()
+    if not _VIN_PATTERN.fullmatch(vin):
+        return None
+    return VinInfo(
+        wmi=vin[:3],
+        manufacturer=WMI_MANUFACTURERS.get(vin[:3]),
+        region=VIN_REGIONS.get(vin[0]),
+        check_digit_valid=vin[8] == vin_check_digit(vin),
+        model_year=vin_model_year(vin[9], max_model_year()),
+    )
+
+
+def vin_features(
+    vin: str | None, brand: str | None, manufactured_year: int | None
+) -> dict:
+    info = decode_vin(vin) if vin else None
+    if info is None:
+        return dict.fromkeys(VIN_FEATURES)
+    brand_name = BRAND_NAMES.get(brand.lower()) if brand else None
+    return {
+        "vin_manufacturer": info.manufacturer,
+        "vin_region": info.region,
+        "vin_check_digit_valid": info.check_digit_valid,
+        "vin_model_year": info.model_year,
+        "vin_brand_match": (
+            info.manufacturer == brand_name
+            if info.manufacturer and brand_name
+            else None
+        ),
+        # the model year is often a year ahead of the production year
+        "vin_year_match": (
+            abs(info.model_year - manufactured_year) <= 1
+            if info.model_year and manufactured_year
+            else None
+        ),
+    }
+
+
+def vin_features_frame(
+    vins: pd.Series, brands: pd.Series, manufactured_years: pd.Series
+) -> pd.DataFrame:
+    """Vectorized vin_features for aligned columns of many offers."""
+    vins = vins.astype(object).where(vins.notna(), "").str.strip().str.upper()
+    valid = vins.str.fullmatch(VIN_PATTERN).to_numpy(dtype=bool)
+    features = pd.DataFrame(
+        {
+            feature: pd.Series(pd.NA, index=vins.index, dtype=object)
+            for feature in VIN_FEATURES
+        }
+    )
+    if not valid.any():
+        return features
+
+    valid_vins = vins[valid]
+    codes = np.frombuffer("".join(valid_vins).encode("ascii"), dtype=np.uint8)
+    codes = codes.reshape(-1, 17)
+    remainders = (_TRANSLITERATION_TABLE[codes] @ np.array(VIN_WEIGHTS)) % 11
+    check_digits = np.where(remainders == 10, ord("X"), remainders + ord("0"))
+    years = _YEAR_CODE_TABLE[codes[:, 9]] + 1980
+    years = np.where(years + 30 <= max_model_year(), years + 30, years)
+    model_years = pd.Series(
+        np.where(_YEAR_CODE_TABLE[codes[:, 9]] >= 0, years, 0),
+        index=valid_vins.index,
+    ).replace(0, pd.NA)
+
+    manufacturers = valid_vins.str[:3].map(WMI_MANUFACTURERS)
+    brand_names = brands[valid].astype(object).str.lower().map(BRAND_NAMES)
+    year_distance = (model_years - manufactured_years[valid]).abs()
+
+    features.loc[valid, "vin_manufacturer"] = manufacturers
+    features.loc[valid, "vin_region"] = valid_vins.str[0].map(VIN_REGIONS)
+    features.loc[valid, "vin_check_digit_valid"] = check_digits == codes[:, 8]
+    features.loc[valid, "vin_model_year"] = model_years
+    features.loc[valid, "vin_brand_match"] = (manufacturers == brand_names).where(
+        manufacturers.notna() & brand_names.notna()
+    )
+    features.loc[valid, "vin_year_match"] = (year_distance <= 1).where(
+        year_distance.notna()
+    )
+    return features.astype(object).where(features.notna(), None)
@@ -0,0 +1,100 @@
+import os
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+
+def _file_rows(path: Path, row_bytes: int) -> int:
+    return path.stat().st_size // row_bytes if path.exists() else 0
+
+
+class AppendOnlyRows:
+    """Rows of width values appended to a file next to a file of their keys.
+    Values are written before keys and on open both files are cut to the rows
+    complete in both, so an append interrupted by a crash is dropped whole.
+    Values are kept in a growing array, or memory-mapped unless in_memory."""
+
+    def __init__(
+        self,
+        keys_path: Path,
+        values_path: Path,
+        key_dtype: DTypeLike,
+        dtype: DTypeLike,
+        width: int,
+        in_memory: bool = True,
+    ) -> None:
+        self.keys_path = keys_path
+        self.values_path = values_path
+        self.key_dtype = np.dtype(key_dtype)
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.in_memory = in_memory
+        self.row_bytes = self.dtype.itemsize * width
+
+        size = min(
+            _file_rows(keys_path, self.key_dtype.itemsize),
+            _file_rows(values_path, self.row_bytes),
+        )
+        for path, row_bytes in (
+            (keys_path, self.key_dtype.itemsize),
+            (values_path, self.row_bytes),
+        ):
+            if path.exists() and path.stat().st_size > size * row_bytes:
+                os.truncate(path, size * row_bytes)
+
+        self.keys: list = self._to_keys(
+            np.fromfile(keys_path, self.key_dtype, count=size) if size else []
+        )
+        self._buffer: np.ndarray | None = None
+        self._memmap: np.ndarray | None = None
+        if in_memory:
+            self._buffer = np.empty((max(size, 1024), width), self.dtype)
+            if size:
+                self._buffer[:size] = np.fromfile(
+                    values_path, self.dtype, count=size * width
+                ).reshape(size, width)
+
+    def _to_keys(self, keys) -> list:
+        if self.key_dtype.kind == "V":
+            return [key.tobytes() for key in keys]
+        return np.asarray(keys, self.key_dtype).tolist()
+
+    def _key_bytes(self, keys: list) -> bytes:
+        if self.key_dtype.kind == "V":
+            return b"".join(keys)
+        return np.asarray(keys, self.key_dtype).tobytes()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def values(self) -> np.ndarray:
+        if self._buffer is not None:
+            return self._buffer[: len(self)]
+        if self._memmap is None or len(self._memmap) != len(self):
+            self._memmap = np.memmap(
+                self.values_path,
+                dtype=self.dtype,
+                mode="r",
+                shape=(len(self), self.width),
+            )
+        return self._memmap
+
+    def append(self, keys: list, values: np.ndarray) -> int:
+        """Append rows and return the index of the first one."""
+        values = np.ascontiguousarray(values, self.dtype).reshape(-1, self.width)
+        if len(keys) != len(values):
+            raise ValueError(f"{len(keys)} keys for {len(values)} rows")
+        with open(self.values_path, "ab") as values_file:
+            values_file.write(values.tobytes())
+        with open(self.keys_path, "ab") as keys_file:
+            keys_file.write(self._key_bytes(keys))
+
+        start = len(self)
+        if self._buffer is not None:
+            while start + len(values) > len(self._buffer):
+                self._buffer = np.concatenate([self._buffer, self._buffer])
+            self._buffer[start : start + len(values)] = values
+        self.keys.extend(keys)
+        return start
@@ -1,8 +1,39 @@
+from itertools import islice
+from typing import Iterable, Iterator, TypeVar
+
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
-from src.config.main_config import DB_URL
+from src.config.main_config import (
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_QUERY_CACHE_SIZE,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_URL,
+)
+from src.repositories.telemetry import InstrumentedAsyncQueuePool, instrument_engine
+
+T = TypeVar("T")
 
 
 def get_engine() -> AsyncEngine:
-    print(DB_URL)
-    return create_async_engine(DB_URL, echo=True)
+    engine = create_async_engine(
+        DB_URL,
+        echo=DB_ECHO,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        query_cache_size=DB_QUERY_CACHE_SIZE,
+        connect_args={"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+    )
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+def batched(iterable: Iterable[T], batch_size: int) -> Iterator[list[T]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
@@ -0,0 +1,38 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from src.config.main_config import IMAGE_STORE_PATH
+
+
+class ImageStore:
+    """Content-addressed image blobs, stored under their SHA-256 in a two
+    level directory fan-out, with JPEG thumbnails kept alongside."""
+
+    def __init__(self, path: Path = IMAGE_STORE_PATH) -> None:
+        self.path = path
+
+    def _path(self, kind: str, digest: str, suffix: str = "") -> Path:
+        return self.path / kind / digest[:2] / digest[2:4] / f"{digest}{suffix}"
+
+    def blob_path(self, digest: str) -> Path:
+        return self._path("blobs", digest)
+
+    def thumbnail_path(self, digest: str) -> Path:
+        return self._path("thumbnails", digest, ".jpg")
+
+    def __contains__(self, digest: str) -> bool:
+        return self.blob_path(digest).exists()
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(
+                f".{digest}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return digest
@@ -0,0 +1,121 @@
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterator
+
+import pyarrow as pa  # type: ignore
+import pyarrow.compute as pc  # type: ignore
+import pyarrow.dataset as ds  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+from sqlalchemy import JSON, Boolean, DateTime, Integer
+
+from src.config.main_config import OFFER_ARCHIVE_PATH
+from src.models.db_schema import offer_versions
+from src.repositories.offer.values import ARCHIVED_OFFER_COLUMNS
+
+
+def _arrow_type(column) -> pa.DataType:
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, JSON):
+        return pa.list_(pa.string())
+    return pa.string()
+
+
+def _schema(columns) -> pa.Schema:
+    return pa.schema([pa.field(column.name, _arrow_type(column)) for column in columns])
+
+
+ARCHIVE_SCHEMA = _schema(ARCHIVED_OFFER_COLUMNS)
+VERSIONS_ARCHIVE_SCHEMA = _schema(
+    column for column in offer_versions.c if column.name != "id"
+)
+
+
+class OfferArchive:
+    """Cold storage of offers as zstd compressed Parquet files, one directory
+    per month of the last scrape. Their versions are kept under _versions,
+    one directory per month they were recorded."""
+
+    def __init__(self, path: Path = OFFER_ARCHIVE_PATH) -> None:
+        self.path = path
+        # pyarrow skips underscore prefixed directories when reading offers
+        self.versions_path = path / "_versions"
+
+    @staticmethod
+    def _write(
+        path: Path, prefix: str, rows: list[dict], schema: pa.Schema, time_column: str
+    ) -> None:
+        by_month: dict[str, list[dict]] = defaultdict(list)
+        for row in rows:
+            by_month[row[time_column].strftime("%Y-%m")].append(row)
+
+        for month, month_rows in by_month.items():
+            month_path = path / month
+            month_path.mkdir(parents=True, exist_ok=True)
+            # named after the id range, so a batch retried after a crash
+            # replaces its own file instead of duplicating rows
+            clasfieds_ids = [row["clasfieds_id"] for row in month_rows]
+            file_name = f"{prefix}-{min(clasfieds_ids)}-{max(clasfieds_ids)}.parquet"
+            tmp_path = month_path / f".{file_name}.tmp"
+            pq.write_table(
+                pa.Table.from_pylist(month_rows, schema=schema),
+                tmp_path,
+                compression="zstd",
+            )
+            os.replace(tmp_path, month_path / file_name)
+
+    def write(self, offers: list[dict]) -> None:
+        self._write(self.path, "offers", offers, ARCHIVE_SCHEMA, "scraperd_time")
+
+    def write_versions(self, versions: list[dict]) -> None:
+        self._write(
+            self.versions_path,
+            "versions",
+            versions,
+            VERSIONS_ARCHIVE_SCHEMA,
+            "recorded_time",
+        )
+
+    @staticmethod
+    def _dataset(path: Path, schema: pa.Schema = ARCHIVE_SCHEMA) -> ds.Dataset | None:
+        if not path.exists() or next(path.rglob("*.parquet"), None) is None:
+            return None
+        return ds.dataset(path, format="parquet", schema=schema)
+
+    def iter_batches(
+        self,
+        columns: list[str],
+        chunk_size: int,
+        filter: pc.Expression | None = None,
+    ) -> Iterator[list[dict]]:
+        dataset = self._dataset(self.path)
+        if dataset is None:
+            return
+        for batch in dataset.to_batches(
+            columns=columns, filter=filter, batch_size=chunk_size
+        ):
+            if batch.num_rows:
+                yield batch.to_pylist()
+
+    def select(
+        self, clasfieds_ids: list[int], columns: list[str] | None = None
+    ) -> list[dict]:
+        dataset = self._dataset(self.path)
+        if dataset is None or not clasfieds_ids:
+            return []
+        table = dataset.to_table(
+            columns=columns, filter=ds.field("clasfieds_id").isin(clasfieds_ids)
+        )
+        return table.to_pylist()
+
+    def select_versions(self, clasfieds_id: int) -> list[dict]:
+        dataset = self._dataset(self.versions_path, VERSIONS_ARCHIVE_SCHEMA)
+        if dataset is None:
+            return []
+        table = dataset.to_table(filter=ds.field("clasfieds_id") == clasfieds_id)
+        return table.sort_by("recorded_time").to_pylist()
@@ -1,6 +1,14 @@
-from typing import Protocol
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Protocol, Sequence
 
-from src.models.raw_offer import RawOffer, RawOfferLocation, RawOfferParameters
+from src.models.image import OfferImage
+from src.models.labeling import LabelSource, OfferLabel
+from src.models.raw_offer import (
+    RawOffer,
+    RawOfferLocation,
+    RawOfferParameters,
+    SuspiciousOffer,
+)
 
 
 class OfferRepository(Protocol):
@@ -15,5 +23,146 @@ class OfferRepository(Protocol):
     async def add_params_offer_info(self, offer_parameters: RawOfferParameters) -> None:
         """Add all secondary offer details"""
 
+    async def upsert_offer(
+        self,
+        raw_offer: RawOffer,
+        offer_parameters: RawOfferParameters,
+        raw_offer_location: RawOfferLocation,
+    ) -> bool:
+        """Insert new or changed offer and record its version, return if written"""
+
+    async def upsert_offers(
+        self, offers: list[tuple[RawOffer, RawOfferParameters, RawOfferLocation]]
+    ) -> list[bool]:
+        """upsert_offer for many offers in one transaction"""
+
+    async def select_offer_versions(self, clasfieds_id: int) -> Any:
+        """Select price and content history of an offer"""
+
+    async def select_offers_versions(self, clasfieds_ids: list[int]) -> Any:
+        """Select price and content history of many offers"""
+
     async def add_labeling_data(self, vin: str) -> None:
         """Add scraped labeling data"""
+
+    async def add_labeling_data_bulk(self, vins: list[str]) -> int:
+        """Add a batch of scraped labeling data, return number of new VINs"""
+
+    async def select_labeling_data(self, vin: str) -> bool:
+        """Check if VIN is present in labeling data"""
+
+    async def select_existing_labeling_data(self, vins: list[str]) -> set[str]:
+        """Select which of the VINs are present in labeling data"""
+
+    async def select_single_base_offer(self, clasfieds_id: int) -> Any:
+        """Select basic offer information"""
+
+    async def select_base_offers(self, clasfieds_ids: list[int]) -> Any:
+        """Select basic offer information of many offers"""
+
+    async def select_stale_offers(self, older_than: datetime, limit: int) -> Any:
+        """Select flattened offers last scraped before the given time"""
+
+    async def delete_offers(self, clasfieds_ids: list[int]) -> int:
+        """Delete offers with their details, location, versions and training rows"""
+
+    async def search_offers(
+        self, query: str, limit: int = ..., offset: int = ...
+    ) -> Any:
+        """Full-text search offer titles and descriptions, best matches first"""
+
+    async def refresh_offer_rollups(self) -> int:
+        """Recompute daily rollups of days with new offers or labels"""
+
+    async def select_offer_rollups(
+        self,
+        label_source: LabelSource,
+        start_day: date,
+        end_day: date | None = None,
+        dimensions: Sequence[str] = ...,
+    ) -> Any:
+        """Select offer and label counts summed over the given dimensions"""
+
+    async def select_all_offers(self) -> Any:
+        """Select all complete offers of known brands"""
+
+    def iter_all_offers(self, chunk_size: int = ...) -> AsyncIterator[list]:
+        """Stream all complete offers of known brands in chunks"""
+
+    async def sync_brands(self, aliases: dict[str, list[str]] = ...) -> None:
+        """Synchronize brand dimension with configured aliases"""
+
+    async def refresh_training_offers(self) -> int:
+        """Refresh training offers with new and changed offers"""
+
+    async def select_training_offers(self) -> Any:
+        """Select precomputed training offers"""
+
+    def iter_training_offers(self, chunk_size: int = ...) -> AsyncIterator[list]:
+        """Stream precomputed training offers in chunks"""
+
+    async def add_offer_labels(self, labels: list[OfferLabel]) -> None:
+        """Insert or update a batch of versioned offer labels"""
+
+    def iter_unlabeled_training_offers(
+        self, label_source: LabelSource, label_version: int, chunk_size: int = ...
+    ) -> AsyncIterator[list]:
+        """Stream training offers without a label of the given version, or
+        changed since they were labeled, in chunks"""
+
+    async def add_offer_images(self, images: list[OfferImage]) -> None:
+        """Insert or update the fetched images of offers"""
+
+    async def select_offer_images(self, clasfieds_id: int) -> Any:
+        """Select fetched images of an offer in listing order"""
+
+    async def select_offers_by_image(self, sha256s: list[str]) -> Any:
+        """Select offers using any of the image blobs"""
+
+    async def select_offers_without_images(self, after_id: int, limit: int) -> Any:
+        """Select offers with image links and no fetched images, by id after
+        after_id"""
+
+    async def select_latest_offer_label(
+        self, clasfieds_id: int, label_source: LabelSource
+    ) -> Any:
+        """Select latest label version of an offer"""
+
+    def iter_latest_offer_labels(
+        self, label_source: LabelSource, chunk_size: int = ...
+    ) -> AsyncIterator[list]:
+        """Stream latest label version of every labeled offer in chunks"""
+
+    async def select_all_suspicious_offers(self) -> Any:
+        """Select all VIN based labels"""
+
+    def iter_all_suspicious_offers(self, chunk_size: int = ...) -> AsyncIterator[list]:
+        """Stream all VIN based labels in chunks"""
+
+    async def select_single_suspicious_offer(self, clasfieds_offer_id: int) -> Any:
+        """Select VIN based label of an offer"""
+
+    async def add_suspicious_offer(self, suspicious_offer: SuspiciousOffer) -> None:
+        """Add VIN based label"""
+
+    async def select_suspicious_offers_from_labeling_data(self) -> Any:
+        """Select offers with VIN present in labeling data"""
+
+    def iter_suspicious_offers_from_labeling_data(
+        self, chunk_size: int = ...
+    ) -> AsyncIterator[list]:
+        """Stream offers with VIN present in labeling data in chunks"""
+
+    async def add_suspicious_offer_v2(self, suspicious_offer: SuspiciousOffer) -> None:
+        """Add description based label"""
+
+    async def select_all_suspicious_offers_v2(self) -> Any:
+        """Select all description based labels"""
+
+    def iter_all_suspicious_offers_v2(
+        self, chunk_size: int = ...
+    ) -> AsyncIterator[list]:
+        """Stream all description based labels in chunks"""
+
+    async def select_single_suspicious_offer_v2(self, clasfieds_offer_id: int) -> Any:
+        """Select description based label of an offer"""
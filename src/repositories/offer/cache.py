@@ -0,0 +1,213 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from src.config.main_config import OFFER_CACHE_MAX_SIZE, OFFER_CACHE_TTL
+from src.models.labeling import LabelSource, OfferLabel
+from src.models.raw_offer import RawOffer, RawOfferLocation, RawOfferParameters
+from src.repositories.offer.base import OfferRepository
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after ttl seconds.
+
+    A value loaded while its key is invalidated must not be stored, so loads
+    take a generation before reading and store only if the key has not been
+    invalidated since."""
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        # generation of the latest invalidation of recently invalidated keys,
+        # older ones are forgotten and covered by the forgotten generation
+        self._invalidations: OrderedDict[Hashable, int] = OrderedDict()
+        self._forgotten_generation = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def generation(self) -> int:
+        return self._generation
+
+    def set(self, key: Hashable, value: Any, generation: int | None = None) -> None:
+        if generation is not None and generation < self._invalidations.get(
+            key, self._forgotten_generation
+        ):
+            return
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        self._generation += 1
+        self._invalidations[key] = self._generation
+        self._invalidations.move_to_end(key)
+        if len(self._invalidations) > self.max_size:
+            self._forgotten_generation = self._invalidations.popitem(last=False)[1]
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+
+class CachedOfferRepository:
+    """Read-through cache for single-row lookups. Writes made through this
+    wrapper invalidate the affected keys, everything else is delegated."""
+
+    def __init__(
+        self,
+        repository: OfferRepository,
+        max_size: int = OFFER_CACHE_MAX_SIZE,
+        ttl: float = OFFER_CACHE_TTL,
+    ) -> None:
+        self.repository = repository
+        self.base_offers = TTLCache(max_size, ttl)
+        self.labeling_data = TTLCache(max_size, ttl)
+        self.latest_offer_labels = TTLCache(max_size, ttl)
+
+    def __getattr__(self, name: str):
+        return getattr(self.repository, name)
+
+    def cache_stats(self) -> dict[str, dict]:
+        return {
+            "base_offers": self.base_offers.stats(),
+            "labeling_data": self.labeling_data.stats(),
+            "latest_offer_labels": self.latest_offer_labels.stats(),
+        }
+
+    async def _read_through(self, cache: TTLCache, key: Hashable, select) -> Any:
+        value = cache.get(key)
+        if value is _MISSING:
+            generation = cache.generation()
+            value = await select(key)
+            cache.set(key, value, generation)
+        return value
+
+    async def select_single_base_offer(self, clasfieds_id: int):
+        return await self._read_through(
+            self.base_offers, clasfieds_id, self.repository.select_single_base_offer
+        )
+
+    async def select_base_offers(self, clasfieds_ids: list[int]):
+        cached = {
+            clasfieds_id: self.base_offers.get(clasfieds_id)
+            for clasfieds_id in clasfieds_ids
+        }
+        missing = [key for key, value in cached.items() if value is _MISSING]
+        if missing:
+            generation = self.base_offers.generation()
+            fetched = {
+                offer.clasfieds_id: offer
+                for offer in await self.repository.select_base_offers(missing)
+            }
+            for clasfieds_id in missing:
+                cached[clasfieds_id] = fetched.get(clasfieds_id)
+                self.base_offers.set(clasfieds_id, cached[clasfieds_id], generation)
+        return [offer for offer in cached.values() if offer is not None]
+
+    async def select_labeling_data(self, vin: str) -> bool:
+        return await self._read_through(
+            self.labeling_data, vin, self.repository.select_labeling_data
+        )
+
+    async def select_existing_labeling_data(self, vins: list[str]) -> set[str]:
+        cached = {vin: self.labeling_data.get(vin) for vin in vins}
+        missing = [vin for vin, value in cached.items() if value is _MISSING]
+        if missing:
+            generation = self.labeling_data.generation()
+            existing = await self.repository.select_existing_labeling_data(missing)
+            for vin in missing:
+                cached[vin] = vin in existing
+                self.labeling_data.set(vin, cached[vin], generation)
+        return {vin for vin, is_present in cached.items() if is_present}
+
+    async def select_latest_offer_label(
+        self, clasfieds_id: int, label_source: LabelSource
+    ):
+        return await self._read_through(
+            self.latest_offer_labels,
+            (clasfieds_id, label_source),
+            lambda key: self.repository.select_latest_offer_label(*key),
+        )
+
+    async def add_offer_labels(self, labels: list[OfferLabel]) -> None:
+        await self.repository.add_offer_labels(labels)
+        for label in labels:
+            self.latest_offer_labels.invalidate(
+                (label.clasfieds_id, label.label_source)
+            )
+
+    def _invalidate_offer(self, clasfieds_id: int) -> None:
+        self.base_offers.invalidate(clasfieds_id)
+        # rule labels are written together with the offer
+        self.latest_offer_labels.invalidate((clasfieds_id, LabelSource.rules))
+
+    async def add_base_offer_info(self, raw_offer: RawOffer) -> None:
+        await self.repository.add_base_offer_info(raw_offer)
+        self.base_offers.invalidate(raw_offer.id)
+
+    async def upsert_offer(
+        self,
+        raw_offer: RawOffer,
+        offer_parameters: RawOfferParameters,
+        raw_offer_location: RawOfferLocation,
+    ) -> bool:
+        written = await self.repository.upsert_offer(
+            raw_offer, offer_parameters, raw_offer_location
+        )
+        if written:
+            self._invalidate_offer(raw_offer.id)
+        return written
+
+    async def upsert_offers(
+        self, offers: list[tuple[RawOffer, RawOfferParameters, RawOfferLocation]]
+    ) -> list[bool]:
+        written = await self.repository.upsert_offers(offers)
+        for (raw_offer, _, _), is_written in zip(offers, written):
+            if is_written:
+                self._invalidate_offer(raw_offer.id)
+        return written
+
+    async def delete_offers(self, clasfieds_ids: list[int]) -> int:
+        deleted = await self.repository.delete_offers(clasfieds_ids)
+        for clasfieds_id in clasfieds_ids:
+            self.base_offers.invalidate(clasfieds_id)
+        return deleted
+
+    async def add_labeling_data(self, vin: str) -> None:
+        await self.repository.add_labeling_data(vin)
+        self.labeling_data.invalidate(vin)
+
+    async def add_labeling_data_bulk(self, vins: list[str]) -> int:
+        added = await self.repository.add_labeling_data_bulk(vins)
+        for vin in vins:
+            self.labeling_data.invalidate(vin)
+        return added
@@ -0,0 +1,27 @@
+from src.config.main_config import (
+    OFFER_ARCHIVE_READS,
+    OFFER_CACHE_MAX_SIZE,
+    OFFER_REPOSITORY_BACKEND,
+)
+from src.repositories.helpers import get_engine
+from src.repositories.offer.base import OfferRepository
+from src.repositories.offer.cache import CachedOfferRepository
+from src.repositories.offer.in_memory import InMemoryOfferRepository
+from src.repositories.offer.sql_alchemy import SqlAlchemyOfferRepository
+from src.repositories.offer.sqlite import SqliteOfferRepository
+from src.repositories.offer.tiered import TieredOfferRepository
+
+
+def get_offer_repository(backend: str = OFFER_REPOSITORY_BACKEND) -> OfferRepository:
+    repository: OfferRepository
+    if backend == "memory":
+        repository = InMemoryOfferRepository()
+    elif backend == "sqlite":
+        repository = SqliteOfferRepository()
+    else:
+        repository = SqlAlchemyOfferRepository(get_engine())
+    if OFFER_CACHE_MAX_SIZE > 0:
+        repository = CachedOfferRepository(repository)
+    if OFFER_ARCHIVE_READS:
+        repository = TieredOfferRepository(repository)
+    return repository
@@ -0,0 +1,21 @@
+import hashlib
+import json
+from dataclasses import asdict
+
+from src.models.raw_offer import RawOffer, RawOfferParameters
+
+
+def offer_content_hash(
+    raw_offer: RawOffer, offer_parameters: RawOfferParameters
+) -> str:
+    parameters = asdict(offer_parameters)
+    parameters.pop("id")
+    content = {
+        "title": raw_offer.title,
+        "description": raw_offer.description,
+        "image_links": raw_offer.image_links,
+        "vin": raw_offer.vin,
+        "parameters": parameters,
+    }
+    payload = json.dumps(content, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
@@ -0,0 +1,650 @@
+from collections import namedtuple
+from datetime import date, datetime, timezone
+from itertools import count
+from typing import AsyncIterator, Iterable, Sequence
+
+from src.config.brand_config import BRAND_ALIASES
+from src.config.main_config import STREAM_CHUNK_SIZE
+from src.models.db_schema import (
+    offer_images,
+    offer_labels,
+    offer_versions,
+    offers_base,
+    suspicious_offers,
+)
+from src.models.image import OfferImage
+from src.models.labeling import LabelSource, OfferLabel
+from src.models.raw_offer import (
+    RawOffer,
+    RawOfferLocation,
+    RawOfferParameters,
+    SuspiciousOffer,
+)
+from src.raw_offer_producer.phrase_rules import RULES_LABEL_VERSION
+from src.repositories.helpers import batched
+from src.repositories.offer.base import OfferRepository
+from src.repositories.offer.hashing import offer_content_hash
+from src.repositories.offer.values import (
+    ALL_OFFERS_BRANDS,
+    ARCHIVED_OFFER_COLUMNS,
+    OFFER_ROLLUP_DIMENSIONS,
+    base_offer_values,
+    location_offer_values,
+    params_offer_values,
+    rule_offer_values,
+    search_terms,
+    vin_offer_values,
+)
+
+BaseOfferRow = namedtuple("BaseOfferRow", [column.name for column in offers_base.c])
+OfferVersionRow = namedtuple(
+    "OfferVersionRow", [column.name for column in offer_versions.c]
+)
+OfferLabelRow = namedtuple("OfferLabelRow", [column.name for column in offer_labels.c])
+OfferImageRow = namedtuple("OfferImageRow", [column.name for column in offer_images.c])
+OfferImageUseRow = namedtuple("OfferImageUseRow", ["sha256", "clasfieds_id"])
+OfferImageLinksRow = namedtuple("OfferImageLinksRow", ["clasfieds_id", "image_links"])
+SuspiciousOfferRow = namedtuple(
+    "SuspiciousOfferRow", [column.name for column in suspicious_offers.c]
+)
+LatestOfferLabelRow = namedtuple(
+    "LatestOfferLabelRow", ["clasfieds_id", "label_version", "is_suspicious"]
+)
+OfferRow = namedtuple(
+    "OfferRow",
+    [
+        "clasfieds_id",
+        "title",
+        "description",
+        "vin",
+        "model",
+        "price",
+        "milage",
+        "condition",
+        "country_origin",
+    ],
+)
+StaleOfferRow = namedtuple(
+    "StaleOfferRow", [column.name for column in ARCHIVED_OFFER_COLUMNS]
+)
+SearchResultRow = namedtuple(
+    "SearchResultRow",
+    ["clasfieds_id", "brand", "title", "link", "scraperd_time", "rank"],
+)
+TrainingOfferRow = namedtuple("TrainingOfferRow", OfferRow._fields + ("brand",))
+UnlabeledOfferRow = namedtuple(
+    "UnlabeledOfferRow", ["clasfieds_id", "vin", "offer_version_id"]
+)
+LabelingDataOfferRow = namedtuple(
+    "LabelingDataOfferRow",
+    [field for field in OfferRow._fields if field != "vin"],
+)
+
+
+async def _iter_chunks(rows: Iterable, chunk_size: int) -> AsyncIterator[list]:
+    for chunk in batched(rows, chunk_size):
+        yield chunk
+
+
+class InMemoryOfferRepository(OfferRepository):
+    def __init__(self) -> None:
+        self._ids = count(1)
+        self._offers_base: dict[int, dict] = {}
+        self._offers_details: dict[int, dict] = {}
+        self._offer_location: dict[int, dict] = {}
+        self._offer_versions: list[OfferVersionRow] = []
+        self._version_ids = count(1)
+        self._labeling_data: set[str] = set()
+        self._brand_ids: dict[str, int] = {}
+        self._brand_aliases: dict[str, int] = {}
+        self._training_offers: dict[int, TrainingOfferRow] = {}
+        self._training_version_watermark = 0
+        self._training_offer_versions: dict[int, int] = {}
+        self._offer_labels: dict[tuple, OfferLabelRow] = {}
+        self._offer_images: dict[tuple, OfferImageRow] = {}
+        self._offer_rollups: dict[tuple, list[int]] = {}
+        self._suspicious_offers: list[SuspiciousOfferRow] = []
+        self._suspicious_offers_v2: list[SuspiciousOfferRow] = []
+
+    def _base_offer_row(self, clasfieds_id: int) -> BaseOfferRow:
+        return BaseOfferRow(**self._offers_base[clasfieds_id])
+
+    def _offer_row(self, clasfieds_id: int) -> OfferRow | None:
+        base = self._offers_base[clasfieds_id]
+        details = self._offers_details.get(clasfieds_id)
+        if details is None:
+            return None
+        return OfferRow(
+            clasfieds_id=clasfieds_id,
+            title=base["title"],
+            description=base["description"],
+            vin=base["vin"],
+            model=details["model"],
+            price=details["price"],
+            milage=details["milage"],
+            condition=details["condition"],
+            country_origin=details["country_origin"],
+        )
+
+    def _is_complete(self, offer: OfferRow) -> bool:
+        return None not in (
+            offer.model,
+            offer.price,
+            offer.milage,
+            offer.condition,
+            offer.country_origin,
+        )
+
+    async def add_base_offer_info(self, raw_offer: RawOffer) -> None:
+        if raw_offer.id not in self._offers_base:
+            self._offers_base[raw_offer.id] = {
+                "id": next(self._ids),
+                **base_offer_values(raw_offer),
+                "content_hash": None,
+            }
+
+    async def add_location_offer_info(
+        self, raw_offer_location: RawOfferLocation
+    ) -> None:
+        values = location_offer_values(raw_offer_location)
+        self._offer_location.setdefault(raw_offer_location.id, values)
+
+    async def add_params_offer_info(self, offer_parameters: RawOfferParameters) -> None:
+        values = params_offer_values(offer_parameters)
+        self._offers_details.setdefault(offer_parameters.id, values)
+
+    async def upsert_offer(
+        self,
+        raw_offer: RawOffer,
+        offer_parameters: RawOfferParameters,
+        raw_offer_location: RawOfferLocation,
+    ) -> bool:
+        content_hash = offer_content_hash(raw_offer, offer_parameters)
+        current = self._offers_base.get(raw_offer.id)
+        if current is not None and current["content_hash"] == content_hash:
+            return False
+
+        base_values = base_offer_values(raw_offer)
+        rule_values = rule_offer_values(raw_offer)
+        details_values = (
+            params_offer_values(offer_parameters)
+            | vin_offer_values(raw_offer, offer_parameters)
+            | rule_values
+        )
+        if current is None:
+            current = {"id": next(self._ids), **base_values}
+            self._offers_base[raw_offer.id] = current
+        else:
+            base_values.pop("created_time")
+            current.update(base_values)
+        current["content_hash"] = content_hash
+        self._offers_details[raw_offer.id] = details_values
+        self._offer_location[raw_offer.id] = location_offer_values(raw_offer_location)
+        self._offer_versions.append(
+            OfferVersionRow(
+                id=next(self._version_ids),
+                clasfieds_id=raw_offer.id,
+                content_hash=content_hash,
+                title=raw_offer.title,
+                description=raw_offer.description,
+                price=offer_parameters.price,
+                milage=offer_parameters.milage,
+                recorded_time=current["scraperd_time"]
+                or datetime.now(timezone.utc).replace(tzinfo=None),
+            )
+        )
+        await self.add_offer_labels(
+            [
+                OfferLabel(
+                    clasfieds_id=raw_offer.id,
+                    label_source=LabelSource.rules,
+                    label_version=RULES_LABEL_VERSION,
+                    is_suspicious=bool(rule_values["rule_hits"]),
+                    offer_version_id=self._offer_versions[-1].id,
+                )
+            ]
+        )
+        return True
+
+    async def upsert_offers(
+        self, offers: list[tuple[RawOffer, RawOfferParameters, RawOfferLocation]]
+    ) -> list[bool]:
+        return [await self.upsert_offer(*offer) for offer in offers]
+
+    async def select_offer_versions(self, clasfieds_id: int):
+        return sorted(
+            (
+                version
+                for version in self._offer_versions
+                if version.clasfieds_id == clasfieds_id
+            ),
+            key=lambda version: version.recorded_time,
+        )
+
+    async def select_offers_versions(self, clasfieds_ids: list[int]):
+        wanted = set(clasfieds_ids)
+        return [
+            version
+            for version in self._offer_versions
+            if version.clasfieds_id in wanted
+        ]
+
+    async def add_labeling_data(self, vin: str) -> None:
+        self._labeling_data.add(vin)
+
+    async def add_labeling_data_bulk(self, vins: list[str]) -> int:
+        new_vins = set(vins) - self._labeling_data
+        self._labeling_data.update(new_vins)
+        return len(new_vins)
+
+    async def select_labeling_data(self, vin: str) -> bool:
+        return vin in self._labeling_data
+
+    async def select_existing_labeling_data(self, vins: list[str]) -> set[str]:
+        return set(vins) & self._labeling_data
+
+    async def select_single_base_offer(self, clasfieds_id: int):
+        if clasfieds_id not in self._offers_base:
+            return None
+        return self._base_offer_row(clasfieds_id)
+
+    async def select_base_offers(self, clasfieds_ids: list[int]):
+        return [
+            self._base_offer_row(clasfieds_id)
+            for clasfieds_id in clasfieds_ids
+            if clasfieds_id in self._offers_base
+        ]
+
+    async def select_stale_offers(self, older_than: datetime, limit: int):
+        stale_ids = sorted(
+            clasfieds_id
+            for clasfieds_id, base in self._offers_base.items()
+            if base["scraperd_time"] is not None and base["scraperd_time"] < older_than
+        )[:limit]
+        empty_details = dict.fromkeys(StaleOfferRow._fields)
+        return [
+            StaleOfferRow(
+                **{
+                    **empty_details,
+                    **self._offers_details.get(clasfieds_id, {}),
+                    **self._offer_location.get(clasfieds_id, {}),
+                    **{
+                        key: value
+                        for key, value in self._offers_base[clasfieds_id].items()
+                        if key != "id"
+                    },
+                }
+            )
+            for clasfieds_id in stale_ids
+        ]
+
+    async def delete_offers(self, clasfieds_ids: list[int]) -> int:
+        deleted_ids = set(clasfieds_ids) & self._offers_base.keys()
+        for clasfieds_id in deleted_ids:
+            del self._offers_base[clasfieds_id]
+            self._offers_details.pop(clasfieds_id, None)
+            self._offer_location.pop(clasfieds_id, None)
+            self._training_offers.pop(clasfieds_id, None)
+            self._training_offer_versions.pop(clasfieds_id, None)
+        self._offer_versions = [
+            version
+            for version in self._offer_versions
+            if version.clasfieds_id not in deleted_ids
+        ]
+        return len(deleted_ids)
+
+    async def search_offers(self, query: str, limit: int = 20, offset: int = 0):
+        terms = search_terms(query)
+        results = []
+        for clasfieds_id, base in self._offers_base.items():
+            title = base["title"].lower()
+            description = (base["description"] or "").lower()
+            if not terms or not all(
+                term in title or term in description for term in terms
+            ):
+                continue
+            rank = sum(
+                (term in title) * 1.0 + (term in description) * 0.4 for term in terms
+            )
+            results.append(
+                SearchResultRow(
+                    clasfieds_id=clasfieds_id,
+                    brand=base["brand"],
+                    title=base["title"],
+                    link=base["link"],
+                    scraperd_time=base["scraperd_time"],
+                    rank=rank,
+                )
+            )
+        results.sort(key=lambda result: (-result.rank, result.clasfieds_id))
+        return results[offset : offset + limit]
+
+    async def refresh_offer_rollups(self) -> int:
+        latest: dict[tuple, OfferLabelRow] = {}
+        for label in self._offer_labels.values():
+            key = (label.clasfieds_id, label.label_source)
+            if key not in latest or label.label_version > latest[key].label_version:
+                latest[key] = label
+        brand_names = {brand_id: name for name, brand_id in self._brand_ids.items()}
+
+        self._offer_rollups = {}
+        for clasfieds_id, base in self._offers_base.items():
+            offer_time = base["created_time"] or base["scraperd_time"]
+            if offer_time is None:
+                continue
+            location = self._offer_location.get(clasfieds_id, {})
+            brand_id = self._brand_aliases.get(base["brand"].lower())
+            for label_source in LabelSource:
+                key = (
+                    offer_time.date(),
+                    location.get("region") or "",
+                    location.get("city") or "",
+                    brand_names.get(brand_id, base["brand"]),
+                    label_source.value,
+                )
+                counts = self._offer_rollups.setdefault(key, [0, 0, 0])
+                label = latest.get((clasfieds_id, label_source))
+                counts[0] += 1
+                counts[1] += label is not None
+                counts[2] += label is not None and label.is_suspicious
+        return len(self._offer_rollups)
+
+    async def select_offer_rollups(
+        self,
+        label_source: LabelSource,
+        start_day: date,
+        end_day: date | None = None,
+        dimensions: Sequence[str] = OFFER_ROLLUP_DIMENSIONS,
+    ):
+        OfferRollupRow = namedtuple(
+            "OfferRollupRow",
+            [*dimensions, "offers", "labeled_offers", "suspicious_offers"],
+        )
+        positions = [
+            OFFER_ROLLUP_DIMENSIONS.index(dimension) for dimension in dimensions
+        ]
+        grouped: dict[tuple, list[int]] = {}
+        for key, counts in self._offer_rollups.items():
+            if key[-1] != label_source or not start_day <= key[0] <= (
+                end_day or date.max
+            ):
+                continue
+            totals = grouped.setdefault(
+                tuple(key[position] for position in positions), [0, 0, 0]
+            )
+            for index, value in enumerate(counts):
+                totals[index] += value
+        return [
+            OfferRollupRow(*dimension_values, *totals)
+            for dimension_values, totals in sorted(grouped.items())
+        ]
+
+    async def select_all_offers(self):
+        return [
+            offer
+            for clasfieds_id, base in self._offers_base.items()
+            if base["brand"].lower() in ALL_OFFERS_BRANDS
+            and (offer := self._offer_row(clasfieds_id)) is not None
+            and self._is_complete(offer)
+        ]
+
+    def iter_all_offers(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[OfferRow]]:
+        return self._iter_selected(self.select_all_offers, chunk_size)
+
+    async def _iter_selected(
+        self, select, chunk_size: int, *args
+    ) -> AsyncIterator[list]:
+        async for chunk in _iter_chunks(await select(*args), chunk_size):
+            yield chunk
+
+    async def sync_brands(self, aliases: dict[str, list[str]] = BRAND_ALIASES) -> None:
+        for name, brand_alias_list in aliases.items():
+            brand_id = self._brand_ids.setdefault(name, len(self._brand_ids) + 1)
+            for alias in brand_alias_list:
+                self._brand_aliases[alias] = brand_id
+
+    async def refresh_training_offers(self) -> int:
+        await self.sync_brands()
+        clasfieds_id_watermark = max(self._training_offers, default=0)
+        changed_offers = {
+            version.clasfieds_id
+            for version in self._offer_versions
+            if version.id > self._training_version_watermark
+        }
+        brand_names = {brand_id: name for name, brand_id in self._brand_ids.items()}
+        latest_version_id = max(
+            (version.id for version in self._offer_versions),
+            default=self._training_version_watermark,
+        )
+
+        refreshed = 0
+        for clasfieds_id, base in self._offers_base.items():
+            if (
+                clasfieds_id <= clasfieds_id_watermark
+                and clasfieds_id not in changed_offers
+            ):
+                continue
+            brand_id = self._brand_aliases.get(base["brand"].lower())
+            offer = self._offer_row(clasfieds_id)
+            if brand_id is None or offer is None or not self._is_complete(offer):
+                continue
+            self._training_offers[clasfieds_id] = TrainingOfferRow(
+                *offer, brand=brand_names[brand_id]
+            )
+            self._training_offer_versions[clasfieds_id] = latest_version_id
+            refreshed += 1
+        self._training_version_watermark = latest_version_id
+        return refreshed
+
+    async def select_training_offers(self):
+        return list(self._training_offers.values())
+
+    def iter_training_offers(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[TrainingOfferRow]]:
+        return self._iter_selected(self.select_training_offers, chunk_size)
+
+    async def add_offer_labels(self, labels: list[OfferLabel]) -> None:
+        labeled_time = datetime.now(timezone.utc).replace(tzinfo=None)
+        for label in labels:
+            key = (label.clasfieds_id, label.label_source, label.label_version)
+            existing = self._offer_labels.get(key)
+            self._offer_labels[key] = OfferLabelRow(
+                id=existing.id if existing else len(self._offer_labels) + 1,
+                clasfieds_id=label.clasfieds_id,
+                label_source=label.label_source,
+                label_version=label.label_version,
+                is_suspicious=label.is_suspicious,
+                labeled_time=labeled_time,
+                offer_version_id=label.offer_version_id,
+            )
+
+    async def _select_unlabeled_training_offers(
+        self, label_source: LabelSource, label_version: int
+    ) -> list[UnlabeledOfferRow]:
+        unlabeled = []
+        for clasfieds_id, offer in self._training_offers.items():
+            offer_version_id = self._training_offer_versions[clasfieds_id]
+            label = self._offer_labels.get((clasfieds_id, label_source, label_version))
+            if label is None or (label.offer_version_id or 0) < offer_version_id:
+                unlabeled.append(
+                    UnlabeledOfferRow(clasfieds_id, offer.vin, offer_version_id)
+                )
+        return unlabeled
+
+    def iter_unlabeled_training_offers(
+        self,
+        label_source: LabelSource,
+        label_version: int,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[list[UnlabeledOfferRow]]:
+        return self._iter_selected(
+            self._select_unlabeled_training_offers,
+            chunk_size,
+            label_source,
+            label_version,
+        )
+
+    async def _select_latest_offer_labels(
+        self, label_source: LabelSource
+    ) -> list[LatestOfferLabelRow]:
+        latest: dict[int, OfferLabelRow] = {}
+        for label in self._offer_labels.values():
+            if label.label_source != label_source:
+                continue
+            current = latest.get(label.clasfieds_id)
+            if current is None or label.label_version > current.label_version:
+                latest[label.clasfieds_id] = label
+        return [
+            LatestOfferLabelRow(
+                clasfieds_id=label.clasfieds_id,
+                label_version=label.label_version,
+                is_suspicious=label.is_suspicious,
+            )
+            for label in latest.values()
+        ]
+
+    async def add_offer_images(self, images: list[OfferImage]) -> None:
+        fetched_time = datetime.now(timezone.utc).replace(tzinfo=None)
+        for image in images:
+            key = (image.clasfieds_id, image.position)
+            existing = self._offer_images.get(key)
+            self._offer_images[key] = OfferImageRow(
+                id=existing.id if existing else len(self._offer_images) + 1,
+                clasfieds_id=image.clasfieds_id,
+                position=image.position,
+                url=image.url,
+                sha256=image.sha256,
+                width=image.width,
+                height=image.height,
+                size=image.size,
+                fetched_time=fetched_time,
+                phash=image.phash,
+            )
+
+    async def select_offer_images(self, clasfieds_id: int):
+        return sorted(
+            (
+                image
+                for image in self._offer_images.values()
+                if image.clasfieds_id == clasfieds_id
+            ),
+            key=lambda image: image.position,
+        )
+
+    async def select_offers_by_image(self, sha256s: list[str]):
+        wanted = set(sha256s)
+        return list(
+            dict.fromkeys(
+                OfferImageUseRow(image.sha256, image.clasfieds_id)
+                for image in self._offer_images.values()
+                if image.sha256 in wanted
+            )
+        )
+
+    async def select_offers_without_images(
+        self, after_id: int, limit: int
+    ) -> list[OfferImageLinksRow]:
+        with_images = {clasfieds_id for clasfieds_id, _ in self._offer_images}
+        return [
+            OfferImageLinksRow(clasfieds_id, base["image_links"])
+            for clasfieds_id, base in sorted(self._offers_base.items())
+            if clasfieds_id > after_id
+            and base["image_links"]
+            and clasfieds_id not in with_images
+        ][:limit]
+
+    async def select_latest_offer_label(
+        self, clasfieds_id: int, label_source: LabelSource
+    ):
+        labels = [
+            label
+            for label in self._offer_labels.values()
+            if label.clasfieds_id == clasfieds_id and label.label_source == label_source
+        ]
+        return max(labels, key=lambda label: label.label_version, default=None)
+
+    def iter_latest_offer_labels(
+        self, label_source: LabelSource, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[LatestOfferLabelRow]]:
+        return self._iter_selected(
+            self._select_latest_offer_labels, chunk_size, label_source
+        )
+
+    def _add_suspicious_offer(
+        self, table: list[SuspiciousOfferRow], suspicious_offer: SuspiciousOffer
+    ) -> None:
+        table.append(
+            SuspiciousOfferRow(
+                id=len(table) + 1,
+                suspicious_clasfieds_id=suspicious_offer.suspicious_clasfieds_id,
+                is_suspicious=suspicious_offer.is_suspicious,
+            )
+        )
+
+    def _select_single_suspicious_offer(
+        self, table: list[SuspiciousOfferRow], clasfieds_offer_id: int
+    ) -> SuspiciousOfferRow | None:
+        return next(
+            (
+                offer
+                for offer in table
+                if offer.suspicious_clasfieds_id == clasfieds_offer_id
+            ),
+            None,
+        )
+
+    async def select_all_suspicious_offers(self):
+        return list(self._suspicious_offers)
+
+    def iter_all_suspicious_offers(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[SuspiciousOfferRow]]:
+        return self._iter_selected(self.select_all_suspicious_offers, chunk_size)
+
+    async def select_single_suspicious_offer(self, clasfieds_offer_id: int):
+        return self._select_single_suspicious_offer(
+            self._suspicious_offers, clasfieds_offer_id
+        )
+
+    async def add_suspicious_offer(self, suspicious_offer: SuspiciousOffer) -> None:
+        self._add_suspicious_offer(self._suspicious_offers, suspicious_offer)
+
+    async def select_suspicious_offers_from_labeling_data(self):
+        return [
+            LabelingDataOfferRow(
+                **{
+                    field: value
+                    for field, value in offer._asdict().items()
+                    if field != "vin"
+                }
+            )
+            for clasfieds_id, base in self._offers_base.items()
+            if base["vin"] in self._labeling_data
+            and (offer := self._offer_row(clasfieds_id)) is not None
+        ]
+
+    def iter_suspicious_offers_from_labeling_data(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[LabelingDataOfferRow]]:
+        return self._iter_selected(
+            self.select_suspicious_offers_from_labeling_data, chunk_size
+        )
+
+    async def add_suspicious_offer_v2(self, suspicious_offer: SuspiciousOffer) -> None:
+        self._add_suspicious_offer(self._suspicious_offers_v2, suspicious_offer)
+
+    async def select_all_suspicious_offers_v2(self):
+        return list(self._suspicious_offers_v2)
+
+    def iter_all_suspicious_offers_v2(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[SuspiciousOfferRow]]:
+        return self._iter_selected(self.select_all_suspicious_offers_v2, chunk_size)
+
+    async def select_single_suspicious_offer_v2(self, clasfieds_offer_id: int):
+        return self._select_single_suspicious_offer(
+            self._suspicious_offers_v2, clasfieds_offer_id
+        )
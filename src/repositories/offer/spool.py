@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+
+from dacite import Config, DaciteError, from_dict
+from sqlalchemy.exc import DataError, IntegrityError
+
+from src.config.main_config import (
+    OFFER_SPOOL_DRAIN_BATCH_SIZE,
+    OFFER_SPOOL_DRAIN_INTERVAL,
+    OFFER_SPOOL_FSYNC_BATCH_SIZE,
+)
+from src.models.raw_offer import RawOffer, RawOfferLocation, RawOfferParameters
+from src.repositories.offer.base import OfferRepository
+
+logger = logging.getLogger(__name__)
+
+_dacite_config = Config(type_hooks={datetime: datetime.fromisoformat})
+
+# errors caused by the records themselves, which are moved to the dead letter
+# file; any other error, e.g. a restarting database or a pool timeout, leaves
+# the batch in the spool to be retried
+DATA_ERRORS = (DaciteError, KeyError, IntegrityError, DataError)
+
+
+def _json_default(value: object) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class OfferSpool:
+    """Append-only JSON lines file with a separately committed read offset.
+    Records that cannot be written are moved to a dead letter file."""
+
+    def __init__(
+        self, path: Path, fsync_batch_size: int = OFFER_SPOOL_FSYNC_BATCH_SIZE
+    ) -> None:
+        self.path = path
+        self.offset_path = path.with_name(path.name + ".offset")
+        self.dead_letter_path = path.with_name(path.name + ".dead")
+        self.fsync_batch_size = fsync_batch_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._discard_partial_record()
+        self._file = open(self.path, "ab")
+        self._pending = 0
+        self._durable_size = self._file.tell()
+        if self.committed_offset() > self._durable_size:
+            # left by a truncate that the offset file was not reset for
+            self.offset_path.unlink()
+
+    def _discard_partial_record(self) -> None:
+        # a crash in the middle of a write leaves a record without a newline
+        if not self.path.exists():
+            return
+        with open(self.path, "rb+") as spool_file:
+            data = spool_file.read()
+            if data and not data.endswith(b"\n"):
+                spool_file.truncate(data.rfind(b"\n") + 1)
+
+    def append(self, record: dict) -> None:
+        line = json.dumps(record, default=_json_default).encode() + b"\n"
+        self._file.write(line)
+        self._pending += 1
+        if self._pending >= self.fsync_batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._durable_size = self._file.tell()
+
+    def committed_offset(self) -> int:
+        try:
+            return int(self.offset_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def drained(self) -> bool:
+        return not self._pending and self.committed_offset() >= self._durable_size
+
+    def read(self, max_records: int) -> tuple[list[dict], int]:
+        offset = self.committed_offset()
+        records: list[dict] = []
+        with open(self.path, "rb") as spool_file:
+            spool_file.seek(offset)
+            # records up to the durable size are complete lines
+            while len(records) < max_records and offset < self._durable_size:
+                line = spool_file.readline()
+                records.append(json.loads(line))
+                offset += len(line)
+        return records, offset
+
+    def dead_letter(self, record: dict, error: Exception) -> None:
+        with open(self.dead_letter_path, "ab") as dead_letter_file:
+            dead_letter_file.write(
+                json.dumps(
+                    {"record": record, "error": repr(error)}, default=_json_default
+                ).encode()
+                + b"\n"
+            )
+            dead_letter_file.flush()
+            os.fsync(dead_letter_file.fileno())
+
+    def commit(self, offset: int) -> None:
+        if offset == self._durable_size and not self._pending:
+            # the offset goes before the records it points into, a crash in
+            # between replays the drained records, whose upserts are no-ops
+            self.offset_path.unlink(missing_ok=True)
+            self._file.truncate(0)
+            self._durable_size = 0
+            return
+        tmp_path = self.offset_path.with_name(self.offset_path.name + ".tmp")
+        with open(tmp_path, "w") as offset_file:
+            offset_file.write(str(offset))
+            offset_file.flush()
+            os.fsync(offset_file.fileno())
+        os.replace(tmp_path, self.offset_path)
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class SpooledOfferRepository:
+    """Write-behind wrapper that spools offers to disk and drains them to the
+    wrapped repository in batches. Reads and other writes are delegated."""
+
+    def __init__(
+        self,
+        repository: OfferRepository,
+        spool: OfferSpool,
+        drain_batch_size: int = OFFER_SPOOL_DRAIN_BATCH_SIZE,
+        drain_interval: float = OFFER_SPOOL_DRAIN_INTERVAL,
+    ) -> None:
+        self.repository = repository
+        self.spool = spool
+        self.drain_batch_size = drain_batch_size
+        self.drain_interval = drain_interval
+        self._drainer: asyncio.Task | None = None
+
+    def __getattr__(self, name: str):
+        return getattr(self.repository, name)
+
+    async def start(self) -> None:
+        self._drainer = asyncio.create_task(self._drain())
+
+    async def close(self, timeout: float | None = None) -> None:
+        self.spool.flush()
+        try:
+            await asyncio.wait_for(self._wait_until_drained(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Offer spool not drained, it will be replayed on restart")
+        finally:
+            if self._drainer is not None:
+                self._drainer.cancel()
+            self.spool.close()
+
+    async def _wait_until_drained(self) -> None:
+        while self._drainer is not None and not self.spool.drained():
+            await asyncio.sleep(self.drain_interval)
+
+    async def upsert_offer(
+        self,
+        raw_offer: RawOffer,
+        offer_parameters: RawOfferParameters,
+        raw_offer_location: RawOfferLocation,
+    ) -> bool:
+        self.spool.append(
+            {
+                "raw_offer": asdict(raw_offer),
+                "offer_parameters": asdict(offer_parameters),
+                "raw_offer_location": asdict(raw_offer_location),
+            }
+        )
+        # give the drainer a chance to run between scraped offers
+        await asyncio.sleep(0)
+        return True
+
+    async def _drain(self) -> None:
+        while True:
+            try:
+                drained = await self.drain_batch()
+            except Exception:
+                logger.exception("Failed to drain offer spool, retrying")
+                drained = 0
+            if not drained:
+                await asyncio.sleep(self.drain_interval)
+
+    async def drain_batch(self) -> int:
+        self.spool.flush()
+        records, offset = self.spool.read(self.drain_batch_size)
+        if not records:
+            return 0
+        offers: list[tuple[dict, tuple]] = []
+        dead_letters: list[tuple[dict, Exception]] = []
+        for record in records:
+            try:
+                offers.append((record, _offer(record)))
+            except DATA_ERRORS as e:
+                dead_letters.append((record, e))
+        try:
+            await self.repository.upsert_offers([offer for _, offer in offers])
+        except DATA_ERRORS:
+            # rewrite the batch offer by offer to set the failing records aside
+            for record, offer in offers:
+                try:
+                    await self.repository.upsert_offer(*offer)
+                except DATA_ERRORS as e:
+                    dead_letters.append((record, e))
+        for record, error in dead_letters:
+            logger.error(f"Moving spooled offer to the dead letter file: {error!r}")
+            self.spool.dead_letter(record, error)
+        self.spool.commit(offset)
+        return len(records)
+
+
+def _offer(record: dict) -> tuple[RawOffer, RawOfferParameters, RawOfferLocation]:
+    return (
+        from_dict(RawOffer, record["raw_offer"], _dacite_config),
+        from_dict(RawOfferParameters, record["offer_parameters"], _dacite_config),
+        from_dict(RawOfferLocation, record["raw_offer_location"], _dacite_config),
+    )
@@ -1,56 +1,421 @@
-from datetime import datetime, timezone
+from dataclasses import asdict
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, Sequence
 
-from sqlalchemy import and_, func, join, select
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy import (
+    DateTime,
+    Row,
+    Select,
+    String,
+    and_,
+    case,
+    cast,
+    column,
+    delete,
+    func,
+    join,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+    union_all,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
 
+from src.config.brand_config import BRAND_ALIASES
+from src.config.main_config import STREAM_CHUNK_SIZE
 from src.models.db_schema import (
+    brand_aliases,
+    brands,
     labeling_data,
+    offer_day,
+    offer_images,
+    offer_labels,
     offer_location,
+    offer_rollups,
+    offer_versions,
     offers_base,
     offers_details,
     suspicious_offers,
     suspicious_offers_v2,
+    training_offers,
 )
+from src.models.image import OfferImage
+from src.models.labeling import LabelSource, OfferLabel
 from src.models.raw_offer import (
     RawOffer,
     RawOfferLocation,
     RawOfferParameters,
     SuspiciousOffer,
 )
+from src.raw_offer_producer.phrase_rules import RULES_LABEL_VERSION
 from src.repositories.helpers import get_engine
 from src.repositories.offer.base import OfferRepository
+from src.repositories.offer.hashing import offer_content_hash
+from src.repositories.offer.values import (
+    ALL_OFFERS_BRANDS,
+    ARCHIVED_OFFER_COLUMNS,
+    OFFER_ROLLUP_DIMENSIONS,
+    base_offer_values,
+    location_offer_values,
+    params_offer_values,
+    rule_offer_values,
+    vin_offer_values,
+)
+from src.repositories.telemetry import db_metrics, query_name_of
+
+
+def _all_offers_query() -> Select:
+    return (
+        select(
+            offers_base.c.clasfieds_id,
+            offers_base.c.title,
+            offers_base.c.description,
+            offers_base.c.vin,
+            offers_details.c.model,
+            offers_details.c.price,
+            offers_details.c.milage,
+            offers_details.c.condition,
+            offers_details.c.country_origin,
+        )
+        .select_from(
+            join(
+                offers_base,
+                offers_details,
+                offers_base.c.clasfieds_id == offers_details.c.clasfieds_id,
+            )
+        )
+        .where(
+            and_(
+                offers_details.c.model.isnot(None),
+                offers_details.c.price.isnot(None),
+                offers_details.c.milage.isnot(None),
+                offers_details.c.condition.isnot(None),
+                offers_details.c.country_origin.isnot(None),
+                func.lower(offers_base.c.brand).in_(ALL_OFFERS_BRANDS),
+            )
+        )
+        .execution_options(query_name="all_offers")
+    )
+
+
+def _suspicious_offers_from_labeling_data_query() -> Select:
+    subquery = select(labeling_data.c.vin).scalar_subquery()
+
+    return (
+        select(
+            offers_base.c.clasfieds_id,
+            offers_base.c.title,
+            offers_base.c.description,
+            offers_details.c.model,
+            offers_details.c.price,
+            offers_details.c.milage,
+            offers_details.c.condition,
+            offers_details.c.country_origin,
+        )
+        .select_from(
+            offers_base.join(
+                offers_details,
+                offers_base.c.clasfieds_id == offers_details.c.clasfieds_id,
+            )
+        )
+        .where(offers_base.c.vin.in_(subquery))
+        .execution_options(query_name="suspicious_offers_from_labeling_data")
+    )
+
+
+def _training_offers_source_query(
+    clasfieds_id_watermark: int, offer_version_watermark: int, latest_version_id: int
+) -> Select:
+    changed_offers = select(offer_versions.c.clasfieds_id).where(
+        offer_versions.c.id > offer_version_watermark
+    )
+    return (
+        select(
+            offers_base.c.clasfieds_id,
+            brand_aliases.c.brand_id,
+            offers_base.c.title,
+            offers_base.c.description,
+            offers_base.c.vin,
+            offers_details.c.model,
+            offers_details.c.price,
+            offers_details.c.milage,
+            offers_details.c.condition,
+            offers_details.c.country_origin,
+            literal(latest_version_id).label("offer_version_id"),
+        )
+        .select_from(
+            offers_base.join(
+                offers_details,
+                offers_base.c.clasfieds_id == offers_details.c.clasfieds_id,
+            ).join(
+                brand_aliases,
+                func.lower(offers_base.c.brand) == brand_aliases.c.alias,
+            )
+        )
+        .where(
+            and_(
+                offers_details.c.model.isnot(None),
+                offers_details.c.price.isnot(None),
+                offers_details.c.milage.isnot(None),
+                offers_details.c.condition.isnot(None),
+                offers_details.c.country_origin.isnot(None),
+                or_(
+                    offers_base.c.clasfieds_id > clasfieds_id_watermark,
+                    offers_base.c.clasfieds_id.in_(changed_offers),
+                ),
+            )
+        )
+    )
+
+
+def _training_offers_query() -> Select:
+    return (
+        select(
+            training_offers.c.clasfieds_id,
+            training_offers.c.title,
+            training_offers.c.description,
+            training_offers.c.vin,
+            training_offers.c.model,
+            training_offers.c.price,
+            training_offers.c.milage,
+            training_offers.c.condition,
+            training_offers.c.country_origin,
+            brands.c.name.label("brand"),
+        )
+        .select_from(
+            training_offers.join(brands, training_offers.c.brand_id == brands.c.id)
+        )
+        .execution_options(query_name="training_offers")
+    )
+
+
+def _unlabeled_training_offers_query(
+    label_source: LabelSource, label_version: int
+) -> Select:
+    return (
+        select(
+            training_offers.c.clasfieds_id,
+            training_offers.c.vin,
+            training_offers.c.offer_version_id,
+        )
+        .select_from(
+            training_offers.outerjoin(
+                offer_labels,
+                and_(
+                    offer_labels.c.clasfieds_id == training_offers.c.clasfieds_id,
+                    offer_labels.c.label_source == label_source,
+                    offer_labels.c.label_version == label_version,
+                ),
+            )
+        )
+        .where(
+            or_(
+                offer_labels.c.id.is_(None),
+                func.coalesce(offer_labels.c.offer_version_id, 0)
+                < training_offers.c.offer_version_id,
+            )
+        )
+        .execution_options(query_name="unlabeled_training_offers")
+    )
+
+
+def _offers_without_images_query(after_id: int, limit: int) -> Select:
+    return (
+        select(offers_base.c.clasfieds_id, offers_base.c.image_links)
+        .where(
+            and_(
+                offers_base.c.clasfieds_id > after_id,
+                offers_base.c.image_links.isnot(None),
+                # JSON null and empty lists, compared as text as Postgres has
+                # no equality operator for json
+                cast(offers_base.c.image_links, String).notin_(["null", "[]"]),
+                ~select(offer_images.c.id)
+                .where(offer_images.c.clasfieds_id == offers_base.c.clasfieds_id)
+                .exists(),
+            )
+        )
+        .order_by(offers_base.c.clasfieds_id)
+        .limit(limit)
+        .execution_options(query_name="offers_without_images")
+    )
+
+
+def _latest_offer_labels_query(label_source: LabelSource) -> Select:
+    latest = (
+        select(
+            offer_labels.c.clasfieds_id,
+            func.max(offer_labels.c.label_version).label("label_version"),
+        )
+        .where(offer_labels.c.label_source == label_source)
+        .group_by(offer_labels.c.clasfieds_id)
+        .subquery()
+    )
+    return (
+        select(
+            offer_labels.c.clasfieds_id,
+            offer_labels.c.label_version,
+            offer_labels.c.is_suspicious,
+        )
+        .select_from(
+            offer_labels.join(
+                latest,
+                and_(
+                    offer_labels.c.clasfieds_id == latest.c.clasfieds_id,
+                    offer_labels.c.label_version == latest.c.label_version,
+                ),
+            )
+        )
+        .where(offer_labels.c.label_source == label_source)
+        .execution_options(query_name="latest_offer_labels")
+    )
+
+
+def _affected_rollup_days_query(
+    offer_version_watermark: int, labeled_time_watermark: datetime | None
+) -> Select:
+    changed_offers = select(offer_versions.c.clasfieds_id).where(
+        offer_versions.c.id > offer_version_watermark
+    )
+    labeled_offers = select(offer_labels.c.clasfieds_id)
+    if labeled_time_watermark is not None:
+        labeled_offers = labeled_offers.where(
+            offer_labels.c.labeled_time > labeled_time_watermark
+        )
+    return (
+        select(offer_day)
+        .distinct()
+        .where(
+            or_(
+                offers_base.c.clasfieds_id.in_(changed_offers),
+                offers_base.c.clasfieds_id.in_(labeled_offers),
+            )
+        )
+    )
+
+
+def _offer_rollups_source_query(
+    days: list, offer_version_id: int, labeled_time: datetime | None
+) -> Select:
+    day_offers = select(offers_base.c.clasfieds_id).where(offer_day.in_(days))
+    latest = (
+        select(
+            offer_labels.c.clasfieds_id,
+            offer_labels.c.label_source,
+            func.max(offer_labels.c.label_version).label("label_version"),
+        )
+        .where(offer_labels.c.clasfieds_id.in_(day_offers))
+        .group_by(offer_labels.c.clasfieds_id, offer_labels.c.label_source)
+        .subquery()
+    )
+    labels = (
+        select(
+            offer_labels.c.clasfieds_id,
+            offer_labels.c.label_source,
+            offer_labels.c.is_suspicious,
+        )
+        .join(
+            latest,
+            and_(
+                offer_labels.c.clasfieds_id == latest.c.clasfieds_id,
+                offer_labels.c.label_source == latest.c.label_source,
+                offer_labels.c.label_version == latest.c.label_version,
+            ),
+        )
+        .subquery()
+    )
+    label_sources = union_all(
+        *(select(literal(source.value).label("label_source")) for source in LabelSource)
+    ).subquery()
+
+    region = func.coalesce(offer_location.c.region, literal_column("''"))
+    city = func.coalesce(offer_location.c.city, literal_column("''"))
+    brand = func.coalesce(brands.c.name, offers_base.c.brand)
+    return (
+        select(
+            offer_day.label("day"),
+            region.label("region"),
+            city.label("city"),
+            brand.label("brand"),
+            label_sources.c.label_source,
+            func.count().label("offers"),
+            func.count(labels.c.clasfieds_id).label("labeled_offers"),
+            func.coalesce(
+                func.sum(case((labels.c.is_suspicious, 1), else_=0)), 0
+            ).label("suspicious_offers"),
+            literal(offer_version_id).label("offer_version_id"),
+            literal(labeled_time, DateTime).label("labeled_time"),
+        )
+        .select_from(
+            offers_base.outerjoin(
+                offer_location,
+                offers_base.c.clasfieds_id == offer_location.c.clasfieds_id,
+            )
+            .outerjoin(
+                brand_aliases,
+                func.lower(offers_base.c.brand) == brand_aliases.c.alias,
+            )
+            .outerjoin(brands, brand_aliases.c.brand_id == brands.c.id)
+            .join(label_sources, true())
+            .outerjoin(
+                labels,
+                and_(
+                    labels.c.clasfieds_id == offers_base.c.clasfieds_id,
+                    labels.c.label_source == label_sources.c.label_source,
+                ),
+            )
+        )
+        .where(offer_day.in_(days))
+        .group_by(offer_day, region, city, brand, label_sources.c.label_source)
+    )
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _offer_label_values(label: OfferLabel, labeled_time: datetime) -> dict:
+    return {
+        "clasfieds_id": label.clasfieds_id,
+        "label_source": label.label_source,
+        "label_version": label.label_version,
+        "is_suspicious": label.is_suspicious,
+        "labeled_time": labeled_time,
+        "offer_version_id": label.offer_version_id,
+    }
+
+
+def _search_result_columns() -> list:
+    return [
+        offers_base.c.clasfieds_id,
+        offers_base.c.brand,
+        offers_base.c.title,
+        offers_base.c.link,
+        offers_base.c.scraperd_time,
+    ]
 
 
 class SqlAlchemyOfferRepository(OfferRepository):
+    insert = staticmethod(postgresql.insert)
+
     def __init__(self, engine: AsyncEngine | None = None) -> None:
         self.engine = engine or get_engine()
 
+    async def _stream(self, query: Select, chunk_size: int) -> AsyncIterator[list[Row]]:
+        async with self.engine.connect() as conn:
+            result = await conn.stream(query.execution_options(yield_per=chunk_size))
+            query_name = query_name_of(str(query), query.get_execution_options())
+            async for partition in result.partitions(chunk_size):
+                db_metrics.observe_rows_returned(query_name, len(partition))
+                yield list(partition)
+
     async def add_base_offer_info(self, raw_offer: RawOffer) -> None:
-        if isinstance(raw_offer.created_time, str):
-            dt_with_tz = datetime.fromisoformat(raw_offer.created_time)
-            created_time = dt_with_tz.astimezone(timezone.utc).replace(tzinfo=None)
-        else:
-            created_time = None
-
-        if isinstance(raw_offer.scraped_time, str):
-            dt_with_tz = datetime.fromisoformat(raw_offer.scraped_time)
-            scraped_time = dt_with_tz.astimezone(timezone.utc).replace(tzinfo=None)
-        else:
-            scraped_time = None
         ins = (
-            insert(offers_base)
-            .values(
-                brand=raw_offer.brand,
-                clasfieds_id=raw_offer.id,
-                link=raw_offer.link,
-                title=raw_offer.title,
-                created_time=created_time,
-                description=raw_offer.description,
-                image_links=raw_offer.image_links,
-                vin=raw_offer.vin,
-                scraperd_time=scraped_time,
-            )
+            self.insert(offers_base)
+            .values(**base_offer_values(raw_offer))
             .on_conflict_do_nothing()
         )
         async with self.engine.begin() as conn:
@@ -60,12 +425,8 @@ class SqlAlchemyOfferRepository(OfferRepository):
         self, raw_offer_location: RawOfferLocation
     ) -> None:
         ins = (
-            insert(offer_location)
-            .values(
-                clasfieds_id=raw_offer_location.id,
-                region=raw_offer_location.region,
-                city=raw_offer_location.city,
-            )
+            self.insert(offer_location)
+            .values(**location_offer_values(raw_offer_location))
             .on_conflict_do_nothing()
         )
         async with self.engine.begin() as conn:
@@ -73,32 +434,143 @@ class SqlAlchemyOfferRepository(OfferRepository):
 
     async def add_params_offer_info(self, offer_parameters: RawOfferParameters) -> None:
         ins = (
-            insert(offers_details)
-            .values(
-                clasfieds_id=offer_parameters.id,
-                model=offer_parameters.model,
-                price=offer_parameters.price,
-                engine_size=offer_parameters.engine_size,
-                manufactured_year=offer_parameters.manufactured_year,
-                petrol=offer_parameters.petrol,
-                car_body=offer_parameters.car_body,
-                milage=offer_parameters.milage,
-                color=offer_parameters.color,
-                condition=offer_parameters.condition,
-                transmission=offer_parameters.transmission,
-                country_origin=offer_parameters.country_origin,
-                righthanddrive=offer_parameters.righthanddrive,
-            )
+            self.insert(offers_details)
+            .values(**params_offer_values(offer_parameters))
             .on_conflict_do_nothing()
         )
         async with self.engine.begin() as conn:
             await conn.execute(ins)
 
+    async def upsert_offer(
+        self,
+        raw_offer: RawOffer,
+        offer_parameters: RawOfferParameters,
+        raw_offer_location: RawOfferLocation,
+    ) -> bool:
+        async with self.engine.begin() as conn:
+            return await self._upsert_offer(
+                conn, raw_offer, offer_parameters, raw_offer_location
+            )
+
+    async def upsert_offers(
+        self, offers: list[tuple[RawOffer, RawOfferParameters, RawOfferLocation]]
+    ) -> list[bool]:
+        async with self.engine.begin() as conn:
+            return [await self._upsert_offer(conn, *offer) for offer in offers]
+
+    async def _upsert_offer(
+        self,
+        conn: AsyncConnection,
+        raw_offer: RawOffer,
+        offer_parameters: RawOfferParameters,
+        raw_offer_location: RawOfferLocation,
+    ) -> bool:
+        content_hash = offer_content_hash(raw_offer, offer_parameters)
+        base_values = base_offer_values(raw_offer) | {"content_hash": content_hash}
+        base_ins = self.insert(offers_base).values(**base_values)
+        base_upsert = base_ins.on_conflict_do_update(
+            index_elements=[offers_base.c.clasfieds_id],
+            set_={
+                key: base_ins.excluded[key]
+                for key in base_values
+                if key not in ("clasfieds_id", "created_time")
+            },
+            where=offers_base.c.content_hash.is_distinct_from(
+                base_ins.excluded.content_hash
+            ),
+        ).returning(offers_base.c.clasfieds_id)
+
+        rule_values = rule_offer_values(raw_offer)
+        params_values = (
+            params_offer_values(offer_parameters)
+            | vin_offer_values(raw_offer, offer_parameters)
+            | rule_values
+        )
+        params_ins = self.insert(offers_details).values(**params_values)
+        params_upsert = params_ins.on_conflict_do_update(
+            index_elements=[offers_details.c.clasfieds_id],
+            set_={key: params_ins.excluded[key] for key in params_values},
+        )
+
+        location_values = location_offer_values(raw_offer_location)
+        location_ins = self.insert(offer_location).values(**location_values)
+        location_upsert = location_ins.on_conflict_do_update(
+            index_elements=[offer_location.c.clasfieds_id],
+            set_={key: location_ins.excluded[key] for key in location_values},
+        )
+
+        version_ins = self.insert(offer_versions).values(
+            clasfieds_id=raw_offer.id,
+            content_hash=content_hash,
+            title=raw_offer.title,
+            description=raw_offer.description,
+            price=offer_parameters.price,
+            milage=offer_parameters.milage,
+            recorded_time=base_values["scraperd_time"]
+            or datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+
+        result = await conn.execute(base_upsert)
+        if result.first() is None:
+            return False
+        await conn.execute(params_upsert)
+        await conn.execute(location_upsert)
+        version_id = (
+            await conn.execute(version_ins.returning(offer_versions.c.id))
+        ).scalar_one()
+        # rule labels are computed inline, in the transaction of the offer
+        rules_label = OfferLabel(
+            clasfieds_id=raw_offer.id,
+            label_source=LabelSource.rules,
+            label_version=RULES_LABEL_VERSION,
+            is_suspicious=bool(rule_values["rule_hits"]),
+            offer_version_id=version_id,
+        )
+        await conn.execute(
+            self._offer_labels_upsert(),
+            [_offer_label_values(rules_label, _utcnow())],
+        )
+        return True
+
+    async def select_offer_versions(self, clasfieds_id: int):
+        query = (
+            select(offer_versions)
+            .where(offer_versions.c.clasfieds_id == clasfieds_id)
+            .order_by(offer_versions.c.recorded_time)
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(query)
+            data = result.fetchall()
+            return data
+
+    async def select_offers_versions(self, clasfieds_ids: list[int]):
+        query = select(offer_versions).where(
+            offer_versions.c.clasfieds_id.in_(clasfieds_ids)
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(query)
+            data = result.fetchall()
+            return data
+
     async def add_labeling_data(self, vin: str) -> None:
-        ins = insert(labeling_data).values(vin=vin).on_conflict_do_nothing()
+        ins = self.insert(labeling_data).values(vin=vin).on_conflict_do_nothing()
         async with self.engine.begin() as conn:
             await conn.execute(ins)
 
+    async def add_labeling_data_bulk(self, vins: list[str]) -> int:
+        unique_vins = list(dict.fromkeys(vins))
+        if not unique_vins:
+            return 0
+        ins = (
+            self.insert(labeling_data)
+            .values([{"vin": vin} for vin in unique_vins])
+            .on_conflict_do_nothing()
+            .returning(labeling_data.c.vin)
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(ins)
+            return len(result.fetchall())
+
     async def select_labeling_data(self, vin: str) -> bool:
         query = select(labeling_data).where(labeling_data.c.vin == vin)
         async with self.engine.begin() as conn:
@@ -106,6 +578,12 @@ class SqlAlchemyOfferRepository(OfferRepository):
             data = result.fetchone()
             return data is not None
 
+    async def select_existing_labeling_data(self, vins: list[str]) -> set[str]:
+        query = select(labeling_data.c.vin).where(labeling_data.c.vin.in_(vins))
+        async with self.engine.begin() as conn:
+            result = await conn.execute(query)
+            return set(result.scalars())
+
     async def select_single_base_offer(self, clasfieds_id: int):
         query = select(offers_base).where(offers_base.c.clasfieds_id == clasfieds_id)
         async with self.engine.begin() as conn:
@@ -113,90 +591,332 @@ class SqlAlchemyOfferRepository(OfferRepository):
             data = result.fetchone()
             return data
 
-    async def select_all_offers(self):
+    async def select_base_offers(self, clasfieds_ids: list[int]):
+        query = select(offers_base).where(offers_base.c.clasfieds_id.in_(clasfieds_ids))
+        async with self.engine.begin() as conn:
+            result = await conn.execute(query)
+            data = result.fetchall()
+            return data
+
+    async def select_stale_offers(self, older_than: datetime, limit: int):
         query = (
-            select(
-                offers_base.c.clasfieds_id,
-                offers_base.c.title,
-                offers_base.c.description,
-                offers_base.c.vin,
-                offers_details.c.model,
-                offers_details.c.price,
-                offers_details.c.milage,
-                offers_details.c.condition,
-                offers_details.c.country_origin,
-            )
+            select(*ARCHIVED_OFFER_COLUMNS)
             .select_from(
-                join(
-                    offers_base,
+                offers_base.outerjoin(
                     offers_details,
                     offers_base.c.clasfieds_id == offers_details.c.clasfieds_id,
+                ).outerjoin(
+                    offer_location,
+                    offers_base.c.clasfieds_id == offer_location.c.clasfieds_id,
+                )
+            )
+            .where(offers_base.c.scraperd_time < older_than)
+            .order_by(offers_base.c.clasfieds_id)
+            .limit(limit)
+            .execution_options(query_name="stale_offers")
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(query)
+            data = result.fetchall()
+            return data
+
+    async def delete_offers(self, clasfieds_ids: list[int]) -> int:
+        async with self.engine.begin() as conn:
+            for table in (
+                offer_versions,
+                training_offers,
+                offers_details,
+                offer_location,
+            ):
+                await conn.execute(
+                    delete(table).where(table.c.clasfieds_id.in_(clasfieds_ids))
+                )
+            result = await conn.execute(
+                delete(offers_base).where(offers_base.c.clasfieds_id.in_(clasfieds_ids))
+            )
+            return result.rowcount
+
+    def _search_offers_query(self, query: str) -> Select:
+        search_vector = column("search_vector", TSVECTOR)
+        ts_query = func.websearch_to_tsquery(
+            literal_column("'polish'::regconfig"), query
+        )
+        return select(
+            *_search_result_columns(),
+            func.ts_rank_cd(search_vector, ts_query).label("rank"),
+        ).where(search_vector.bool_op("@@")(ts_query))
+
+    async def search_offers(self, query: str, limit: int = 20, offset: int = 0):
+        search_query = self._search_offers_query(query)
+        ranked_query = (
+            search_query.order_by(
+                search_query.selected_columns.rank.desc(),
+                offers_base.c.clasfieds_id,
+            )
+            .limit(limit)
+            .offset(offset)
+            .execution_options(query_name="search_offers")
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(ranked_query)
+            data = result.fetchall()
+            return data
+
+    async def refresh_offer_rollups(self) -> int:
+        watermarks_query = select(
+            func.max(offer_rollups.c.offer_version_id),
+            func.max(offer_rollups.c.labeled_time),
+        )
+        latest_query = select(
+            select(func.coalesce(func.max(offer_versions.c.id), 0)).scalar_subquery(),
+            select(func.max(offer_labels.c.labeled_time)).scalar_subquery(),
+        )
+        async with self.engine.begin() as conn:
+            offer_version_watermark, labeled_time_watermark = (
+                await conn.execute(watermarks_query)
+            ).one()
+            latest_version_id, latest_labeled_time = (
+                await conn.execute(latest_query)
+            ).one()
+            if offer_version_watermark is None:
+                days_query = select(offer_day).distinct()
+            else:
+                days_query = _affected_rollup_days_query(
+                    offer_version_watermark, labeled_time_watermark
+                )
+            days = [day for day in (await conn.execute(days_query)).scalars() if day]
+            if not days:
+                return 0
+
+            await conn.execute(
+                delete(offer_rollups).where(offer_rollups.c.day.in_(days))
+            )
+            source = _offer_rollups_source_query(
+                days, latest_version_id, latest_labeled_time
+            )
+            result = await conn.execute(
+                self.insert(offer_rollups).from_select(
+                    [column.name for column in source.selected_columns], source
                 )
             )
+            return result.rowcount
+
+    async def select_offer_rollups(
+        self,
+        label_source: LabelSource,
+        start_day: date,
+        end_day: date | None = None,
+        dimensions: Sequence[str] = OFFER_ROLLUP_DIMENSIONS,
+    ):
+        grouped_columns = [offer_rollups.c[dimension] for dimension in dimensions]
+        query = (
+            select(
+                *grouped_columns,
+                func.sum(offer_rollups.c.offers).label("offers"),
+                func.sum(offer_rollups.c.labeled_offers).label("labeled_offers"),
+                func.sum(offer_rollups.c.suspicious_offers).label("suspicious_offers"),
+            )
             .where(
-                and_(
-                    offers_details.c.model.isnot(None),
-                    offers_details.c.price.isnot(None),
-                    offers_details.c.milage.isnot(None),
-                    offers_details.c.condition.isnot(None),
-                    offers_details.c.country_origin.isnot(None),
-                    func.lower(offers_base.c.brand).in_(
-                        [
-                            "opel",
-                            "ford",
-                            "renault",
-                            "audi",
-                            "peugeot",
-                            "skoda",
-                            "toyota",
-                            "volkswagen",
-                            "bmw",
-                            "volvo",
-                            "hyundai",
-                            "kia",
-                            "mercedes-benz",
-                            "nissan",
-                            "citroën",
-                            "fiat",
-                            "seat",
-                            "mazda",
-                            "honda",
-                            "suzuki",
-                            "jeep",
-                            "mitsubishi",
-                            "dacia",
-                            "porsche",
-                            "chevrolet",
-                            "lexus",
-                            "alfa romeo",
-                            "mini",
-                            "land rover",
-                            "dodge",
-                            "jaguar",
-                            "subaru",
-                            "chrysler",
-                            "mercedes",
-                            "saab",
-                            "citroen",
-                            "smart",
-                            "infiniti",
-                            "ssangYong",
-                            "lancia",
-                            "daihatsu",
-                            "daewoo",
-                            "aixam",
-                            "cadillac",
-                            "polonez",
-                        ]
-                    ),
+                offer_rollups.c.label_source == label_source,
+                offer_rollups.c.day >= start_day,
+                offer_rollups.c.day <= (end_day or date.max),
+            )
+            .group_by(*grouped_columns)
+            .order_by(*grouped_columns)
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(query)
+            data = result.fetchall()
+            return data
+
+    async def select_all_offers(self):
+        query = _all_offers_query()
+        async with self.engine.begin() as conn:
+            result = await conn.execute(query)
+            data = result.fetchall()
+            return data
+
+    def iter_all_offers(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[Row]]:
+        return self._stream(_all_offers_query(), chunk_size)
+
+    async def sync_brands(self, aliases: dict[str, list[str]] = BRAND_ALIASES) -> None:
+        brands_ins = (
+            self.insert(brands)
+            .values([{"name": name} for name in aliases])
+            .on_conflict_do_nothing()
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(brands_ins)
+            result = await conn.execute(select(brands.c.id, brands.c.name))
+            brand_ids = {row.name: row.id for row in result}
+            aliases_ins = self.insert(brand_aliases).values(
+                [
+                    {"alias": alias, "brand_id": brand_ids[name]}
+                    for name, brand_alias_list in aliases.items()
+                    for alias in brand_alias_list
+                ]
+            )
+            await conn.execute(
+                aliases_ins.on_conflict_do_update(
+                    index_elements=[brand_aliases.c.alias],
+                    set_={"brand_id": aliases_ins.excluded.brand_id},
                 )
             )
+
+    async def refresh_training_offers(self) -> int:
+        await self.sync_brands()
+        watermarks_query = select(
+            func.coalesce(func.max(training_offers.c.clasfieds_id), 0),
+            func.coalesce(func.max(training_offers.c.offer_version_id), 0),
+        )
+        latest_version_query = select(func.coalesce(func.max(offer_versions.c.id), 0))
+        async with self.engine.begin() as conn:
+            clasfieds_id_watermark, offer_version_watermark = (
+                await conn.execute(watermarks_query)
+            ).one()
+            latest_version_id = (await conn.execute(latest_version_query)).scalar_one()
+            source = _training_offers_source_query(
+                clasfieds_id_watermark, offer_version_watermark, latest_version_id
+            )
+            columns = [column.name for column in source.selected_columns]
+            ins = self.insert(training_offers).from_select(columns, source)
+            upsert = ins.on_conflict_do_update(
+                index_elements=[training_offers.c.clasfieds_id],
+                set_={
+                    column: ins.excluded[column]
+                    for column in columns
+                    if column != "clasfieds_id"
+                },
+            )
+            result = await conn.execute(upsert)
+            return result.rowcount
+
+    async def select_training_offers(self):
+        query = _training_offers_query()
+        async with self.engine.begin() as conn:
+            result = await conn.execute(query)
+            data = result.fetchall()
+            return data
+
+    def iter_training_offers(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[Row]]:
+        return self._stream(_training_offers_query(), chunk_size)
+
+    def _offer_labels_upsert(self):
+        ins = self.insert(offer_labels)
+        return ins.on_conflict_do_update(
+            index_elements=[
+                offer_labels.c.clasfieds_id,
+                offer_labels.c.label_source,
+                offer_labels.c.label_version,
+            ],
+            set_={
+                "is_suspicious": ins.excluded.is_suspicious,
+                "labeled_time": ins.excluded.labeled_time,
+                "offer_version_id": ins.excluded.offer_version_id,
+            },
+        )
+
+    async def add_offer_labels(self, labels: list[OfferLabel]) -> None:
+        labeled_time = _utcnow()
+        unique_labels = {
+            (label.clasfieds_id, label.label_source, label.label_version): label
+            for label in labels
+        }
+        if not unique_labels:
+            return
+        async with self.engine.begin() as conn:
+            # executemany, so large label batches stay under the bind limit
+            await conn.execute(
+                self._offer_labels_upsert(),
+                [
+                    _offer_label_values(label, labeled_time)
+                    for label in unique_labels.values()
+                ],
+            )
+
+    def iter_unlabeled_training_offers(
+        self,
+        label_source: LabelSource,
+        label_version: int,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[list[Row]]:
+        return self._stream(
+            _unlabeled_training_offers_query(label_source, label_version), chunk_size
+        )
+
+    async def add_offer_images(self, images: list[OfferImage]) -> None:
+        if not images:
+            return
+        fetched_time = _utcnow()
+        ins = self.insert(offer_images)
+        upsert = ins.on_conflict_do_update(
+            index_elements=[offer_images.c.clasfieds_id, offer_images.c.position],
+            set_={
+                column.name: ins.excluded[column.name]
+                for column in offer_images.c
+                if column.name not in ("id", "clasfieds_id", "position")
+            },
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                upsert,
+                [asdict(image) | {"fetched_time": fetched_time} for image in images],
+            )
+
+    async def select_offer_images(self, clasfieds_id: int):
+        query = (
+            select(offer_images)
+            .where(offer_images.c.clasfieds_id == clasfieds_id)
+            .order_by(offer_images.c.position)
         )
         async with self.engine.begin() as conn:
             result = await conn.execute(query)
+            return result.fetchall()
+
+    async def select_offers_by_image(self, sha256s: list[str]):
+        query = (
+            select(offer_images.c.sha256, offer_images.c.clasfieds_id)
+            .distinct()
+            .where(offer_images.c.sha256.in_(sha256s))
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(query)
+            return result.fetchall()
+
+    async def select_offers_without_images(self, after_id: int, limit: int):
+        async with self.engine.begin() as conn:
+            result = await conn.execute(_offers_without_images_query(after_id, limit))
             data = result.fetchall()
             return data
 
+    async def select_latest_offer_label(
+        self, clasfieds_id: int, label_source: LabelSource
+    ):
+        query = (
+            select(offer_labels)
+            .where(
+                and_(
+                    offer_labels.c.clasfieds_id == clasfieds_id,
+                    offer_labels.c.label_source == label_source,
+                )
+            )
+            .order_by(offer_labels.c.label_version.desc())
+            .limit(1)
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(query)
+            data = result.fetchone()
+            return data
+
+    def iter_latest_offer_labels(
+        self, label_source: LabelSource, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[Row]]:
+        return self._stream(_latest_offer_labels_query(label_source), chunk_size)
+
     async def select_all_suspicious_offers(self):
         query = select(suspicious_offers)
         async with self.engine.begin() as conn:
@@ -204,6 +924,11 @@ class SqlAlchemyOfferRepository(OfferRepository):
             data = result.fetchall()
             return data
 
+    def iter_all_suspicious_offers(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[Row]]:
+        return self._stream(select(suspicious_offers), chunk_size)
+
     async def select_single_suspicious_offer(self, clasfieds_offer_id: int):
         query = select(suspicious_offers).where(
             suspicious_offers.c.suspicious_clasfieds_id == clasfieds_offer_id
@@ -215,7 +940,7 @@ class SqlAlchemyOfferRepository(OfferRepository):
 
     async def add_suspicious_offer(self, suspicious_offer: SuspiciousOffer) -> None:
         ins = (
-            insert(suspicious_offers)
+            self.insert(suspicious_offers)
             .values(
                 suspicious_clasfieds_id=suspicious_offer.suspicious_clasfieds_id,
                 is_suspicious=suspicious_offer.is_suspicious,
@@ -226,36 +951,20 @@ class SqlAlchemyOfferRepository(OfferRepository):
             await conn.execute(ins)
 
     async def select_suspicious_offers_from_labeling_data(self):
-        subquery = select(labeling_data.c.vin).scalar_subquery()
-
-        query = (
-            select(
-                offers_base.c.clasfieds_id,
-                offers_base.c.title,
-                offers_base.c.description,
-                offers_details.c.model,
-                offers_details.c.price,
-                offers_details.c.milage,
-                offers_details.c.condition,
-                offers_details.c.country_origin,
-            )
-            .select_from(
-                offers_base.join(
-                    offers_details,
-                    offers_base.c.clasfieds_id == offers_details.c.clasfieds_id,
-                )
-            )
-            .where(offers_base.c.vin.in_(subquery))
-        )
-
+        query = _suspicious_offers_from_labeling_data_query()
         async with self.engine.begin() as conn:
             result = await conn.execute(query)
             data = result.fetchall()
             return data
 
+    def iter_suspicious_offers_from_labeling_data(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[Row]]:
+        return self._stream(_suspicious_offers_from_labeling_data_query(), chunk_size)
+
     async def add_suspicious_offer_v2(self, suspicious_offer: SuspiciousOffer) -> None:
         ins = (
-            insert(suspicious_offers_v2)
+            self.insert(suspicious_offers_v2)
             .values(
                 suspicious_clasfieds_id=suspicious_offer.suspicious_clasfieds_id,
                 is_suspicious=suspicious_offer.is_suspicious,
@@ -272,9 +981,14 @@ class SqlAlchemyOfferRepository(OfferRepository):
             data = result.fetchall()
             return data
 
+    def iter_all_suspicious_offers_v2(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list[Row]]:
+        return self._stream(select(suspicious_offers_v2), chunk_size)
+
     async def select_single_suspicious_offer_v2(self, clasfieds_offer_id: int):
         query = select(suspicious_offers_v2).where(
-            suspicious_offers.c.suspicious_clasfieds_id == clasfieds_offer_id
+            suspicious_offers_v2.c.suspicious_clasfieds_id == clasfieds_offer_id
         )
         async with self.engine.begin() as conn:
             result = await conn.execute(query)
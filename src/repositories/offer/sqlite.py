@@ -0,0 +1,63 @@
+from sqlalchemy import (
+    Select,
+    and_,
+    case,
+    create_engine,
+    false,
+    func,
+    literal,
+    or_,
+    select,
+)
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.config.main_config import SQLITE_DB_URL
+from src.models.db_schema import metadata_obj, offers_base
+from src.repositories.offer.sql_alchemy import (
+    SqlAlchemyOfferRepository,
+    _search_result_columns,
+)
+from src.repositories.offer.values import search_terms
+
+
+class SqliteOfferRepository(SqlAlchemyOfferRepository):
+    insert = staticmethod(sqlite.insert)
+
+    def __init__(self, engine: AsyncEngine | None = None) -> None:
+        super().__init__(engine or create_async_engine(SQLITE_DB_URL))
+        schema_engine = create_engine(self.engine.url.set(drivername="sqlite"))
+        metadata_obj.create_all(schema_engine)
+        with schema_engine.connect() as conn:
+            # write-ahead logging lets a writer commit while a stream reads
+            # the same database, which the default rollback journal locks
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        schema_engine.dispose()
+
+    def _search_offers_query(self, query: str) -> Select:
+        # substring fallback for full-text search, ranked with the default
+        # ts_rank weights of title (A) and description (B) matches
+        title = func.lower(offers_base.c.title)
+        description = func.lower(func.coalesce(offers_base.c.description, ""))
+        terms = search_terms(query)
+        rank = sum(
+            (
+                case((title.contains(term, autoescape=True), 1.0), else_=0.0)
+                + case((description.contains(term, autoescape=True), 0.4), else_=0.0)
+                for term in terms
+            ),
+            literal(0.0),
+        )
+        return select(*_search_result_columns(), rank.label("rank")).where(
+            and_(
+                *(
+                    or_(
+                        title.contains(term, autoescape=True),
+                        description.contains(term, autoescape=True),
+                    )
+                    for term in terms
+                )
+            )
+            if terms
+            else false()
+        )
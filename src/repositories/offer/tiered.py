@@ -0,0 +1,144 @@
+from collections import namedtuple
+from typing import AsyncIterator
+
+import pyarrow.compute as pc  # type: ignore
+import pyarrow.dataset as ds  # type: ignore
+
+from src.config.brand_config import BRAND_ALIASES
+from src.config.main_config import STREAM_CHUNK_SIZE
+from src.models.db_schema import offer_versions, offers_base
+from src.repositories.offer.archive import OfferArchive
+from src.repositories.offer.base import OfferRepository
+from src.repositories.offer.values import ALL_OFFERS_BRANDS
+
+ArchivedBaseOfferRow = namedtuple(
+    "ArchivedBaseOfferRow", [column.name for column in offers_base.c]
+)
+ArchivedOfferVersionRow = namedtuple(
+    "ArchivedOfferVersionRow", [column.name for column in offer_versions.c]
+)
+ArchivedOfferRow = namedtuple(
+    "ArchivedOfferRow",
+    [
+        "clasfieds_id",
+        "title",
+        "description",
+        "vin",
+        "model",
+        "price",
+        "milage",
+        "condition",
+        "country_origin",
+    ],
+)
+ArchivedTrainingOfferRow = namedtuple(
+    "ArchivedTrainingOfferRow", ArchivedOfferRow._fields + ("brand",)
+)
+
+BRAND_NAMES = {
+    alias: name for name, aliases in BRAND_ALIASES.items() for alias in aliases
+}
+
+_complete = (
+    ds.field("model").is_valid()
+    & ds.field("price").is_valid()
+    & ds.field("milage").is_valid()
+    & ds.field("condition").is_valid()
+    & ds.field("country_origin").is_valid()
+)
+_lower_brand = pc.utf8_lower(ds.field("brand"))
+
+
+class TieredOfferRepository:
+    """Reads offers from the hot repository first and falls back to the cold
+    archive, so backtests see offers moved out by the retention job. Offers
+    present in both are taken from the hot repository."""
+
+    def __init__(
+        self, repository: OfferRepository, archive: OfferArchive | None = None
+    ) -> None:
+        self.repository = repository
+        self.archive = archive or OfferArchive()
+
+    def __getattr__(self, name: str):
+        return getattr(self.repository, name)
+
+    async def _only_archived(self, offers: list[dict]) -> list[dict]:
+        hot_offers = await self.repository.select_base_offers(
+            [offer["clasfieds_id"] for offer in offers]
+        )
+        hot_ids = {offer.clasfieds_id for offer in hot_offers}
+        return [offer for offer in offers if offer["clasfieds_id"] not in hot_ids]
+
+    async def select_single_base_offer(self, clasfieds_id: int):
+        offer = await self.repository.select_single_base_offer(clasfieds_id)
+        if offer is not None:
+            return offer
+        archived = self.archive.select(
+            [clasfieds_id], list(ArchivedBaseOfferRow._fields[1:])
+        )
+        return ArchivedBaseOfferRow(id=None, **archived[0]) if archived else None
+
+    async def select_offer_versions(self, clasfieds_id: int):
+        versions = await self.repository.select_offer_versions(clasfieds_id)
+        if versions:
+            return versions
+        return [
+            ArchivedOfferVersionRow(id=None, **version)
+            for version in self.archive.select_versions(clasfieds_id)
+        ]
+
+    async def select_base_offers(self, clasfieds_ids: list[int]):
+        offers = list(await self.repository.select_base_offers(clasfieds_ids))
+        hot_ids = {offer.clasfieds_id for offer in offers}
+        archived = self.archive.select(
+            [
+                clasfieds_id
+                for clasfieds_id in clasfieds_ids
+                if clasfieds_id not in hot_ids
+            ],
+            list(ArchivedBaseOfferRow._fields[1:]),
+        )
+        return offers + [ArchivedBaseOfferRow(id=None, **offer) for offer in archived]
+
+    async def select_all_offers(self):
+        return [offer async for chunk in self.iter_all_offers() for offer in chunk]
+
+    async def iter_all_offers(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list]:
+        async for chunk in self.repository.iter_all_offers(chunk_size):
+            yield chunk
+        for batch in self.archive.iter_batches(
+            list(ArchivedOfferRow._fields) + ["brand"],
+            chunk_size,
+            _complete & _lower_brand.isin(ALL_OFFERS_BRANDS),
+        ):
+            if offers := await self._only_archived(batch):
+                yield [
+                    ArchivedOfferRow(
+                        **{field: offer[field] for field in ArchivedOfferRow._fields}
+                    )
+                    for offer in offers
+                ]
+
+    async def select_training_offers(self):
+        return [offer async for chunk in self.iter_training_offers() for offer in chunk]
+
+    async def iter_training_offers(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[list]:
+        async for chunk in self.repository.iter_training_offers(chunk_size):
+            yield chunk
+        for batch in self.archive.iter_batches(
+            list(ArchivedTrainingOfferRow._fields),
+            chunk_size,
+            _complete & _lower_brand.isin(list(BRAND_NAMES)),
+        ):
+            if offers := await self._only_archived(batch):
+                yield [
+                    ArchivedTrainingOfferRow(
+                        **offer | {"brand": BRAND_NAMES[offer["brand"].lower()]}
+                    )
+                    for offer in offers
+                ]
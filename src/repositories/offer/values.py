@@ -0,0 +1,146 @@
+from datetime import datetime, timezone
+
+from src.models.db_schema import offer_location, offers_base, offers_details
+from src.models.raw_offer import RawOffer, RawOfferLocation, RawOfferParameters
+from src.raw_offer_producer.phrase_rules import phrase_rule_engine
+from src.raw_offer_producer.vin import vin_features
+
+ALL_OFFERS_BRANDS = [
+    "opel",
+    "ford",
+    "renault",
+    "audi",
+    "peugeot",
+    "skoda",
+    "toyota",
+    "volkswagen",
+    "bmw",
+    "volvo",
+    "hyundai",
+    "kia",
+    "mercedes-benz",
+    "nissan",
+    "citroën",
+    "fiat",
+    "seat",
+    "mazda",
+    "honda",
+    "suzuki",
+    "jeep",
+    "mitsubishi",
+    "dacia",
+    "porsche",
+    "chevrolet",
+    "lexus",
+    "alfa romeo",
+    "mini",
+    "land rover",
+    "dodge",
+    "jaguar",
+    "subaru",
+    "chrysler",
+    "mercedes",
+    "saab",
+    "citroen",
+    "smart",
+    "infiniti",
+    "ssangYong",
+    "lancia",
+    "daihatsu",
+    "daewoo",
+    "aixam",
+    "cadillac",
+    "polonez",
+]
+
+# flattened offer columns moved to the cold archive by the retention job
+ARCHIVED_OFFER_COLUMNS = [
+    *(column for column in offers_base.c if column.name != "id"),
+    *(
+        column
+        for column in offers_details.c
+        if column.name not in ("id", "clasfieds_id")
+    ),
+    offer_location.c.region,
+    offer_location.c.city,
+]
+
+
+OFFER_ROLLUP_DIMENSIONS = ("day", "region", "city", "brand")
+
+
+def search_terms(query: str) -> list[str]:
+    """Lowercase words of a web search query, used where full-text search is
+    not available. Quotes are ignored and negated words are skipped."""
+    return [
+        word
+        for word in query.replace('"', " ").lower().split()
+        if word != "or" and not word.startswith("-")
+    ]
+
+
+def to_utc_naive(value: datetime | str | None) -> datetime | None:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return None
+
+
+def base_offer_values(raw_offer: RawOffer) -> dict:
+    return {
+        "brand": raw_offer.brand,
+        "clasfieds_id": raw_offer.id,
+        "link": raw_offer.link,
+        "title": raw_offer.title,
+        "created_time": to_utc_naive(raw_offer.created_time),
+        "description": raw_offer.description,
+        "image_links": raw_offer.image_links,
+        "vin": raw_offer.vin,
+        "scraperd_time": to_utc_naive(raw_offer.scraped_time),
+    }
+
+
+def location_offer_values(raw_offer_location: RawOfferLocation) -> dict:
+    return {
+        "clasfieds_id": raw_offer_location.id,
+        "region": raw_offer_location.region,
+        "city": raw_offer_location.city,
+    }
+
+
+def params_offer_values(offer_parameters: RawOfferParameters) -> dict:
+    return {
+        "clasfieds_id": offer_parameters.id,
+        "model": offer_parameters.model,
+        "price": offer_parameters.price,
+        "engine_size": offer_parameters.engine_size,
+        "manufactured_year": offer_parameters.manufactured_year,
+        "engine_power": offer_parameters.engine_power,
+        "petrol": offer_parameters.petrol,
+        "car_body": offer_parameters.car_body,
+        "milage": offer_parameters.milage,
+        "color": offer_parameters.color,
+        "condition": offer_parameters.condition,
+        "transmission": offer_parameters.transmission,
+        "drive": offer_parameters.drive,
+        "country_origin": offer_parameters.country_origin,
+        "righthanddrive": offer_parameters.righthanddrive,
+    }
+
+
+def rule_offer_values(raw_offer: RawOffer) -> dict:
+    hits = phrase_rule_engine().match(raw_offer.title, raw_offer.description)
+    return {
+        "rule_hits": list(hits.rules),
+        "contact_phones": list(hits.phones),
+        "contact_emails": list(hits.emails),
+    }
+
+
+def vin_offer_values(raw_offer: RawOffer, offer_parameters: RawOfferParameters) -> dict:
+    return vin_features(
+        offer_parameters.vin or raw_offer.vin,
+        raw_offer.brand,
+        offer_parameters.manufactured_year,
+    )
@@ -0,0 +1,295 @@
+import atexit
+import bisect
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.config.main_config import (
+    DB_EXPLAIN_SLOW_QUERIES,
+    DB_METRICS_FLUSH_INTERVAL,
+    DB_METRICS_PATH,
+    DB_SLOW_QUERY_THRESHOLD,
+)
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+EXPLAIN_PREFIXES = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+
+_statement_target = re.compile(
+    r"^\s*(\w+)\b.*?\b(?:FROM|INTO|UPDATE)\s+\"?(\w+)", re.IGNORECASE | re.DOTALL
+)
+
+
+def query_name_of(statement: str, execution_options: dict) -> str:
+    if "query_name" in execution_options:
+        return execution_options["query_name"]
+    match = _statement_target.match(statement)
+    if match is None:
+        return statement.split(None, 1)[0].upper() if statement.strip() else ""
+    return f"{match.group(1).upper()} {match.group(2)}"
+
+
+class LatencyHistogram:
+    """Fixed bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket holding the quantile, capped by the max seen
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {
+                **{
+                    str(bound): count for bound, count in zip(self.buckets, self.counts)
+                },
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class DatabaseMetrics:
+    """Statement, row and pool metrics collected from engine events."""
+
+    def __init__(self, slow_query_log_size: int = 100) -> None:
+        self.statements: dict[str, LatencyHistogram] = {}
+        self.rows_affected: dict[str, int] = {}
+        self.rows_returned: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        self.pool_wait = LatencyHistogram()
+        self.pool_checked_out = 0
+        self.pool_capacity = 0
+        self.pool_max_checked_out = 0
+        self.pool_timeouts = 0
+        self.slow_queries: deque[dict] = deque(maxlen=slow_query_log_size)
+        self._lock = threading.Lock()
+
+    def observe_statement(
+        self, query_name: str, duration: float, rows_affected: int
+    ) -> None:
+        # DBAPI rowcount is -1 for selects, so it only counts written rows
+        with self._lock:
+            histogram = self.statements.get(query_name)
+            if histogram is None:
+                histogram = self.statements[query_name] = LatencyHistogram()
+            histogram.observe(duration)
+            if rows_affected > 0:
+                self.rows_affected[query_name] = (
+                    self.rows_affected.get(query_name, 0) + rows_affected
+                )
+
+    def observe_rows_returned(self, query_name: str, rows: int) -> None:
+        with self._lock:
+            self.rows_returned[query_name] = (
+                self.rows_returned.get(query_name, 0) + rows
+            )
+
+    def observe_error(self, query_name: str) -> None:
+        with self._lock:
+            self.errors[query_name] = self.errors.get(query_name, 0) + 1
+
+    def observe_pool_checkout(
+        self, wait: float, checked_out: int, capacity: int
+    ) -> None:
+        with self._lock:
+            self.pool_wait.observe(wait)
+            self.pool_checked_out = checked_out
+            self.pool_capacity = capacity
+            self.pool_max_checked_out = max(self.pool_max_checked_out, checked_out)
+
+    def observe_pool_timeout(self) -> None:
+        with self._lock:
+            self.pool_timeouts += 1
+
+    def observe_slow_query(
+        self, query_name: str, duration: float, statement: str, plan: list[str] | None
+    ) -> None:
+        logger.warning(f"Slow query {query_name} took {duration:.3f}s")
+        with self._lock:
+            self.slow_queries.append(
+                {
+                    "query_name": query_name,
+                    "duration": duration,
+                    "statement": statement,
+                    "plan": plan,
+                    "time": time.time(),
+                }
+            )
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            capacity = self.pool_capacity
+            return {
+                "statements": {
+                    name: {
+                        **histogram.snapshot(),
+                        "rows_affected": self.rows_affected.get(name, 0),
+                        "rows_returned": self.rows_returned.get(name, 0),
+                    }
+                    for name, histogram in self.statements.items()
+                },
+                "errors": dict(self.errors),
+                "pool": {
+                    "wait": self.pool_wait.snapshot(),
+                    "checked_out": self.pool_checked_out,
+                    "max_checked_out": self.pool_max_checked_out,
+                    "capacity": capacity,
+                    "saturation": (
+                        self.pool_checked_out / capacity if capacity else 0.0
+                    ),
+                    "timeouts": self.pool_timeouts,
+                },
+                "slow_queries": list(self.slow_queries),
+            }
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.snapshot(), indent=2, default=str))
+        tmp_path.replace(path)
+
+
+db_metrics = DatabaseMetrics()
+_registered_writers: set[tuple[int, Path]] = set()
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout wait and saturation in db_metrics."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            db_metrics.observe_pool_timeout()
+            raise
+        db_metrics.observe_pool_checkout(
+            time.perf_counter() - start,
+            self.checkedout(),
+            self.size() + max(self._max_overflow, 0),
+        )
+        return connection
+
+
+def _explain(conn: Connection, statement: str, parameters: Any) -> list[str] | None:
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    # raw DBAPI cursor, so the plan query is not instrumented itself
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+    except Exception:
+        logger.exception("Failed to capture query plan")
+        return None
+    finally:
+        cursor.close()
+
+
+def instrument_engine(
+    engine: Engine,
+    metrics: DatabaseMetrics = db_metrics,
+    slow_query_threshold: float = DB_SLOW_QUERY_THRESHOLD,
+    explain_slow_queries: bool = DB_EXPLAIN_SLOW_QUERIES,
+    metrics_path: Path | None = DB_METRICS_PATH,
+    flush_interval: float = DB_METRICS_FLUSH_INTERVAL,
+) -> None:
+    """Attach timing listeners to a sync engine, for async engines pass
+    engine.sync_engine. Metrics are written to metrics_path periodically
+    and on exit."""
+    last_flush = time.monotonic()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        nonlocal last_flush
+        duration = time.perf_counter() - conn.info["query_start_time"].pop()
+        query_name = query_name_of(statement, context.execution_options)
+        metrics.observe_statement(query_name, duration, cursor.rowcount)
+
+        if duration >= slow_query_threshold:
+            plan = None
+            if explain_slow_queries and not executemany:
+                plan = _explain(conn, statement, parameters)
+            metrics.observe_slow_query(query_name, duration, statement, plan)
+
+        if metrics_path is not None and time.monotonic() - last_flush >= flush_interval:
+            last_flush = time.monotonic()
+            metrics.write(metrics_path)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+        metrics.observe_error(
+            query_name_of(
+                exception_context.statement or "",
+                (
+                    exception_context.execution_context.execution_options
+                    if exception_context.execution_context is not None
+                    else {}
+                ),
+            )
+        )
+
+    if (
+        metrics_path is not None
+        and (id(metrics), metrics_path) not in _registered_writers
+    ):
+        _registered_writers.add((id(metrics), metrics_path))
+        atexit.register(metrics.write, metrics_path)
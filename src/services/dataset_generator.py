@@ -1,66 +1,72 @@
-from src.repositories.helpers import get_engine
-from src.repositories.offer.sql_alchemy import SqlAlchemyOfferRepository
+import pandas as pd
 
+from src.models.labeling import LabelSource
+from src.raw_offer_producer.vin import vin_features_frame
+from src.repositories.offer.base import OfferRepository
+from src.repositories.offer.factory import get_offer_repository
+from src.services.helpers.photo_hashes import PhotoHashIndex
+from src.services.helpers.price_sketches import PriceSketches
 
-class DataSetBuilder:
-    def __init__(self):
-        self.engine = get_engine()
-        self.scraped_offer_repository = SqlAlchemyOfferRepository(self.engine)
 
-    async def _prepare_dataset_with_suspicious_vin_numbers(self) -> list[dict]:
-        all_offers = await self.scraped_offer_repository.select_all_offers()
-        all_suspicious = (
-            await self.scraped_offer_repository.select_all_suspicious_offers()
+class DataSetBuilder:
+    def __init__(
+        self,
+        scraped_offer_repository: OfferRepository | None = None,
+        photo_hashes: PhotoHashIndex | None = None,
+        price_sketches: PriceSketches | None = None,
+    ):
+        self.scraped_offer_repository = (
+            scraped_offer_repository or get_offer_repository()
+        )
+        # empty indexes are falsy, so they are checked against None
+        self.photo_hashes = PhotoHashIndex() if photo_hashes is None else photo_hashes
+        self.price_sketches = (
+            PriceSketches() if price_sketches is None else price_sketches
         )
-        suspicious_dict = {
-            offer.suspicious_clasfieds_id: offer.is_suspicious
-            for offer in all_suspicious
-        }
-
-        dataset: list = []
-        for offer in all_offers:
-            is_suspicious = suspicious_dict.get(offer.clasfieds_id, False)
-            dataset.append(
-                {
-                    "title": offer[1],
-                    "description": offer[2],
-                    "vin": offer[3],
-                    "model": offer[4],
-                    "price": offer[5],
-                    "milage": offer[6],
-                    "condition": offer[7],
-                    "country_origin": offer[8],
-                    "is_suspicious": is_suspicious,
-                }
-            )
 
-        return dataset
+    async def _prepare_dataset_with_suspicious_vin_numbers(self) -> list[dict]:
+        return await self._prepare_dataset(LabelSource.vin)
 
     async def _prepare_dataset_with_manually_labeled_offers(self) -> list[dict]:
-        all_offers = await self.scraped_offer_repository.select_all_offers()
-        all_suspicious = (
-            await self.scraped_offer_repository.select_all_suspicious_offers_v2()
-        )
+        return await self._prepare_dataset(LabelSource.description)
+
+    async def _prepare_dataset(self, label_source: LabelSource) -> list[dict]:
+        repository = self.scraped_offer_repository
         suspicious_dict = {
-            offer.suspicious_clasfieds_id: offer.is_suspicious
-            for offer in all_suspicious
+            label.clasfieds_id: label.is_suspicious
+            async for chunk in repository.iter_latest_offer_labels(label_source)
+            for label in chunk
         }
 
+        await repository.refresh_training_offers()
         dataset: list = []
-        for offer in all_offers:
-            is_suspicious = suspicious_dict.get(offer.clasfieds_id, False)
-            dataset.append(
-                {
-                    "title": offer[1],
-                    "description": offer[2],
-                    "vin": offer[3],
-                    "model": offer[4],
-                    "price": offer[5],
-                    "milage": offer[6],
-                    "condition": offer[7],
-                    "country_origin": offer[8],
-                    "is_suspicious": is_suspicious,
-                }
-            )
+        async for chunk in repository.iter_training_offers():
+            # training offers carry no production year, so only the year-free
+            # VIN features are attached
+            vin_features = vin_features_frame(
+                pd.Series([offer.vin for offer in chunk], dtype=object),
+                pd.Series([offer.brand for offer in chunk], dtype=object),
+                pd.Series([None] * len(chunk), dtype="Int64"),
+            ).drop(columns="vin_year_match")
+            for offer, features in zip(chunk, vin_features.to_dict("records")):
+                is_suspicious = suspicious_dict.get(offer.clasfieds_id, False)
+                dataset.append(
+                    {
+                        "title": offer.title,
+                        "description": offer.description,
+                        "vin": offer.vin,
+                        "model": offer.model,
+                        "price": offer.price,
+                        "milage": offer.milage,
+                        "condition": offer.condition,
+                        "country_origin": offer.country_origin,
+                        **features,
+                        **self.photo_hashes.features(offer.clasfieds_id),
+                        **self.price_sketches.features(
+                            offer.brand, offer.model, None, offer.milage, offer.price
+                        ),
+                        "is_suspicious": is_suspicious,
+                    }
+                )
 
         return dataset
@@ -1,64 +1,89 @@
 import asyncio
 
 from sentence_transformers import SentenceTransformer  # type: ignore
-from sklearn.metrics.pairwise import cosine_similarity  # type: ignore
 
-from src.models.raw_offer import SuspiciousOffer
-from src.repositories.helpers import get_engine
-from src.repositories.offer.sql_alchemy import SqlAlchemyOfferRepository
+from src.config.main_config import (
+    DESCRIPTION_SIMILARITY_THRESHOLD,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_STORE_PATH,
+    STREAM_CHUNK_SIZE,
+)
+from src.models.labeling import LabelSource, OfferLabel
+from src.repositories.helpers import batched
+from src.repositories.offer.base import OfferRepository
+from src.repositories.offer.factory import get_offer_repository
+from src.services.helpers.embedding_store import EmbeddingStore
+from src.services.helpers.vector_index import build_vector_index, similar_queries
+
+LABEL_VERSION = 1
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
 
 class TestSusSelector:
-    def __init__(self):
-        self.engine = get_engine()
-        self.scraped_offer_repository = SqlAlchemyOfferRepository(self.engine)
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+    def __init__(self, scraped_offer_repository: OfferRepository | None = None):
+        self.scraped_offer_repository = (
+            scraped_offer_repository or get_offer_repository()
+        )
+        self.model = SentenceTransformer(EMBEDDING_MODEL)
+        self.embeddings = EmbeddingStore(EMBEDDING_STORE_PATH / EMBEDDING_MODEL)
 
-    async def _get_suspicions_descriptions(self):
-        suspicious_offers = (
-            await self.scraped_offer_repository.select_suspicious_offers_from_labeling_data()
+    def _encode(self, descriptions: list[str]):
+        return self.embeddings.encode(
+            descriptions,
+            lambda texts: self.model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE),
         )
-        suspicious_data = [(offer[0], offer[2]) for offer in suspicious_offers]
-        suspicious_descriptions = [data[1] for data in suspicious_data]
-        return suspicious_data, self.model.encode(suspicious_descriptions)
 
-    async def get_similar_descriptions(self, similarity_threshold=0.8) -> None:
-        (
-            suspicious_data,
-            suspicious_embeddings,
-        ) = await self._get_suspicions_descriptions()
-        offers = await self.scraped_offer_repository.select_all_offers()
-        offers_data = [(offer[0], offer[2]) for offer in offers]
-        descriptions = [offer[1] for offer in offers_data]
-        embeddings = self.model.encode(descriptions)
-        suspicious_offers: list = []
+    async def _get_suspicions_descriptions(self):
+        repository = self.scraped_offer_repository
+        suspicious_data = [
+            (offer.clasfieds_id, offer.description)
+            async for chunk in repository.iter_suspicious_offers_from_labeling_data()
+            for offer in chunk
+        ]
+        suspicious_descriptions = [data[1] for data in suspicious_data]
+        return suspicious_data, self._encode(suspicious_descriptions)
 
-        for i, (suspicious_id, suspicious_embedding) in enumerate(
-            zip(suspicious_data, suspicious_embeddings)
-        ):
-            similarities = cosine_similarity([suspicious_embedding], embeddings)[  # type: ignore
-                0
-            ]
-            for index, similarity_score in enumerate(similarities):
-                if similarity_score > similarity_threshold:
-                    suspicious_offers.append(offers_data[index][0])
+    async def get_similar_descriptions(
+        self, similarity_threshold=DESCRIPTION_SIMILARITY_THRESHOLD
+    ) -> None:
+        _, suspicious_embeddings = await self._get_suspicions_descriptions()
+        index = (
+            build_vector_index(suspicious_embeddings)
+            if len(suspicious_embeddings)
+            else None
+        )
+        offer_ids: list = []
+        suspicious_offers: set = set()
 
-        await self._populate_suspicious_offers_v2(suspicious_offers)
+        await self.scraped_offer_repository.refresh_training_offers()
+        async for chunk in self.scraped_offer_repository.iter_training_offers():
+            chunk_ids = [offer.clasfieds_id for offer in chunk]
+            offer_ids.extend(chunk_ids)
+            if index is None:
+                continue
+            embeddings = self._encode([offer.description for offer in chunk])
+            suspicious_offers.update(
+                chunk_ids[position]
+                for position in similar_queries(index, embeddings, similarity_threshold)
+            )
 
-    async def _populate_suspicious_offers_v2(self, suspicious_offers: list):
-        offers = await self.scraped_offer_repository.select_all_offers()
+        await self._populate_suspicious_offers_v2(offer_ids, suspicious_offers)
+        await self.scraped_offer_repository.refresh_offer_rollups()
 
-        for offer in offers:
-            suspicious_indicator: bool = False
-            if offer.clasfieds_id in suspicious_offers:
-                suspicious_indicator = True
-            suspicious_offer = SuspiciousOffer(
-                suspicious_clasfieds_id=offer.clasfieds_id,
-                is_suspicious=suspicious_indicator,
-            )
-            await self.scraped_offer_repository.add_suspicious_offer_v2(
-                suspicious_offer
-            )
+    async def _populate_suspicious_offers_v2(
+        self, offer_ids: list, suspicious_offers: set
+    ):
+        for batch in batched(offer_ids, STREAM_CHUNK_SIZE):
+            labels = [
+                OfferLabel(
+                    clasfieds_id=offer_id,
+                    label_source=LabelSource.description,
+                    label_version=LABEL_VERSION,
+                    is_suspicious=offer_id in suspicious_offers,
+                )
+                for offer_id in batch
+            ]
+            await self.scraped_offer_repository.add_offer_labels(labels)
 
 
 if __name__ == "__main__":
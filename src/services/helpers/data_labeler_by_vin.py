@@ -1,77 +1,105 @@
 import asyncio
 import logging
 import re
+import string
 
-from sqlalchemy import Row
+import numpy as np
+import pyarrow as pa  # type: ignore
+import pyarrow.compute as pc  # type: ignore
 
 from src.config import log_init
-from src.models.raw_offer import SuspiciousOffer
-from src.repositories.helpers import get_engine
-from src.repositories.offer.sql_alchemy import SqlAlchemyOfferRepository
+from src.config.main_config import STREAM_CHUNK_SIZE
+from src.models.labeling import LabelSource, OfferLabel
+from src.repositories.offer.base import OfferRepository
+from src.repositories.offer.factory import get_offer_repository
 
 log_init.setup_logging()
 
 logger = logging.getLogger(__name__)
 
-
-async def _is_suspicious(offer: Row) -> bool:
-    vin = offer.vin
-
-    if vin is None:
-        return True
-
-    if re.match(r"^([a-zA-Z0-9])\1{16}$", vin):
-        return True
-
-    if vin.lower() == vin or vin.upper() == vin:
-        if re.match(r"^([a-zA-Z0-9])\1+$", vin):
-            return True
-
-    placeholder_patterns = [
-        "zapytaj",
-        "wysylam",
-        "kontakt",
-        "zadzwon",
-        "nrvin",
-        "astaz",
-        "error",
-        "xxxx",
-        "vvvv",
-        "zzzz",
-        "yyyy",
-        "www",
-    ]
-
-    if any(re.search(pattern, vin.lower()) for pattern in placeholder_patterns):
-        return True
-
-    if re.search("[^a-hj-npr-z0-9]", vin.lower()):
-        return True
-
-    if re.match(r"^123456789|abcdefg|012345|987654|abcdef", vin.lower()):
-        return True
-
-    if re.search(r"tel|phone|contact|zadzwon", vin.lower()):
-        return True
-
-    if re.match(r"^(wauzzz|vf|wba)[a-z0-9]*[x]{5,}", vin.lower()):
-        return True
-
-    return False
-
-
-async def process_offers():
-    engine = get_engine()
-    scraped_offer_repository = SqlAlchemyOfferRepository(engine)
-
-    all_offers = await scraped_offer_repository.select_all_offers()
-    for offer in all_offers:
-        suspicious_indicator = await _is_suspicious(offer)
-        suspicious_offer = SuspiciousOffer(
-            suspicious_clasfieds_id=offer.clasfieds_id,
-            is_suspicious=suspicious_indicator,
-        )
-        await scraped_offer_repository.add_suspicious_offer(suspicious_offer)
-
-
-asyncio.run(process_offers())
+LABEL_VERSION = 1
+
+PLACEHOLDER_PATTERNS = [
+    "zapytaj",
+    "wysylam",
+    "kontakt",
+    "zadzwon",
+    "nrvin",
+    "astaz",
+    "error",
+    "xxxx",
+    "vvvv",
+    "zzzz",
+    "yyyy",
+    "www",
+]
+
+# All VIN rules as one case-insensitive alternation, so a VIN is scanned once.
+# The pattern sticks to the syntax shared by re and RE2, which evaluates it
+# column-wise over Arrow arrays.
+SUSPICIOUS_VIN_PATTERN = re.compile(
+    "|".join(
+        [
+            # a single character repeated over the whole VIN
+            "(?-i:^(?:{})$)".format(
+                "|".join(
+                    f"{character}{character}+"
+                    for character in string.ascii_letters + string.digits
+                )
+            ),
+            *PLACEHOLDER_PATTERNS,
+            # characters not allowed in a VIN (I, O, Q) and non alphanumerics
+            "[^a-hj-npr-z0-9]",
+            "^(?:123456789|abcdef|012345|987654)",
+            "tel|phone|contact",
+            "^(?:wauzzz|vf|wba)[a-z0-9]*x{5}",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+
+def is_suspicious_vin(vin: str | None) -> bool:
+    return vin is None or SUSPICIOUS_VIN_PATTERN.search(vin) is not None
+
+
+def label_suspicious_vins(vins: list[str | None]) -> np.ndarray:
+    matches = pc.match_substring_regex(
+        pa.array(vins, pa.string()),
+        SUSPICIOUS_VIN_PATTERN.pattern,
+        ignore_case=True,
+    )
+    return pc.fill_null(matches, True).to_numpy(zero_copy_only=False)
+
+
+async def process_offers(
+    scraped_offer_repository: OfferRepository | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> int:
+    scraped_offer_repository = scraped_offer_repository or get_offer_repository()
+
+    await scraped_offer_repository.refresh_training_offers()
+    labeled = 0
+    async for chunk in scraped_offer_repository.iter_unlabeled_training_offers(
+        LabelSource.vin, LABEL_VERSION, chunk_size
+    ):
+        suspicious = label_suspicious_vins([offer.vin for offer in chunk])
+        labels = [
+            OfferLabel(
+                clasfieds_id=offer.clasfieds_id,
+                label_source=LabelSource.vin,
+                label_version=LABEL_VERSION,
+                is_suspicious=bool(is_suspicious),
+                offer_version_id=offer.offer_version_id,
+            )
+            for offer, is_suspicious in zip(chunk, suspicious)
+        ]
+        await scraped_offer_repository.add_offer_labels(labels)
+        labeled += len(labels)
+    logger.info(f"Labeled {labeled} offers by VIN")
+    await scraped_offer_repository.refresh_offer_rollups()
+    return labeled
+
+
+if __name__ == "__main__":
+    asyncio.run(process_offers())
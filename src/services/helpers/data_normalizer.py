@@ -1,19 +1,46 @@
 import re
-import warnings
+from functools import lru_cache
+from typing import Iterable
 
 import spacy
-from bs4 import BeautifulSoup
 
-nlp = spacy.load("pl_core_news_sm")
+from src.config.main_config import TEXT_CLEANING_BATCH_SIZE, TEXT_CLEANING_PROCESSES
+from src.raw_offer_producer.phrase_rules import strip_html
+
+_NON_LETTER_PATTERN = re.compile(r"[^a-z\s]")
+
+
+@lru_cache(maxsize=None)
+def polish_nlp() -> spacy.Language:
+    # only lemmas and stop words are used, which need the tagger and the
+    # morphologizer but neither the dependency parser nor NER
+    return spacy.load("pl_core_news_sm", exclude=["parser", "ner"])
+
+
+def _prepare_text(text: str) -> str:
+    return _NON_LETTER_PATTERN.sub("", strip_html(text).lower())
+
+
+def _lemmas(doc) -> str:
+    return " ".join(
+        token.lemma_ for token in doc if not token.is_stop and token.is_alpha
+    )
 
 
 def clean_text(text: str) -> str:
-    with warnings.catch_warnings():
-        warnings.filterwarnings("ignore", category=UserWarning)
-        text = BeautifulSoup(text, "html.parser").get_text()
-    text = text.lower()
-    text = re.sub(r"[^a-z\s]", "", text)
-    doc = nlp(text)
-    lemmas = [token.lemma_ for token in doc if not token.is_stop and token.is_alpha]
-    cleaned_text = " ".join(lemmas)
-    return cleaned_text
+    return _lemmas(polish_nlp()(_prepare_text(text)))
+
+
+def clean_texts(
+    texts: Iterable[str],
+    n_process: int = TEXT_CLEANING_PROCESSES,
+    batch_size: int = TEXT_CLEANING_BATCH_SIZE,
+) -> list[str]:
+    """clean_text over many documents, streamed through nlp.pipe in batches
+    and spread over n_process worker processes."""
+    docs = polish_nlp().pipe(
+        (_prepare_text(text) for text in texts),
+        n_process=n_process,
+        batch_size=batch_size,
+    )
+    return [_lemmas(doc) for doc in docs]
@@ -0,0 +1,103 @@
+import hashlib
+import html
+import json
+import re
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+
+from src.config.main_config import EMBEDDING_BATCH_SIZE, EMBEDDING_DTYPE
+from src.repositories.append_only_rows import AppendOnlyRows
+from src.repositories.helpers import batched
+
+KEY_SIZE = 16
+
+Encoder = Callable[[list[str]], np.ndarray]
+
+
+def normalize_description(description: str | None) -> str:
+    text = re.sub(r"<[^>]+>", " ", html.unescape(description or ""))
+    return " ".join(text.lower().split())
+
+
+def description_key(normalized_description: str) -> bytes:
+    return hashlib.blake2b(
+        normalized_description.encode(), digest_size=KEY_SIZE
+    ).digest()
+
+
+class EmbeddingStore:
+    """Append-only store of description embeddings, keyed by the hash of the
+    normalized description. Vectors live in a memory-mapped matrix next to a
+    file of keys holding the row order, so reopening only reads the keys."""
+
+    def __init__(self, path: Path, dtype: str = EMBEDDING_DTYPE) -> None:
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.keys_path = path / "keys.bin"
+        self.vectors_path = path / "vectors.bin"
+        self.meta_path = path / "meta.json"
+
+        self.dtype = np.dtype(dtype)
+        self.dim: int | None = None
+        if self.meta_path.exists():
+            meta = json.loads(self.meta_path.read_text())
+            self.dtype, self.dim = np.dtype(meta["dtype"]), meta["dim"]
+
+        self.store: AppendOnlyRows | None = None
+        self.rows: dict[bytes, int] = {}
+        if self.dim is not None:
+            self._open()
+
+    def _open(self) -> None:
+        self.store = AppendOnlyRows(
+            self.keys_path,
+            self.vectors_path,
+            (np.void, KEY_SIZE),
+            self.dtype,
+            self.dim,
+            in_memory=False,
+        )
+        self.rows = {key: row for row, key in enumerate(self.store.keys)}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self.rows
+
+    def add(self, keys: list[bytes], vectors: np.ndarray) -> None:
+        if not keys:
+            return
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self.meta_path.write_text(
+                json.dumps({"dtype": self.dtype.name, "dim": self.dim})
+            )
+            self._open()
+        start = self.store.append(keys, vectors)
+        for row, key in enumerate(keys, start):
+            self.rows[key] = row
+
+    def get(self, keys: list[bytes]) -> np.ndarray:
+        if not keys:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        rows = [self.rows[key] for key in keys]
+        return np.asarray(self.store.values[rows], dtype=np.float32)
+
+    def encode(
+        self,
+        descriptions: Iterable[str | None],
+        encoder: Encoder,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+    ) -> np.ndarray:
+        """Embeddings of the descriptions, encoding only the ones missing
+        from the store."""
+        texts = [normalize_description(description) for description in descriptions]
+        keys = [description_key(text) for text in texts]
+        missing = {key: text for key, text in zip(keys, texts) if key not in self}
+        for batch in batched(missing.items(), batch_size):
+            batch_keys, batch_texts = zip(*batch)
+            self.add(list(batch_keys), np.asarray(encoder(list(batch_texts))))
+        return self.get(keys)
@@ -0,0 +1,219 @@
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from src.config.main_config import (
+    NEAR_DUPLICATE_BANDS,
+    NEAR_DUPLICATE_INDEX_PATH,
+    NEAR_DUPLICATE_MIN_SHINGLES,
+    NEAR_DUPLICATE_NUM_PERM,
+    NEAR_DUPLICATE_SHINGLE_SIZE,
+    NEAR_DUPLICATE_THRESHOLD,
+)
+from src.raw_offer_producer.phrase_rules import fold_text, strip_html
+from src.repositories.append_only_rows import AppendOnlyRows
+
+# universal hashing (a * x + b) mod p, with p the Mersenne prime 2^61 - 1
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SHINGLE_BASE = np.uint64(1_000_003)
+
+
+def shingle_hashes(text: str | None, size: int = NEAR_DUPLICATE_SHINGLE_SIZE):
+    """32-bit polynomial hashes of the distinct character shingles of the
+    folded text."""
+    folded = fold_text(strip_html(text)).encode()
+    if len(folded) < size:
+        folded = folded.ljust(size)
+    characters = np.frombuffer(folded, dtype=np.uint8).astype(np.uint64)
+    windows = np.lib.stride_tricks.sliding_window_view(characters, size)
+    powers = _SHINGLE_BASE ** np.arange(size - 1, -1, -1, dtype=np.uint64)
+    return np.unique((windows * powers).sum(axis=1) & _MAX_HASH)
+
+
+class MinHasher:
+    def __init__(
+        self,
+        num_perm: int = NEAR_DUPLICATE_NUM_PERM,
+        shingle_size: int = NEAR_DUPLICATE_SHINGLE_SIZE,
+        seed: int = 1,
+    ) -> None:
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+        self.shingle_size = shingle_size
+
+    def signature(self, text: str | None) -> np.ndarray:
+        return self.hashes_signature(shingle_hashes(text, self.shingle_size))
+
+    def hashes_signature(self, hashes: np.ndarray) -> np.ndarray:
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % (
+            _MERSENNE_PRIME
+        )
+        return (permuted & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+
+def jaccard(signature: np.ndarray, signatures: np.ndarray) -> np.ndarray:
+    """Jaccard similarities estimated from MinHash signatures."""
+    return (signatures == signature).mean(axis=-1)
+
+
+class NearDuplicateIndex:
+    """MinHash-LSH index of offer descriptions. Signatures are appended to
+    files next to the offer ids, so adding an offer costs one signature and a
+    lookup per band; the bands are rebuilt in memory on open.
+
+    Descriptions with fewer than min_shingles shingles, e.g. empty or only
+    markup, are not indexed, as they would all look alike."""
+
+    def __init__(
+        self,
+        path: Path = NEAR_DUPLICATE_INDEX_PATH,
+        hasher: MinHasher | None = None,
+        bands: int = NEAR_DUPLICATE_BANDS,
+        min_shingles: int = NEAR_DUPLICATE_MIN_SHINGLES,
+    ) -> None:
+        self.hasher = hasher or MinHasher()
+        self.min_shingles = min_shingles
+        self.num_perm = len(self.hasher.a)
+        # appended for an offer whose description became too short to index
+        self.removed = np.full(self.num_perm, _MAX_HASH, np.uint32)
+        if self.num_perm % bands:
+            raise ValueError(f"{bands} bands do not divide {self.num_perm} hashes")
+        self.bands = bands
+        self.rows_per_band = self.num_perm // bands
+
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.store = AppendOnlyRows(
+            path / "ids.bin",
+            path / "signatures.bin",
+            np.int64,
+            np.uint32,
+            self.num_perm,
+        )
+        self.ids: list[int] = self.store.keys
+        self.rows: dict[int, int] = {}
+        self.buckets: list[dict[bytes, list[int]]] = [
+            defaultdict(list) for _ in range(bands)
+        ]
+        for row in range(len(self.store)):
+            self._index(row)
+
+    @property
+    def signatures(self) -> np.ndarray:
+        return self.store.values
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, clasfieds_id: int) -> bool:
+        return clasfieds_id in self.rows
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [
+            band.tobytes() for band in signature.reshape(self.bands, self.rows_per_band)
+        ]
+
+    def _index(self, row: int) -> None:
+        # a re-added offer keeps only its latest row, older rows are skipped
+        # when candidates are read
+        if np.array_equal(self.signatures[row], self.removed):
+            self.rows.pop(self.ids[row], None)
+            return
+        self.rows[self.ids[row]] = row
+        for bucket, key in zip(self.buckets, self._band_keys(self.signatures[row])):
+            bucket[key].append(row)
+
+    def _signature(self, description: str | None) -> np.ndarray | None:
+        hashes = shingle_hashes(description, self.hasher.shingle_size)
+        if len(hashes) < self.min_shingles:
+            return None
+        return self.hasher.hashes_signature(hashes)
+
+    def add(self, clasfieds_id: int, description: str | None) -> np.ndarray | None:
+        signature = self._signature(description)
+        row = self.rows.get(clasfieds_id)
+        if signature is None:
+            if row is not None:
+                self._append(clasfieds_id, self.removed)
+            return None
+        if row is not None and np.array_equal(self.signatures[row], signature):
+            return signature
+        self._append(clasfieds_id, signature)
+        return signature
+
+    def _append(self, clasfieds_id: int, signature: np.ndarray) -> None:
+        row = self.store.append([clasfieds_id], signature)
+        self._index(row)
+
+    def _candidates(self, signature: np.ndarray) -> list[int]:
+        rows = {
+            row
+            for bucket, key in zip(self.buckets, self._band_keys(signature))
+            for row in bucket.get(key, ())
+        }
+        return [row for row in rows if self.rows.get(self.ids[row]) == row]
+
+    def query(
+        self, description: str | None, threshold: float = NEAR_DUPLICATE_THRESHOLD
+    ) -> dict[int, float]:
+        signature = self._signature(description)
+        if signature is None:
+            return {}
+        return self._query(signature, threshold)
+
+    def _query(self, signature: np.ndarray, threshold: float) -> dict[int, float]:
+        rows = self._candidates(signature)
+        similarities = jaccard(signature, self.signatures[rows])
+        return {
+            self.ids[row]: float(similarity)
+            for row, similarity in zip(rows, similarities)
+            if similarity >= threshold
+        }
+
+    def similar(
+        self, clasfieds_id: int, threshold: float = NEAR_DUPLICATE_THRESHOLD
+    ) -> dict[int, float]:
+        """Offers with a description at least threshold similar to the one of
+        the offer, with their estimated Jaccard similarity."""
+        if clasfieds_id not in self.rows:
+            return {}
+        similar = self._query(self.signatures[self.rows[clasfieds_id]], threshold)
+        similar.pop(clasfieds_id, None)
+        return similar
+
+    def cluster(
+        self, clasfieds_id: int, threshold: float = NEAR_DUPLICATE_THRESHOLD
+    ) -> set[int]:
+        """Offers connected to the offer by a chain of near duplicates."""
+        if clasfieds_id not in self.rows:
+            return set()
+        cluster, pending = {clasfieds_id}, [clasfieds_id]
+        while pending:
+            for similar_id in self.similar(pending.pop(), threshold):
+                if similar_id not in cluster:
+                    cluster.add(similar_id)
+                    pending.append(similar_id)
+        return cluster
+
+    def clusters(
+        self, threshold: float = NEAR_DUPLICATE_THRESHOLD, min_size: int = 2
+    ) -> list[set[int]]:
+        parents = {clasfieds_id: clasfieds_id for clasfieds_id in self.rows}
+
+        def find(clasfieds_id: int) -> int:
+            while parents[clasfieds_id] != clasfieds_id:
+                parents[clasfieds_id] = parents[parents[clasfieds_id]]
+                clasfieds_id = parents[clasfieds_id]
+            return clasfieds_id
+
+        for clasfieds_id, row in self.rows.items():
+            for similar_id in self._query(self.signatures[row], threshold):
+                parents[find(similar_id)] = find(clasfieds_id)
+
+        members: dict[int, set[int]] = defaultdict(set)
+        for clasfieds_id in self.rows:
+            members[find(clasfieds_id)].add(clasfieds_id)
+        return [cluster for cluster in members.values() if len(cluster) >= min_size]
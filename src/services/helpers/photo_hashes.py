@@ -0,0 +1,157 @@
+from collections import defaultdict
+from functools import lru_cache
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from src.config.main_config import PHOTO_HASH_INDEX_PATH, PHOTO_HASH_MAX_DISTANCE
+from src.repositories.append_only_rows import AppendOnlyRows
+
+PHASH_BITS = 64
+PHASH_SIZE = 8
+# the DCT runs over a 32x32 thumbnail, of which the 8x8 lowest frequencies
+# are kept
+PHASH_IMAGE_SIZE = 4 * PHASH_SIZE
+# the hash is split in chunks of 16 bits for multi-index hashing
+PHASH_CHUNKS = 4
+_CHUNK_BITS = PHASH_BITS // PHASH_CHUNKS
+_CHUNK_MASK = (1 << _CHUNK_BITS) - 1
+
+
+@lru_cache(maxsize=None)
+def _dct_matrix(size: int) -> np.ndarray:
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+def phash(image: Image.Image) -> int:
+    """64-bit perceptual hash: the signs of the low frequency DCT coefficients
+    of the grayscale image against their median. Rescaling, recompression and
+    small edits flip only a few bits."""
+    pixels = np.asarray(
+        image.convert("L").resize(
+            (PHASH_IMAGE_SIZE, PHASH_IMAGE_SIZE), Image.Resampling.LANCZOS
+        ),
+        dtype=np.float64,
+    )
+    dct = _dct_matrix(PHASH_IMAGE_SIZE)
+    coefficients = (dct @ pixels @ dct.T)[:PHASH_SIZE, :PHASH_SIZE]
+    bits = coefficients > np.median(coefficients)
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(value: int, values: np.ndarray) -> np.ndarray:
+    differences = np.asarray(values, dtype=np.uint64) ^ np.uint64(value)
+    return np.unpackbits(differences.view(np.uint8)).reshape(-1, PHASH_BITS).sum(axis=1)
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(radius: int) -> tuple[int, ...]:
+    """All chunk values with at most radius bits set."""
+    return tuple(
+        sum(1 << bit for bit in bits)
+        for distance in range(radius + 1)
+        for bits in combinations(range(_CHUNK_BITS), distance)
+    )
+
+
+def _chunks(value: int) -> list[int]:
+    return [(value >> (i * _CHUNK_BITS)) & _CHUNK_MASK for i in range(PHASH_CHUNKS)]
+
+
+class PhotoHashIndex:
+    """Multi-index hash table of offer photo pHashes. Hashes within distance
+    r of a query share at least one 16-bit chunk within r // 4 of the query
+    chunk, so a lookup probes a few hundred chunk buckets and checks only the
+    candidates found there. Hashes are appended to files next to the offer
+    ids and the tables are rebuilt in memory on open."""
+
+    def __init__(self, path: Path = PHOTO_HASH_INDEX_PATH) -> None:
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.store = AppendOnlyRows(
+            path / "ids.bin", path / "hashes.bin", np.int64, np.uint64, 1
+        )
+        self.ids_path = self.store.keys_path
+        self.ids: list[int] = self.store.keys
+        self.offer_rows: dict[int, list[int]] = defaultdict(list)
+        self.entries: set[tuple[int, int]] = set()
+        self.tables: list[dict[int, list[int]]] = [
+            defaultdict(list) for _ in range(PHASH_CHUNKS)
+        ]
+        for row in range(len(self.store)):
+            self._index(row)
+
+    @property
+    def hashes(self) -> np.ndarray:
+        return self.store.values[:, 0]
+
+    def __len__(self) -> int:
+        return len(self.offer_rows)
+
+    def __contains__(self, clasfieds_id: int) -> bool:
+        return clasfieds_id in self.offer_rows
+
+    def _index(self, row: int) -> None:
+        value = int(self.hashes[row])
+        self.entries.add((self.ids[row], value))
+        self.offer_rows[self.ids[row]].append(row)
+        for table, chunk in zip(self.tables, _chunks(value)):
+            table[chunk].append(row)
+
+    def add(self, clasfieds_id: int, photo_hash: int) -> None:
+        if (clasfieds_id, photo_hash) in self.entries:
+            return
+
+        row = self.store.append([clasfieds_id], np.uint64(photo_hash))
+        self._index(row)
+
+    def query(
+        self, photo_hash: int, max_distance: int = PHOTO_HASH_MAX_DISTANCE
+    ) -> dict[int, int]:
+        """Offers with a photo within max_distance bits of the hash, with the
+        distance of their closest photo."""
+        masks = _flip_masks(max_distance // PHASH_CHUNKS)
+        rows = sorted(
+            {
+                row
+                for table, chunk in zip(self.tables, _chunks(photo_hash))
+                for mask in masks
+                for row in table.get(chunk ^ mask, ())
+            }
+        )
+        matches: dict[int, int] = {}
+        for row, distance in zip(rows, hamming(photo_hash, self.hashes[rows])):
+            if distance <= max_distance:
+                clasfieds_id = self.ids[row]
+                matches[clasfieds_id] = min(
+                    int(distance), matches.get(clasfieds_id, PHASH_BITS)
+                )
+        return matches
+
+    def similar(
+        self, clasfieds_id: int, max_distance: int = PHOTO_HASH_MAX_DISTANCE
+    ) -> dict[int, int]:
+        """Other offers sharing a near-identical photo with the offer."""
+        similar: dict[int, int] = {}
+        for row in self.offer_rows.get(clasfieds_id, ()):
+            for similar_id, distance in self.query(
+                int(self.hashes[row]), max_distance
+            ).items():
+                similar[similar_id] = min(distance, similar.get(similar_id, distance))
+        similar.pop(clasfieds_id, None)
+        return similar
+
+    def features(
+        self, clasfieds_id: int, max_distance: int = PHOTO_HASH_MAX_DISTANCE
+    ) -> dict[str, int]:
+        similar = self.similar(clasfieds_id, max_distance)
+        return {
+            "photo_reuse_offers": len(similar),
+            "photo_reuse_distance": min(similar.values(), default=PHASH_BITS),
+        }
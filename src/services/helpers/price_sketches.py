@@ -0,0 +1,251 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from src.config.main_config import (
+    PRICE_SKETCH_BINS,
+    PRICE_SKETCH_MAX_PRICE,
+    PRICE_SKETCH_MILAGE_BAND,
+    PRICE_SKETCH_MIN_OFFERS,
+    PRICE_SKETCH_MIN_PRICE,
+    PRICE_SKETCH_PATH,
+)
+from src.raw_offer_producer.vin import BRAND_NAMES
+
+# segments from the finest to the coarsest, a lookup falls back to a coarser
+# segment while the finer one has too few offers
+SEGMENT_LEVELS = 3
+# scales the MAD of a normal distribution to its standard deviation
+_MAD_SCALE = 1.4826
+
+_OBSERVATION = np.dtype(
+    [("clasfieds_id", "<i8"), ("bin", "<i4"), ("segments", "<i4", SEGMENT_LEVELS)]
+)
+
+
+def milage_band(milage: int | None, band: int = PRICE_SKETCH_MILAGE_BAND):
+    return None if milage is None else max(milage, 0) // band
+
+
+def price_segments(
+    brand: str | None, model: str | None, year: int | None, milage: int | None
+) -> list[str | None]:
+    """Segment keys of an offer, from brand, model, year and milage band down
+    to brand and model."""
+    if not brand or not model:
+        return [None] * SEGMENT_LEVELS
+    brand_name = BRAND_NAMES.get(brand.lower(), brand.lower())
+    key = f"{brand_name}|{model.casefold()}"
+    band = milage_band(milage)
+    return [
+        None if year is None or band is None else f"{key}|{year}|{band}",
+        None if band is None else f"{key}|{band}",
+        key,
+    ]
+
+
+@dataclass(frozen=True)
+class PriceScore:
+    segment: str
+    offers: int
+    median: float
+    mad: float
+    zscore: float
+    percentile: float
+
+
+class PriceSketches:
+    """Log-price histograms per offer segment. Every offer counts once, in
+    the bin of its latest price, so median, MAD and percentiles of a segment
+    are read from a fixed number of bins regardless of the corpus size.
+    Observations are appended to a file and replayed on open."""
+
+    def __init__(
+        self,
+        path: Path = PRICE_SKETCH_PATH,
+        bins: int = PRICE_SKETCH_BINS,
+        min_price: float = PRICE_SKETCH_MIN_PRICE,
+        max_price: float = PRICE_SKETCH_MAX_PRICE,
+        min_offers: int = PRICE_SKETCH_MIN_OFFERS,
+    ) -> None:
+        self.min_offers = min_offers
+        self.edges = np.linspace(np.log(min_price), np.log(max_price), bins + 1)
+        self.bin_width = float(self.edges[1] - self.edges[0])
+
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segments_path = path / "segments.txt"
+        self.observations_path = path / "observations.bin"
+        self.segment_keys = self._read_segments()
+        self.segment_ids = {key: i for i, key in enumerate(self.segment_keys)}
+        self.counts = np.zeros((max(len(self.segment_keys), 64), bins), np.int32)
+        self.offers: dict[int, tuple[int, tuple[int, ...]]] = {}
+        self._replay()
+
+    def _read_segments(self) -> list[str]:
+        if not self.segments_path.exists():
+            return []
+        data = self.segments_path.read_bytes()
+        # drop a key of an interrupted append
+        complete = data[: data.rfind(b"\n") + 1]
+        if len(complete) < len(data):
+            os.truncate(self.segments_path, len(complete))
+        return complete.decode().splitlines()
+
+    def _replay(self) -> None:
+        if not self.observations_path.exists():
+            return
+        observations = np.fromfile(self.observations_path, dtype=np.uint8)
+        size = len(observations) // _OBSERVATION.itemsize
+        if len(observations) > size * _OBSERVATION.itemsize:
+            os.truncate(self.observations_path, size * _OBSERVATION.itemsize)
+        observations = observations[: size * _OBSERVATION.itemsize].view(_OBSERVATION)
+        # only the latest observation of an offer counts
+        latest = np.unique(observations["clasfieds_id"][::-1], return_index=True)[1]
+        observations = observations[::-1][latest]
+        for level in range(SEGMENT_LEVELS):
+            segments = observations["segments"][:, level]
+            known = segments >= 0
+            np.add.at(self.counts, (segments[known], observations["bin"][known]), 1)
+        self.offers = {
+            int(observation["clasfieds_id"]): (
+                int(observation["bin"]),
+                tuple(observation["segments"].tolist()),
+            )
+            for observation in observations
+        }
+
+    def __len__(self) -> int:
+        return len(self.offers)
+
+    def _bin(self, price: float) -> int:
+        bin_index = np.searchsorted(self.edges, np.log(max(price, 1)), "right") - 1
+        return int(np.clip(bin_index, 0, len(self.edges) - 2))
+
+    def _segment_id(self, key: str | None) -> int:
+        if key is None:
+            return -1
+        segment_id = self.segment_ids.get(key)
+        if segment_id is None:
+            segment_id = len(self.segment_keys)
+            with open(self.segments_path, "a") as segments_file:
+                segments_file.write(key.replace("\n", " ") + "\n")
+            self.segment_keys.append(key)
+            self.segment_ids[key] = segment_id
+            if segment_id == len(self.counts):
+                self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)])
+        return segment_id
+
+    def _count(self, bin_index: int, segments: tuple[int, ...], delta: int) -> None:
+        for segment_id in segments:
+            if segment_id >= 0:
+                self.counts[segment_id, bin_index] += delta
+
+    def add(
+        self,
+        clasfieds_id: int,
+        brand: str | None,
+        model: str | None,
+        year: int | None,
+        milage: int | None,
+        price: int | None,
+    ) -> None:
+        """Count the offer at its price, moving it out of the bins of its
+        previous price or segment."""
+        if not price:
+            return
+        bin_index = self._bin(price)
+        segments = tuple(
+            self._segment_id(key) for key in price_segments(brand, model, year, milage)
+        )
+        previous = self.offers.get(clasfieds_id)
+        if previous == (bin_index, segments):
+            return
+
+        observation = np.array([(clasfieds_id, bin_index, segments)], _OBSERVATION)
+        with open(self.observations_path, "ab") as observations_file:
+            observations_file.write(observation.tobytes())
+        if previous is not None:
+            self._count(*previous, -1)
+        self._count(bin_index, segments, 1)
+        self.offers[clasfieds_id] = (bin_index, segments)
+
+    def _quantile_log(self, counts: np.ndarray, q: float) -> float:
+        cumulative = np.cumsum(counts)
+        target = q * cumulative[-1]
+        bin_index = int(np.searchsorted(cumulative, target, "left"))
+        below = cumulative[bin_index - 1] if bin_index else 0
+        fraction = (target - below) / counts[bin_index]
+        return float(self.edges[bin_index] + fraction * self.bin_width)
+
+    def _segment(self, brand, model, year, milage) -> tuple[str, np.ndarray] | None:
+        fallback = None
+        for key in price_segments(brand, model, year, milage):
+            segment_id = self.segment_ids.get(key) if key else None
+            if segment_id is None or not self.counts[segment_id].any():
+                continue
+            counts = self.counts[segment_id]
+            if counts.sum() >= self.min_offers:
+                return key, counts
+            fallback = key, counts
+        return fallback
+
+    def score(
+        self,
+        brand: str | None,
+        model: str | None,
+        year: int | None,
+        milage: int | None,
+        price: int | None,
+    ) -> PriceScore | None:
+        """Robust z-score and percentile of the price within the finest
+        segment of the offer that has enough offers."""
+        segment = self._segment(brand, model, year, milage)
+        if segment is None or not price:
+            return None
+        key, counts = segment
+        median = self._quantile_log(counts, 0.5)
+
+        centers = self.edges[:-1] + self.bin_width / 2
+        deviations = np.abs(centers - median)
+        order = np.argsort(deviations)
+        cumulative = np.cumsum(counts[order])
+        mad = float(deviations[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
+        # a segment within a single bin still has the spread of that bin
+        mad = max(mad, self.bin_width / 2)
+
+        log_price = float(np.clip(np.log(price), self.edges[0], self.edges[-1]))
+        bin_index = self._bin(price)
+        within = (log_price - self.edges[bin_index]) / self.bin_width
+        below = counts[:bin_index].sum() + within * counts[bin_index]
+        return PriceScore(
+            segment=key,
+            offers=int(counts.sum()),
+            median=float(np.exp(median)),
+            mad=mad,
+            zscore=(log_price - median) / (_MAD_SCALE * mad),
+            percentile=float(below / counts.sum()),
+        )
+
+    def features(
+        self,
+        brand: str | None,
+        model: str | None,
+        year: int | None,
+        milage: int | None,
+        price: int | None,
+    ) -> dict[str, float]:
+        score = self.score(brand, model, year, milage, price)
+        if score is None:
+            return {
+                "price_zscore": 0.0,
+                "price_percentile": 0.5,
+                "price_segment_offers": 0,
+            }
+        return {
+            "price_zscore": score.zscore,
+            "price_percentile": score.percentile,
+            "price_segment_offers": score.offers,
+        }
@@ -0,0 +1,144 @@
+import math
+from typing import Protocol
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans  # type: ignore
+
+from src.config.main_config import (
+    VECTOR_INDEX_BLOCK_SIZE,
+    VECTOR_INDEX_IVF_MIN_SIZE,
+    VECTOR_INDEX_IVF_PROBES,
+    VECTOR_INDEX_KIND,
+)
+
+Matches = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def _empty_matches() -> Matches:
+    return (
+        np.empty(0, dtype=np.int64),
+        np.empty(0, dtype=np.int64),
+        np.empty(0, dtype=np.float32),
+    )
+
+
+def _concat_matches(matches: list[Matches]) -> Matches:
+    if not matches:
+        return _empty_matches()
+    query_ids, item_ids, scores = zip(*matches)
+    return np.concatenate(query_ids), np.concatenate(item_ids), np.concatenate(scores)
+
+
+def _blocked_range_search(
+    queries: np.ndarray, vectors: np.ndarray, threshold: float, block_size: int
+) -> Matches:
+    matches = []
+    for start in range(0, len(vectors), block_size):
+        similarities = queries @ vectors[start : start + block_size].T
+        query_ids, item_ids = np.nonzero(similarities > threshold)
+        matches.append((query_ids, item_ids + start, similarities[query_ids, item_ids]))
+    return _concat_matches(matches)
+
+
+class VectorIndex(Protocol):
+    def range_search(self, queries: np.ndarray, threshold: float) -> Matches:
+        """(query, item, cosine similarity) of every pair above the threshold"""
+
+
+class ExactVectorIndex:
+    """Cosine similarity search by blocked matrix products over all vectors."""
+
+    def __init__(
+        self, vectors: np.ndarray, block_size: int = VECTOR_INDEX_BLOCK_SIZE
+    ) -> None:
+        self.vectors = normalize_rows(vectors)
+        self.block_size = block_size
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def range_search(self, queries: np.ndarray, threshold: float) -> Matches:
+        return _blocked_range_search(
+            normalize_rows(queries), self.vectors, threshold, self.block_size
+        )
+
+
+class IVFVectorIndex:
+    """Approximate cosine similarity search over an inverted file: vectors are
+    clustered with k-means and a query is compared only with the vectors of
+    its n_probes closest clusters."""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        n_lists: int | None = None,
+        n_probes: int = VECTOR_INDEX_IVF_PROBES,
+        block_size: int = VECTOR_INDEX_BLOCK_SIZE,
+        seed: int = 0,
+    ) -> None:
+        vectors = normalize_rows(vectors)
+        n_lists = min(n_lists or int(math.sqrt(len(vectors))) or 1, len(vectors))
+        # k-means is trained on a sample, a few dozen vectors per list suffice
+        rng = np.random.default_rng(seed)
+        sample = vectors[
+            rng.choice(len(vectors), min(len(vectors), 64 * n_lists), replace=False)
+        ]
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_lists, random_state=seed, n_init=1, batch_size=4096
+        ).fit(sample)
+        labels = kmeans.predict(vectors)
+        self.centroids = normalize_rows(kmeans.cluster_centers_)
+        self.n_probes = min(n_probes, n_lists)
+        self.block_size = block_size
+        order = np.argsort(labels, kind="stable")
+        self.item_ids = order
+        self.vectors = vectors[order]
+        self.offsets = np.searchsorted(
+            labels[order], np.arange(n_lists + 1), side="left"
+        )
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def range_search(self, queries: np.ndarray, threshold: float) -> Matches:
+        queries = normalize_rows(queries)
+        if not len(queries) or not len(self.vectors):
+            return _empty_matches()
+        probes = np.argpartition(
+            -(queries @ self.centroids.T), self.n_probes - 1, axis=1
+        )[:, : self.n_probes]
+
+        matches = []
+        # one matrix product per list, with every query that probes it
+        for list_id in np.unique(probes):
+            query_ids = np.nonzero((probes == list_id).any(axis=1))[0]
+            start, end = self.offsets[list_id], self.offsets[list_id + 1]
+            list_query_ids, item_ids, scores = _blocked_range_search(
+                queries[query_ids], self.vectors[start:end], threshold, self.block_size
+            )
+            matches.append(
+                (query_ids[list_query_ids], self.item_ids[item_ids + start], scores)
+            )
+        return _concat_matches(matches)
+
+
+def build_vector_index(
+    vectors: np.ndarray, kind: str = VECTOR_INDEX_KIND
+) -> ExactVectorIndex | IVFVectorIndex:
+    if kind == "ivf" or (kind == "auto" and len(vectors) >= VECTOR_INDEX_IVF_MIN_SIZE):
+        return IVFVectorIndex(vectors)
+    return ExactVectorIndex(vectors)
+
+
+def similar_queries(
+    index: VectorIndex, queries: np.ndarray, threshold: float
+) -> set[int]:
+    """Positions of the queries with at least one indexed vector above the
+    threshold."""
+    return set(index.range_search(queries, threshold)[0].tolist())
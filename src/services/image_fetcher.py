@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from PIL import Image
+
+from src.config.main_config import (
+    IMAGE_FETCH_CONCURRENCY,
+    IMAGE_FETCH_PER_HOST,
+    IMAGE_FETCH_TIMEOUT,
+    IMAGE_MAX_BYTES,
+    IMAGE_THUMBNAIL_SIZE,
+    IMAGE_THUMBNAIL_WORKERS,
+    STREAM_CHUNK_SIZE,
+)
+from src.models.image import OfferImage
+from src.repositories.image_store import ImageStore
+from src.repositories.offer.base import OfferRepository
+from src.services.helpers.photo_hashes import PhotoHashIndex, phash
+
+logger = logging.getLogger(__name__)
+
+
+def download(url: str, timeout: float, max_bytes: int) -> bytes:
+    with requests.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        data = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            data += chunk
+            if len(data) > max_bytes:
+                raise ValueError(f"Image {url} is larger than {max_bytes} bytes")
+        return bytes(data)
+
+
+class ImageDecodeError(ValueError):
+    """The downloaded blob is not an image Pillow can read."""
+
+
+def process_image(
+    blob_path: Path, thumbnail_path: Path, size: int
+) -> tuple[int, int, int]:
+    """Write a JPEG thumbnail of the blob unless one exists already and return
+    the size and the perceptual hash of the original image. Only errors of
+    decoding the blob are raised as ImageDecodeError, writing errors are
+    raised as they are."""
+    thumbnail = None
+    try:
+        with Image.open(blob_path) as image:
+            width, height = image.size
+            # JPEGs are decoded at a reduced scale that still covers the thumbnail
+            image.draft("RGB", (size, size))
+            photo_hash = phash(image)
+            if not thumbnail_path.exists():
+                thumbnail = image.convert("RGB")
+                thumbnail.thumbnail((size, size))
+    except FileNotFoundError:
+        raise
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ImageDecodeError(f"Cannot decode {blob_path.name}: {e}") from e
+
+    if thumbnail is not None:
+        thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+        # offers sharing a photo render its thumbnail concurrently
+        tmp_path = thumbnail_path.with_name(
+            f".{thumbnail_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        thumbnail.save(tmp_path, "JPEG", quality=85)
+        os.replace(tmp_path, thumbnail_path)
+    return width, height, photo_hash
+
+
+class ImageFetcher:
+    """Downloads offer photos with a global and a per host concurrency limit,
+    stores them by content and renders thumbnails in worker processes.
+
+    Downloads run requests in threads, so the event loop only waits on the
+    semaphores while the transfers overlap."""
+
+    def __init__(
+        self,
+        store: ImageStore | None = None,
+        executor: Executor | None = None,
+        concurrency: int = IMAGE_FETCH_CONCURRENCY,
+        per_host: int = IMAGE_FETCH_PER_HOST,
+        timeout: float = IMAGE_FETCH_TIMEOUT,
+        max_bytes: int = IMAGE_MAX_BYTES,
+        thumbnail_size: int = IMAGE_THUMBNAIL_SIZE,
+    ) -> None:
+        self.store = store or ImageStore()
+        self.executor = executor or ProcessPoolExecutor(IMAGE_THUMBNAIL_WORKERS)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.thumbnail_size = thumbnail_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._host_semaphores: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(per_host)
+        )
+
+    async def fetch(self, url: str) -> bytes:
+        async with self._semaphore, self._host_semaphores[urlsplit(url).netloc]:
+            return await asyncio.to_thread(download, url, self.timeout, self.max_bytes)
+
+    async def fetch_image(self, clasfieds_id: int, position: int, url: str):
+        """Fetch and store a photo. A photo that cannot be downloaded or decoded
+        is returned without a digest, local storage errors are raised."""
+        try:
+            data = await self.fetch(url)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to fetch image {url} of offer {clasfieds_id}: {e}")
+            return OfferImage(
+                clasfieds_id=clasfieds_id, position=position, url=url, sha256=None
+            )
+        digest = await asyncio.to_thread(self.store.put, data)
+        loop = asyncio.get_running_loop()
+        try:
+            width, height, photo_hash = await loop.run_in_executor(
+                self.executor,
+                process_image,
+                self.store.blob_path(digest),
+                self.store.thumbnail_path(digest),
+                self.thumbnail_size,
+            )
+        except ImageDecodeError as e:
+            logger.warning(f"Failed to decode image {url} of offer {clasfieds_id}: {e}")
+            return OfferImage(
+                clasfieds_id=clasfieds_id, position=position, url=url, sha256=None
+            )
+        return OfferImage(
+            clasfieds_id=clasfieds_id,
+            position=position,
+            url=url,
+            sha256=digest,
+            width=width,
+            height=height,
+            size=len(data),
+            phash=f"{photo_hash:016x}",
+        )
+
+    async def fetch_offer_images(
+        self, clasfieds_id: int, image_links: list[str]
+    ) -> list[OfferImage]:
+        return list(
+            await asyncio.gather(
+                *(
+                    self.fetch_image(clasfieds_id, position, url)
+                    for position, url in enumerate(image_links)
+                )
+            )
+        )
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+
+async def fetch_offer_images(
+    scraped_offer_repository: OfferRepository,
+    fetcher: ImageFetcher,
+    photo_hashes: PhotoHashIndex | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> int:
+    """Fetch photos of offers that have none stored yet and add their
+    perceptual hashes to the index. Failed downloads are recorded without a
+    digest, so they are not retried on every run. Offers failing on a local
+    error store no images and are retried on the next run."""
+    fetched = 0
+    after_id = 0
+    # offers are paged by id, so no read is open during the downloads
+    while offers := await scraped_offer_repository.select_offers_without_images(
+        after_id, chunk_size
+    ):
+        after_id = offers[-1].clasfieds_id
+        results = await asyncio.gather(
+            *(
+                fetcher.fetch_offer_images(offer.clasfieds_id, offer.image_links)
+                for offer in offers
+            ),
+            return_exceptions=True,
+        )
+        images = []
+        for offer, offer_images in zip(offers, results):
+            if isinstance(offer_images, Exception):
+                logger.error(
+                    f"Failed to store images of offer {offer.clasfieds_id}: "
+                    f"{offer_images!r}"
+                )
+                continue
+            images.extend(offer_images)
+        await scraped_offer_repository.add_offer_images(images)
+        if photo_hashes is not None:
+            for image in images:
+                if image.phash is not None:
+                    photo_hashes.add(image.clasfieds_id, int(image.phash, 16))
+        fetched += sum(image.sha256 is not None for image in images)
+        logger.info(f"Fetched {fetched} offer images")
+    return fetched
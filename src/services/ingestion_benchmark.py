@@ -0,0 +1,185 @@
+import json
+import math
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.main import map_offer_data, upsert_labeling_data, upsert_olx_otomoto_data
+from src.models.labeling import TrainingData
+from src.models.raw_offer import RawOffer
+from src.repositories.helpers import batched
+from src.repositories.offer.base import OfferRepository
+from src.repositories.offer.spool import OfferSpool, SpooledOfferRepository
+
+T = TypeVar("T")
+
+BENCHMARKED_TABLES = (
+    "offers_base",
+    "offers_details",
+    "offer_location",
+    "offer_versions",
+    "labeling_data",
+)
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def _throughput(latencies: list[float], rows: int, elapsed: float) -> dict:
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+        "p50_batch_seconds": percentile(latencies, 0.5),
+        "p99_batch_seconds": percentile(latencies, 0.99),
+    }
+
+
+async def _timed_batches(
+    items: Iterable[T],
+    batch_size: int,
+    write_batch: Callable[[list[T]], Awaitable[object]],
+) -> dict:
+    latencies: list[float] = []
+    rows = 0
+    started = time.perf_counter()
+    for batch in batched(items, batch_size):
+        batch_started = time.perf_counter()
+        await write_batch(batch)
+        latencies.append(time.perf_counter() - batch_started)
+        rows += len(batch)
+    return _throughput(latencies, rows, time.perf_counter() - started)
+
+
+async def _timed_drain(spooled: SpooledOfferRepository) -> dict:
+    latencies: list[float] = []
+    rows = 0
+    started = time.perf_counter()
+    while True:
+        batch_started = time.perf_counter()
+        drained = await spooled.drain_batch()
+        if not drained:
+            break
+        latencies.append(time.perf_counter() - batch_started)
+        rows += drained
+    return _throughput(latencies, rows, time.perf_counter() - started)
+
+
+async def benchmark_ingestion(
+    scraped_offer_repository: OfferRepository,
+    offers: Callable[[], Iterable[RawOffer]],
+    training_data: Iterable[TrainingData],
+    batch_size: int,
+    spool_path: Path,
+) -> dict:
+    """Time each offer write path on its own offers, taken from a new offers()
+    iterable per path: upsert_offer one offer at a time, upsert_offers one
+    transaction per batch, and the write-behind spool of main.process, whose
+    appends and drain to the repository are timed separately."""
+
+    async def upsert_offer(batch: list[RawOffer]) -> None:
+        for offer in batch:
+            await upsert_olx_otomoto_data(offer, scraped_offer_repository)
+
+    async def upsert_offers(batch: list[RawOffer]) -> None:
+        await scraped_offer_repository.upsert_offers(
+            [await map_offer_data(offer=offer) for offer in batch]
+        )
+
+    async def upsert_training_data(batch: list[TrainingData]) -> int:
+        return await upsert_labeling_data(
+            batch, scraped_offer_repository, batch_size=batch_size
+        )
+
+    spooled = SpooledOfferRepository(
+        scraped_offer_repository,
+        OfferSpool(spool_path),
+        drain_batch_size=batch_size,
+    )
+
+    async def spool_offers(batch: list[RawOffer]) -> None:
+        for offer in batch:
+            await upsert_olx_otomoto_data(offer, spooled)
+
+    result = {
+        "offers": {
+            "write_path": "upsert_offer",
+            **await _timed_batches(offers(), batch_size, upsert_offer),
+        },
+        "offers_batched": {
+            "write_path": "upsert_offers",
+            **await _timed_batches(offers(), batch_size, upsert_offers),
+        },
+    }
+    try:
+        spool_append = await _timed_batches(offers(), batch_size, spool_offers)
+        spooled.spool.flush()
+        result["offers_spooled"] = {
+            "write_path": "spool",
+            "append": spool_append,
+            "drain": await _timed_drain(spooled),
+        }
+    finally:
+        spooled.spool.close()
+    result["labeling_data"] = await _timed_batches(
+        training_data, batch_size, upsert_training_data
+    )
+    return result
+
+
+async def table_stats(engine: AsyncEngine) -> dict:
+    """Size and dead tuple share of the ingestion tables, Postgres only."""
+    if engine.dialect.name != "postgresql":
+        return {}
+    query = text("""
+        SELECT relname, n_live_tup, n_dead_tup,
+               pg_table_size(relid) AS table_bytes,
+               pg_indexes_size(relid) AS index_bytes
+        FROM pg_stat_user_tables
+        WHERE relname = ANY(:tables)
+        """)
+    async with engine.connect() as conn:
+        result = await conn.execute(query, {"tables": list(BENCHMARKED_TABLES)})
+        return {
+            row.relname: {
+                "live_tuples": row.n_live_tup,
+                "dead_tuples": row.n_dead_tup,
+                "bloat": row.n_dead_tup / max(row.n_live_tup + row.n_dead_tup, 1),
+                "table_bytes": row.table_bytes,
+                "index_bytes": row.index_bytes,
+            }
+            for row in result
+        }
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def store_result(result: dict, path: Path) -> dict:
+    record = {
+        "commit": current_commit(),
+        "recorded_time": datetime.now(timezone.utc).isoformat(),
+        **result,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as results_file:
+        results_file.write(json.dumps(record) + "\n")
+    return record
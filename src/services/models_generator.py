@@ -26,7 +26,7 @@ from sklearn.pipeline import make_pipeline  # type: ignore
 
 from src.config import log_init
 from src.services.dataset_generator import DataSetBuilder
-from src.services.helpers.data_normalizer import clean_text
+from src.services.helpers.data_normalizer import clean_texts
 from src.services.model_visualization import (
     plot_confusion_matrix,
     plot_precision_recall_curve,
@@ -164,7 +164,7 @@ class ModelsGenerator:
             + df["vin"].fillna("")
         )
 
-        df["cleaned_text"] = df["text"].apply(clean_text)
+        df["cleaned_text"] = clean_texts(df["text"])
 
         X = df["cleaned_text"]
         y = df["is_suspicious"]
@@ -0,0 +1,33 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from src.config.main_config import OFFER_ARCHIVE_BATCH_SIZE, OFFER_RETENTION_DAYS
+from src.repositories.offer.archive import OfferArchive
+from src.repositories.offer.base import OfferRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_stale_offers(
+    scraped_offer_repository: OfferRepository,
+    archive: OfferArchive,
+    retention_days: int = OFFER_RETENTION_DAYS,
+    batch_size: int = OFFER_ARCHIVE_BATCH_SIZE,
+) -> int:
+    """Move offers not scraped within retention_days with their versions to
+    the archive, batch by batch. Each batch is written to the archive before
+    it is deleted."""
+    older_than = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+        days=retention_days
+    )
+    archived = 0
+    while offers := await scraped_offer_repository.select_stale_offers(
+        older_than, batch_size
+    ):
+        clasfieds_ids = [offer.clasfieds_id for offer in offers]
+        versions = await scraped_offer_repository.select_offers_versions(clasfieds_ids)
+        archive.write_versions([version._asdict() for version in versions])
+        archive.write([offer._asdict() for offer in offers])
+        archived += await scraped_offer_repository.delete_offers(clasfieds_ids)
+        logger.info(f"Archived {archived} offers scraped before {older_than}")
+    return archived
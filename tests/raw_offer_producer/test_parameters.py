@@ -0,0 +1,31 @@
+from src.raw_offer_producer.parameters import normalize_parameters, parse_number
+
+LABELS = {
+    "price": ["35 000 zł", "12 500,50 zł", "Do negocjacji"],
+    "milage": ["186 000 km", "0 km", None],
+    "engine_size": ["1 598 cm³", "999 cm³", ""],
+    "engine_power": ["150 KM", "75 KM", None],
+    "manufactured_year": ["2015", "2008", 2021],
+    "model": ["C4", "Fabia", "Golf"],
+}
+
+
+def test_normalize_parameters_parses_unit_labels():
+    params = normalize_parameters({key: values[0] for key, values in LABELS.items()})
+
+    assert params == {
+        "price": 35000,
+        "milage": 186000,
+        "engine_size": 1598,
+        "engine_power": 150,
+        "manufactured_year": 2015,
+        "model": "C4",
+    }
+
+
+def test_parse_number_handles_thousands_separators():
+    assert parse_number("12.500 zł") == 12500
+    assert parse_number("1.598 cm³") == 1598
+    assert parse_number("1,598 cm³") == 1598
+    assert parse_number("12 500,50 zł") == 12500
+    assert parse_number("Do negocjacji") is None
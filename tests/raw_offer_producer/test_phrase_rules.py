@@ -0,0 +1,69 @@
+from src.raw_offer_producer.phrase_rules import (
+    AhoCorasick,
+    PhraseRuleEngine,
+    extract_emails,
+    extract_phones,
+    fold_text,
+)
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+
+    matches = sorted(
+        (start, automaton.patterns[pattern_id])
+        for start, pattern_id in automaton.iter_matches("ushers")
+    )
+
+    assert matches == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_fold_text():
+    assert fold_text("Wysyłka  Z ZAGRANICY!<br>Škoda") == "wysylka z zagranicy br skoda"
+
+
+def test_extract_phones():
+    text = "Dzwoń 600 100 200, +48 601-200-300 lub WhatsApp +44 7911 123456. 35 000 zł"
+
+    assert extract_phones(text) == ["+48600100200", "+48601200300", "+447911123456"]
+
+
+def test_extract_emails():
+    assert extract_emails("Pisz: Jan.Kowalski(at)gmail(dot)com lub a@b.pl") == [
+        "jan.kowalski@gmail.com",
+        "a@b.pl",
+    ]
+
+
+def test_rule_engine_matches_phrases_at_word_start():
+    engine = PhraseRuleEngine(
+        {"advance_payment": ["zaliczk"], "email_contact_only": ["tylko mailowo"]}
+    )
+
+    hits = engine.match(
+        "Audi A4", "Wysyłka po wpłacie zaliczki. Kontakt TYLKO mailowo."
+    )
+    assert hits.rules == ("advance_payment", "email_contact_only")
+    assert hits.is_suspicious
+
+    assert not engine.match("Nieprzedzaliczkowy", None).is_suspicious
+
+
+def test_rule_engine_keeps_contacts_as_features():
+    hits = PhraseRuleEngine({}).match(
+        None, "Kontakt +44 7911 123456 lub seller@example.com, tel. 600100200"
+    )
+
+    assert hits.rules == ()
+    assert not hits.is_suspicious
+    assert hits.has_foreign_phone
+    assert hits.phones == ("+447911123456", "+48600100200")
+    assert hits.emails == ("seller@example.com",)
+
+
+def test_rule_engine_skips_negated_phrases():
+    engine = PhraseRuleEngine({"advance_payment": ["zaliczk"]})
+
+    assert not engine.match("Audi A4 bez zaliczki", None).is_suspicious
+    assert not engine.match(None, "Nie biorę zaliczki, brak przedpłat").rules
+    assert engine.match(None, "Bez wypadku. Proszę o zaliczkę").is_suspicious
@@ -0,0 +1,29 @@
+from src.raw_offer_producer.synthetic import (
+    SyntheticOfferGenerator,
+    SyntheticRawOfferProducer,
+)
+from src.raw_offer_producer.vin import vin_check_digit
+
+
+def test_generator_is_deterministic_for_a_seed():
+    first = list(
+        SyntheticRawOfferProducer(50, SyntheticOfferGenerator(seed=7)).get_offers()
+    )
+    second = list(
+        SyntheticRawOfferProducer(50, SyntheticOfferGenerator(seed=7)).get_offers()
+    )
+    other = list(
+        SyntheticRawOfferProducer(50, SyntheticOfferGenerator(seed=8)).get_offers()
+    )
+
+    assert first == second
+    assert first != other
+    assert [offer.id for offer in first] == list(range(1, 51))
+
+
+def test_generated_vins_are_valid():
+    generator = SyntheticOfferGenerator(seed=3, suspicious_rate=0, missing_vin_rate=0)
+    for _ in range(100):
+        vin = generator.offer().vin
+        assert len(vin) == 17
+        assert vin[8] == vin_check_digit(vin)
@@ -0,0 +1,70 @@
+import pandas as pd
+
+from src.raw_offer_producer.synthetic import SyntheticOfferGenerator
+from src.raw_offer_producer.vin import (
+    decode_vin,
+    vin_check_digit,
+    vin_features,
+    vin_features_frame,
+    vin_model_year,
+)
+
+
+def test_vin_check_digit():
+    assert vin_check_digit("1M8GDM9AXKP042788") == "X"
+    assert vin_check_digit("11111111111111111") == "1"
+
+
+def test_vin_model_year():
+    assert vin_model_year("A", 2027) == 2010
+    assert vin_model_year("V", 2027) == 2027
+    assert vin_model_year("W", 2027) == 1998
+    assert vin_model_year("Z", 2027) is None
+
+
+def test_decode_vin():
+    info = decode_vin("wba3a5c53cf256985 ")
+    assert info is not None
+    assert info.manufacturer == "BMW"
+    assert info.region == "europe"
+    assert info.check_digit_valid
+    assert info.model_year == 2012
+    assert decode_vin("WBA3A5C51CF25698") is None
+    assert decode_vin("WBA3A5C51CF2569O5") is None
+    # 0 is not assigned to a region
+    info = decode_vin("0BA3A5C53CF256985")
+    assert info is not None
+    assert info.region is None
+
+
+def test_vin_features():
+    assert vin_features("WBA3A5C53CF256985", "bmw", 2011) == {
+        "vin_manufacturer": "BMW",
+        "vin_region": "europe",
+        "vin_check_digit_valid": True,
+        "vin_model_year": 2012,
+        "vin_brand_match": True,
+        "vin_year_match": True,
+    }
+    features = vin_features("WBA3A5C53CF256985", "Audi", 2005)
+    assert features["vin_brand_match"] is False
+    assert features["vin_year_match"] is False
+    assert set(vin_features(None, "bmw", 2011).values()) == {None}
+
+
+def test_vin_features_frame_matches_single_offers():
+    generator = SyntheticOfferGenerator(seed=11, suspicious_rate=0.3)
+    offers = [generator.offer() for _ in range(500)]
+    vins = [offer.vin for offer in offers] + ["wba3a5c53cf256985", "0BA3A5C53CF256985"]
+    brands = [offer.brand for offer in offers] + [None, "bmw"]
+    years = [offer.parameters[0].manufactured_year for offer in offers] + [None, 2012]
+
+    features = vin_features_frame(
+        pd.Series(vins, dtype=object),
+        pd.Series(brands, dtype=object),
+        pd.Series(years, dtype="Int64"),
+    )
+
+    assert features.to_dict("records") == [
+        vin_features(vin, brand, year) for vin, brand, year in zip(vins, brands, years)
+    ]
@@ -0,0 +1,111 @@
+import asyncio
+from dataclasses import replace
+
+from src.models.labeling import LabelSource, OfferLabel
+from src.repositories.offer.cache import CachedOfferRepository, TTLCache
+from src.repositories.offer.in_memory import InMemoryOfferRepository
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expired_entries():
+    clock = FakeClock()
+    cache = TTLCache(max_size=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") != 2
+    assert cache.get("a") == 1
+    clock.now = 11
+    assert cache.get("c") != 3
+    assert cache.stats() == {"hits": 2, "misses": 2, "evictions": 1, "size": 1}
+
+
+def test_cached_repository_reads_through_and_invalidates_on_write():
+    repository = InMemoryOfferRepository()
+    cached = CachedOfferRepository(repository, max_size=100, ttl=60)
+
+    async def scenario():
+        assert await cached.select_labeling_data("VIN1") is False
+        assert await cached.select_labeling_data("VIN1") is False
+        await cached.add_labeling_data_bulk(["VIN1", "VIN2"])
+        assert await cached.select_labeling_data("VIN1") is True
+        return await cached.select_existing_labeling_data(["VIN1", "VIN2", "VIN3"])
+
+    assert asyncio.run(scenario()) == {"VIN1", "VIN2"}
+    assert cached.cache_stats()["labeling_data"] == {
+        "hits": 2,
+        "misses": 4,
+        "evictions": 0,
+        "size": 3,
+    }
+
+
+def test_cached_repository_batch_get_fetches_only_misses():
+    repository = InMemoryOfferRepository()
+    cached = CachedOfferRepository(repository, max_size=100, ttl=60)
+    requested: list[list[int]] = []
+    select_base_offers = repository.select_base_offers
+
+    async def recording_select_base_offers(clasfieds_ids):
+        requested.append(list(clasfieds_ids))
+        return await select_base_offers(clasfieds_ids)
+
+    repository.select_base_offers = recording_select_base_offers
+
+    async def scenario():
+        await cached.select_single_base_offer(1)
+        return await cached.select_base_offers([1, 2])
+
+    assert asyncio.run(scenario()) == []
+    assert requested == [[2]]
+
+
+def test_cached_repository_drops_values_loaded_across_an_invalidation():
+    repository = InMemoryOfferRepository()
+    cached = CachedOfferRepository(repository, max_size=100, ttl=60)
+    select_labeling_data = repository.select_labeling_data
+
+    async def slow_select_labeling_data(vin):
+        exists = await select_labeling_data(vin)
+        await asyncio.sleep(0.01)
+        return exists
+
+    repository.select_labeling_data = slow_select_labeling_data
+
+    async def scenario():
+        read = asyncio.create_task(cached.select_labeling_data("VIN1"))
+        await asyncio.sleep(0)
+        await cached.add_labeling_data_bulk(["VIN1"])
+        assert await read is False
+        return await cached.select_labeling_data("VIN1")
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_cached_repository_caches_latest_offer_labels():
+    repository = InMemoryOfferRepository()
+    cached = CachedOfferRepository(repository, max_size=100, ttl=60)
+    label = OfferLabel(
+        clasfieds_id=1,
+        label_source=LabelSource.vin,
+        label_version=1,
+        is_suspicious=False,
+    )
+
+    async def scenario():
+        assert await cached.select_latest_offer_label(1, LabelSource.vin) is None
+        assert await cached.select_latest_offer_label(1, LabelSource.vin) is None
+        await cached.add_offer_labels([replace(label, is_suspicious=True)])
+        return await cached.select_latest_offer_label(1, LabelSource.vin)
+
+    assert asyncio.run(scenario()).is_suspicious
+    assert cached.cache_stats()["latest_offer_labels"]["hits"] == 1
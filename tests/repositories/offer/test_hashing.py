@@ -0,0 +1,52 @@
+from dataclasses import replace
+from datetime import datetime, timezone
+
+from src.models.raw_offer import RawOffer, RawOfferParameters
+from src.repositories.offer.hashing import offer_content_hash
+
+raw_offer = RawOffer(
+    brand="Seat",
+    id=123,
+    link="http://test.com",
+    title="Seat Alhambra",
+    created_time=None,
+    description="Samochod w super stanie",
+    image_links=["http://image1.com"],
+    vin="VSSZZZ7NZBV510542",
+    scraped_time=datetime(2024, 3, 1, tzinfo=timezone.utc),
+)
+
+offer_parameters = RawOfferParameters(
+    id=123,
+    model="Alhambra",
+    price=35000,
+    engine_size=None,
+    manufactured_year=None,
+    engine_power=None,
+    petrol=None,
+    car_body=None,
+    milage=186000,
+    color=None,
+    condition=None,
+    transmission=None,
+    drive=None,
+    country_origin=None,
+    righthanddrive=None,
+    vin="VSSZZZ7NZBV510542",
+)
+
+
+def test_offer_content_hash_ignores_scraped_time():
+    rescraped_offer = replace(
+        raw_offer, scraped_time=datetime(2024, 4, 1, tzinfo=timezone.utc)
+    )
+    assert offer_content_hash(raw_offer, offer_parameters) == offer_content_hash(
+        rescraped_offer, offer_parameters
+    )
+
+
+def test_offer_content_hash_detects_price_change():
+    dropped_price = replace(offer_parameters, price=24500)
+    assert offer_content_hash(raw_offer, offer_parameters) != offer_content_hash(
+        raw_offer, dropped_price
+    )
@@ -0,0 +1,369 @@
+import asyncio
+from dataclasses import replace
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.models.db_schema import metadata_obj, offer_day, offers_base
+from src.models.image import OfferImage
+from src.models.labeling import LabelSource, OfferLabel
+from src.models.raw_offer import RawOffer, RawOfferLocation, RawOfferParameters
+from src.repositories.offer.archive import OfferArchive
+from src.repositories.offer.in_memory import InMemoryOfferRepository
+from src.repositories.offer.sqlite import SqliteOfferRepository
+from src.repositories.offer.tiered import TieredOfferRepository
+from src.repositories.telemetry import db_metrics
+from src.services.offer_retention import archive_stale_offers
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryOfferRepository()
+    return SqliteOfferRepository(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'offers.db'}")
+    )
+
+
+def _offer(offer_id: int, brand: str = "Citroen", price: int = 35000) -> tuple:
+    raw_offer = RawOffer(
+        brand=brand,
+        id=offer_id,
+        link="http://test.com",
+        title=f"{brand} C4",
+        created_time="2024-03-01T10:00:00+01:00",
+        description="Samochod w super stanie",
+        image_links=["http://image1.com"],
+        vin="VF7LCBHZ6BS123456",
+        scraped_time=datetime(2024, 3, 1, tzinfo=timezone.utc),
+    )
+    offer_parameters = RawOfferParameters(
+        id=offer_id,
+        model="C4",
+        price=price,
+        engine_size=None,
+        manufactured_year=None,
+        engine_power=None,
+        petrol=None,
+        car_body=None,
+        milage=186000,
+        color=None,
+        condition="Nieuszkodzony",
+        transmission=None,
+        drive=None,
+        country_origin="Polska",
+        righthanddrive=None,
+        vin="VF7LCBHZ6BS123456",
+    )
+    location = RawOfferLocation(id=offer_id, region="Mazowieckie", city="Warszawa")
+    return raw_offer, offer_parameters, location
+
+
+async def _collect(chunks) -> list:
+    return [row async for chunk in chunks for row in chunk]
+
+
+def test_upsert_offer_records_only_changes(repository):
+    async def run():
+        assert await repository.upsert_offer(*_offer(1))
+        assert not await repository.upsert_offer(*_offer(1))
+        assert await repository.upsert_offer(*_offer(1, price=24500))
+        versions = await repository.select_offer_versions(1)
+        assert [version.price for version in versions] == [35000, 24500]
+
+    asyncio.run(run())
+
+
+def test_add_labeling_data_bulk_counts_new_vins(repository):
+    async def run():
+        assert await repository.add_labeling_data_bulk(["A", "B", "A"]) == 2
+        assert await repository.add_labeling_data_bulk(["B", "C"]) == 1
+        assert await repository.select_labeling_data("C")
+
+    asyncio.run(run())
+
+
+def test_refresh_training_offers_is_incremental(repository):
+    async def run():
+        await repository.upsert_offer(*_offer(1))
+        await repository.upsert_offer(*_offer(2, brand="Tesla"))
+        assert await repository.refresh_training_offers() == 1
+        assert await repository.refresh_training_offers() == 0
+
+        await repository.upsert_offer(*_offer(1, price=24500))
+        await repository.upsert_offer(*_offer(3, brand="citroën"))
+        assert await repository.refresh_training_offers() == 2
+
+        offers = await _collect(repository.iter_training_offers(chunk_size=1))
+        assert sorted((offer.clasfieds_id, offer.price) for offer in offers) == [
+            (1, 24500),
+            (3, 35000),
+        ]
+        assert {offer.brand for offer in offers} == {"Citroën"}
+
+    asyncio.run(run())
+
+
+def test_latest_offer_labels(repository):
+    label = OfferLabel(
+        clasfieds_id=1,
+        label_source=LabelSource.vin,
+        label_version=1,
+        is_suspicious=False,
+    )
+
+    async def run():
+        await repository.upsert_offer(*_offer(1))
+        await repository.add_offer_labels(
+            [label, replace(label, label_version=2, is_suspicious=True)]
+        )
+        await repository.add_offer_labels([replace(label, label_version=2)])
+
+        latest = await _collect(repository.iter_latest_offer_labels(LabelSource.vin))
+        assert [(row.clasfieds_id, row.label_version) for row in latest] == [(1, 2)]
+        assert not latest[0].is_suspicious
+        assert not await _collect(
+            repository.iter_latest_offer_labels(LabelSource.description)
+        )
+
+    asyncio.run(run())
+
+
+def test_select_suspicious_offers_from_labeling_data(repository):
+    async def run():
+        await repository.upsert_offer(*_offer(1))
+        await repository.add_labeling_data_bulk(["VF7LCBHZ6BS123456"])
+        offers = await repository.select_suspicious_offers_from_labeling_data()
+        assert [offer.clasfieds_id for offer in offers] == [1]
+
+    asyncio.run(run())
+
+
+def test_stale_offers_are_archived_and_still_readable(repository, tmp_path):
+    archive = OfferArchive(tmp_path / "archive")
+    tiered = TieredOfferRepository(repository, archive)
+
+    async def run():
+        await repository.upsert_offer(*_offer(1))
+        await repository.upsert_offer(*_offer(2, brand="Tesla"))
+        raw_offer, offer_parameters, location = _offer(3)
+        fresh_offer = replace(raw_offer, scraped_time=datetime.now(timezone.utc))
+        await repository.upsert_offer(fresh_offer, offer_parameters, location)
+        await repository.refresh_training_offers()
+
+        assert await archive_stale_offers(repository, archive, 30, batch_size=1) == 2
+        assert await repository.select_single_base_offer(1) is None
+        assert not await repository.select_offer_versions(1)
+        versions = await tiered.select_offer_versions(1)
+        assert [(version.clasfieds_id, version.price) for version in versions] == [
+            (1, 35000)
+        ]
+
+        archived = await tiered.select_single_base_offer(1)
+        assert (archived.clasfieds_id, archived.brand) == (1, "Citroen")
+        offers = await _collect(tiered.iter_all_offers(chunk_size=1))
+        assert sorted(offer.clasfieds_id for offer in offers) == [1, 3]
+        training = await tiered.select_training_offers()
+        assert sorted((offer.clasfieds_id, offer.brand) for offer in training) == [
+            (1, "Citroën"),
+            (3, "Citroën"),
+        ]
+
+    asyncio.run(run())
+
+
+def test_search_offers_ranks_title_matches_first(repository):
+    async def run():
+        raw_offer, offer_parameters, location = _offer(1)
+        await repository.upsert_offer(
+            replace(raw_offer, description="Wpłata zaliczki na konto przed odbiorem"),
+            offer_parameters,
+            location,
+        )
+        raw_offer, offer_parameters, location = _offer(2)
+        await repository.upsert_offer(
+            replace(raw_offer, title="Citroen C4 bez zaliczki"),
+            offer_parameters,
+            location,
+        )
+        await repository.upsert_offer(*_offer(3))
+
+        offers = await repository.search_offers("zaliczki")
+        assert [offer.clasfieds_id for offer in offers] == [2, 1]
+        page = await repository.search_offers("zaliczki", limit=1, offset=1)
+        assert [offer.clasfieds_id for offer in page] == [1]
+        assert not await repository.search_offers('"zaliczki" -konto leasing')
+
+    asyncio.run(run())
+
+
+def test_offer_rollups_are_refreshed_for_affected_days(repository):
+    def label(clasfieds_id: int, is_suspicious: bool) -> OfferLabel:
+        return OfferLabel(
+            clasfieds_id=clasfieds_id,
+            label_source=LabelSource.vin,
+            label_version=1,
+            is_suspicious=is_suspicious,
+        )
+
+    async def run():
+        await repository.sync_brands()
+        await repository.upsert_offer(*_offer(1, brand="citroen"))
+        await repository.upsert_offer(*_offer(2, brand="Tesla"))
+        await repository.add_offer_labels([label(1, True)])
+        assert await repository.refresh_offer_rollups() == 2 * len(LabelSource)
+
+        await repository.add_offer_labels([label(2, False)])
+        assert await repository.refresh_offer_rollups() == 2 * len(LabelSource)
+
+        rollups = await repository.select_offer_rollups(
+            LabelSource.vin, date(2024, 3, 1), dimensions=["region", "brand"]
+        )
+        assert [tuple(row) for row in rollups] == [
+            ("Mazowieckie", "Citroën", 1, 1, 1),
+            ("Mazowieckie", "Tesla", 1, 1, 0),
+        ]
+        assert not await repository.select_offer_rollups(
+            LabelSource.vin, date(2024, 3, 2)
+        )
+
+    asyncio.run(run())
+
+
+def test_unlabeled_training_offers(repository):
+    async def unlabeled() -> list[int]:
+        offers = await _collect(
+            repository.iter_unlabeled_training_offers(LabelSource.vin, 1)
+        )
+        return sorted(offer.clasfieds_id for offer in offers)
+
+    async def run():
+        await repository.upsert_offer(*_offer(1))
+        await repository.upsert_offer(*_offer(2))
+        await repository.refresh_training_offers()
+        offers = await _collect(
+            repository.iter_unlabeled_training_offers(LabelSource.vin, 1)
+        )
+        assert sorted(offer.clasfieds_id for offer in offers) == [1, 2]
+
+        await repository.add_offer_labels(
+            [
+                OfferLabel(
+                    clasfieds_id=offer.clasfieds_id,
+                    label_source=LabelSource.vin,
+                    label_version=1,
+                    is_suspicious=False,
+                    offer_version_id=offer.offer_version_id,
+                )
+                for offer in offers
+            ]
+        )
+        assert await unlabeled() == []
+
+        await repository.upsert_offer(*_offer(2, price=31000))
+        await repository.refresh_training_offers()
+        assert await unlabeled() == [2]
+        assert await _collect(
+            repository.iter_unlabeled_training_offers(LabelSource.vin, 2)
+        )
+
+    asyncio.run(run())
+
+
+def test_upsert_offer_labels_offer_by_rules(repository):
+    raw_offer, offer_parameters, location = _offer(1)
+    scam_offer = replace(
+        raw_offer,
+        description="Auto znajduje się za granicą, kontakt: jan(at)example.com",
+    )
+
+    async def run():
+        await repository.upsert_offer(raw_offer, offer_parameters, location)
+        label = await repository.select_latest_offer_label(1, LabelSource.rules)
+        assert not label.is_suspicious
+
+        await repository.upsert_offer(scam_offer, offer_parameters, location)
+        label = await repository.select_latest_offer_label(1, LabelSource.rules)
+        assert label.is_suspicious
+        assert label.offer_version_id == max(
+            version.id for version in await repository.select_offer_versions(1)
+        )
+
+    asyncio.run(run())
+
+
+def test_offer_images(repository):
+    def image(clasfieds_id: int, position: int, sha256: str | None) -> OfferImage:
+        return OfferImage(
+            clasfieds_id=clasfieds_id,
+            position=position,
+            url=f"http://image{position}.com",
+            sha256=sha256,
+        )
+
+    async def run():
+        await repository.upsert_offer(*_offer(1))
+        await repository.upsert_offer(*_offer(2))
+        for offer_id, image_links in ((3, []), (4, None)):
+            raw_offer, offer_parameters, location = _offer(offer_id)
+            await repository.upsert_offer(
+                replace(raw_offer, image_links=image_links), offer_parameters, location
+            )
+        offers = await repository.select_offers_without_images(0, 10)
+        assert [(offer.clasfieds_id, offer.image_links) for offer in offers] == [
+            (1, ["http://image1.com"]),
+            (2, ["http://image1.com"]),
+        ]
+        offers = await repository.select_offers_without_images(1, 10)
+        assert [offer.clasfieds_id for offer in offers] == [2]
+        assert len(await repository.select_offers_without_images(0, 1)) == 1
+
+        await repository.add_offer_images(
+            [image(1, 1, "b"), image(1, 0, None), image(2, 0, "b")]
+        )
+        await repository.add_offer_images([image(1, 0, "a")])
+        images = await repository.select_offer_images(1)
+        assert [(row.position, row.sha256) for row in images] == [(0, "a"), (1, "b")]
+        uses = await repository.select_offers_by_image(["b", "c"])
+        assert sorted(tuple(row) for row in uses) == [("b", 1), ("b", 2)]
+        assert not await repository.select_offers_without_images(0, 10)
+
+    asyncio.run(run())
+
+
+def test_upsert_offers_writes_batch(repository):
+    async def run():
+        written = await repository.upsert_offers([_offer(1), _offer(2), _offer(1)])
+        assert written == [True, True, False]
+        offers = await repository.select_base_offers([1, 2])
+        assert sorted(offer.clasfieds_id for offer in offers) == [1, 2]
+
+    asyncio.run(run())
+
+
+def test_streamed_rows_are_counted_as_returned(tmp_path):
+    repository = SqliteOfferRepository(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'offers.db'}")
+    )
+
+    async def run():
+        for offer_id in range(5):
+            await repository.upsert_offer(*_offer(offer_id))
+        before = db_metrics.rows_returned.get("all_offers", 0)
+        assert len(await _collect(repository.iter_all_offers(chunk_size=2))) == 5
+        assert db_metrics.rows_returned["all_offers"] - before == 5
+
+    asyncio.run(run())
+
+
+def test_rollup_day_lookups_use_the_day_index():
+    engine = create_engine("sqlite://")
+    metadata_obj.create_all(engine)
+    query = select(offers_base.c.clasfieds_id).where(offer_day.in_([date(2024, 3, 1)]))
+    compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").fetchall()
+
+    assert any("ix_offers_base_day" in row[-1] for row in plan)
@@ -0,0 +1,183 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from asyncpg.exceptions import CannotConnectNowError
+from sqlalchemy.exc import DBAPIError, IntegrityError, TimeoutError
+
+from src.models.raw_offer import RawOffer, RawOfferLocation, RawOfferParameters
+from src.repositories.offer.spool import OfferSpool, SpooledOfferRepository
+
+
+class RecordingOfferRepository:
+    def __init__(
+        self,
+        failures: int = 0,
+        poisoned: frozenset = frozenset(),
+        error: Exception = ConnectionError("database is restarting"),
+    ):
+        self.failures = failures
+        self.poisoned = poisoned
+        self.error = error
+        self.upserted: list = []
+
+    async def upsert_offer(self, raw_offer, offer_parameters, raw_offer_location):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        if raw_offer.id in self.poisoned:
+            raise IntegrityError("INSERT INTO offers_base", {}, ValueError("poisoned"))
+        self.upserted.append((raw_offer, offer_parameters, raw_offer_location))
+        return True
+
+    async def upsert_offers(self, offers):
+        return [await self.upsert_offer(*offer) for offer in offers]
+
+
+def _offer(offer_id: int) -> tuple:
+    raw_offer = RawOffer(
+        brand="Seat",
+        id=offer_id,
+        link="http://test.com",
+        title="Seat Alhambra",
+        created_time=None,
+        description="Samochod w super stanie",
+        image_links=["http://image1.com"],
+        vin="VSSZZZ7NZBV510542",
+        scraped_time=datetime(2024, 3, 1, tzinfo=timezone.utc),
+    )
+    offer_parameters = RawOfferParameters(
+        id=offer_id,
+        model="Alhambra",
+        price=35000,
+        engine_size=None,
+        manufactured_year=None,
+        engine_power=None,
+        petrol=None,
+        car_body=None,
+        milage=186000,
+        color=None,
+        condition=None,
+        transmission=None,
+        drive=None,
+        country_origin=None,
+        righthanddrive=None,
+        vin="VSSZZZ7NZBV510542",
+    )
+    location = RawOfferLocation(id=offer_id, region="Mazowieckie", city="Warszawa")
+    return raw_offer, offer_parameters, location
+
+
+def test_spooled_offers_are_drained_in_batches(tmp_path):
+    repository = RecordingOfferRepository()
+    spooled = SpooledOfferRepository(
+        repository, OfferSpool(tmp_path / "offers.spool"), drain_batch_size=2
+    )
+
+    async def run():
+        for offer_id in range(3):
+            await spooled.upsert_offer(*_offer(offer_id))
+        assert await spooled.drain_batch() == 2
+        assert await spooled.drain_batch() == 1
+        assert await spooled.drain_batch() == 0
+
+    asyncio.run(run())
+
+    assert [offer[0].id for offer in repository.upserted] == [0, 1, 2]
+    assert repository.upserted[0] == _offer(0)
+    assert (tmp_path / "offers.spool").stat().st_size == 0
+
+
+def test_spool_is_replayed_after_crash(tmp_path):
+    spool_path = tmp_path / "offers.spool"
+    failing_spooled = SpooledOfferRepository(
+        RecordingOfferRepository(failures=1), OfferSpool(spool_path)
+    )
+
+    async def crash():
+        await failing_spooled.upsert_offer(*_offer(1))
+        try:
+            await failing_spooled.drain_batch()
+        except ConnectionError:
+            pass
+        with open(spool_path, "ab") as spool_file:
+            spool_file.write(b'{"raw_offer": {"id"')
+
+    asyncio.run(crash())
+
+    repository = RecordingOfferRepository()
+    spooled = SpooledOfferRepository(repository, OfferSpool(spool_path))
+
+    async def replay():
+        await spooled.upsert_offer(*_offer(2))
+        await spooled.drain_batch()
+
+    asyncio.run(replay())
+
+    assert [offer[0].id for offer in repository.upserted] == [1, 2]
+
+
+def test_failing_offers_are_moved_to_dead_letter_file(tmp_path):
+    repository = RecordingOfferRepository(poisoned=frozenset({1}))
+    spool = OfferSpool(tmp_path / "offers.spool")
+    spooled = SpooledOfferRepository(repository, spool)
+
+    async def run():
+        for offer_id in range(3):
+            await spooled.upsert_offer(*_offer(offer_id))
+        assert await spooled.drain_batch() == 3
+        assert spool.drained()
+
+    asyncio.run(run())
+
+    assert [offer[0].id for offer in repository.upserted] == [0, 0, 2]
+    dead_letters = spool.dead_letter_path.read_text().splitlines()
+    assert len(dead_letters) == 1
+    assert json.loads(dead_letters[0])["record"]["raw_offer"]["id"] == 1
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        DBAPIError(
+            "INSERT INTO offers_base",
+            {},
+            CannotConnectNowError("the database system is starting up"),
+            connection_invalidated=True,
+        ),
+        TimeoutError("QueuePool limit reached"),
+    ],
+)
+def test_unavailable_database_leaves_batch_in_spool(tmp_path, error):
+    repository = RecordingOfferRepository(failures=1, error=error)
+    spool = OfferSpool(tmp_path / "offers.spool")
+    spooled = SpooledOfferRepository(repository, spool)
+
+    async def run():
+        for offer_id in range(2):
+            await spooled.upsert_offer(*_offer(offer_id))
+        with pytest.raises(type(error)):
+            await spooled.drain_batch()
+        assert not spool.drained()
+        assert await spooled.drain_batch() == 2
+
+    asyncio.run(run())
+
+    assert [offer[0].id for offer in repository.upserted] == [0, 1]
+    assert not spool.dead_letter_path.exists()
+
+
+def test_offset_past_the_end_of_spool_is_reset(tmp_path):
+    spool_path = tmp_path / "offers.spool"
+    spool = OfferSpool(spool_path)
+    spool.append({"id": 1})
+    spool.flush()
+    spool.commit(3)
+    spool.close()
+    spool_path.write_bytes(b"")
+
+    spool = OfferSpool(spool_path)
+    spool.append({"id": 2})
+    spool.flush()
+    assert spool.read(10) == ([{"id": 2}], spool_path.stat().st_size)
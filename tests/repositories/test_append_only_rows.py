@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from src.repositories.append_only_rows import AppendOnlyRows
+
+
+def _rows(tmp_path, **kwargs) -> AppendOnlyRows:
+    return AppendOnlyRows(
+        tmp_path / "keys.bin", tmp_path / "values.bin", np.int64, np.uint32, 3, **kwargs
+    )
+
+
+@pytest.mark.parametrize("in_memory", [True, False])
+def test_appended_rows_survive_reopening(tmp_path, in_memory):
+    rows = _rows(tmp_path, in_memory=in_memory)
+    assert rows.append([7], np.array([1, 2, 3])) == 0
+    values = np.arange(3 * 2000, dtype=np.uint32).reshape(-1, 3)
+    assert rows.append(list(range(2000)), values) == 1
+    assert len(rows) == 2001
+    np.testing.assert_array_equal(rows.values[1:], values)
+
+    reopened = _rows(tmp_path, in_memory=in_memory)
+    assert reopened.keys[:2] == [7, 0]
+    np.testing.assert_array_equal(reopened.values[0], [1, 2, 3])
+    np.testing.assert_array_equal(reopened.values[1:], values)
+
+
+@pytest.mark.parametrize(
+    "keys_tail, values_tail",
+    [
+        # crash while writing values
+        (b"", np.uint32(9).tobytes()),
+        # crash after the values, before the key
+        (b"", np.array([4, 5, 6], np.uint32).tobytes()),
+        # crash while writing the key
+        (b"\x01\x02", np.array([4, 5, 6], np.uint32).tobytes()),
+    ],
+)
+def test_drops_rows_of_an_interrupted_append(tmp_path, keys_tail, values_tail):
+    rows = _rows(tmp_path)
+    rows.append([7, 8], np.array([[1, 2, 3], [4, 5, 6]]))
+    with open(rows.keys_path, "ab") as keys_file:
+        keys_file.write(keys_tail)
+    with open(rows.values_path, "ab") as values_file:
+        values_file.write(values_tail)
+
+    reopened = _rows(tmp_path)
+    assert reopened.keys == [7, 8]
+    assert reopened.keys_path.stat().st_size == 2 * 8
+    assert reopened.values_path.stat().st_size == 2 * 3 * 4
+
+    assert reopened.append([9], np.array([7, 8, 9])) == 2
+    assert _rows(tmp_path).keys == [7, 8, 9]
+    np.testing.assert_array_equal(_rows(tmp_path).values[2], [7, 8, 9])
+
+
+def test_byte_keys(tmp_path):
+    paths = tmp_path / "keys.bin", tmp_path / "values.bin"
+    rows = AppendOnlyRows(*paths, (np.void, 4), np.float16, 2, in_memory=False)
+    rows.append([b"abcd", b"efgh"], np.ones((2, 2)))
+
+    reopened = AppendOnlyRows(*paths, (np.void, 4), np.float16, 2, in_memory=False)
+    assert reopened.keys == [b"abcd", b"efgh"]
+    assert reopened.values.shape == (2, 2)
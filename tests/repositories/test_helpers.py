@@ -0,0 +1,9 @@
+from src.repositories.helpers import batched
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_batched_empty():
+    assert list(batched([], 3)) == []
@@ -0,0 +1,73 @@
+import json
+
+from sqlalchemy import create_engine, text
+
+from src.repositories.telemetry import (
+    DatabaseMetrics,
+    LatencyHistogram,
+    instrument_engine,
+    query_name_of,
+)
+
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+    for value in [0.005] * 90 + [0.05] * 9 + [2.0]:
+        histogram.observe(value)
+
+    assert histogram.counts == [90, 9, 0, 1]
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.99) == 0.1
+    assert histogram.quantile(1.0) == 2.0
+
+
+def test_query_name_prefers_execution_option():
+    assert query_name_of("SELECT 1", {"query_name": "ping"}) == "ping"
+    assert query_name_of("SELECT a FROM offers_base WHERE a = 1", {}) == (
+        "SELECT offers_base"
+    )
+    assert query_name_of('INSERT INTO "labeling_data" (vin)', {}) == (
+        "INSERT labeling_data"
+    )
+
+
+def test_instrumented_engine_records_statements_and_slow_queries(tmp_path):
+    engine = create_engine("sqlite://")
+    metrics = DatabaseMetrics()
+    metrics_path = tmp_path / "db_metrics.json"
+    instrument_engine(
+        engine,
+        metrics,
+        slow_query_threshold=0.0,
+        metrics_path=metrics_path,
+        flush_interval=0.0,
+    )
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE offers (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO offers (id) VALUES (1), (2), (3)"))
+        conn.execute(
+            text("SELECT id FROM offers WHERE id > :id").execution_options(
+                query_name="offers_after"
+            ),
+            {"id": 1},
+        )
+
+    snapshot = json.loads(metrics_path.read_text())
+    assert snapshot["statements"]["offers_after"]["count"] == 1
+    assert snapshot["statements"]["INSERT offers"]["rows_affected"] == 3
+    assert snapshot["statements"]["offers_after"]["rows_affected"] == 0
+    slow_select = snapshot["slow_queries"][-1]
+    assert slow_select["query_name"] == "offers_after"
+    assert slow_select["plan"]
+
+
+def test_rows_returned_are_counted_separately():
+    metrics = DatabaseMetrics()
+    metrics.observe_statement("all_offers", 0.01, -1)
+    metrics.observe_rows_returned("all_offers", 100)
+    metrics.observe_rows_returned("all_offers", 20)
+
+    statement = metrics.snapshot()["statements"]["all_offers"]
+    assert statement["rows_affected"] == 0
+    assert statement["rows_returned"] == 120
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.models.labeling import LabelSource
+from src.raw_offer_producer.synthetic import SyntheticOfferGenerator
+from src.repositories.offer.in_memory import InMemoryOfferRepository
+from src.repositories.offer.sqlite import SqliteOfferRepository
+from src.services.helpers.data_labeler_by_vin import (
+    is_suspicious_vin,
+    label_suspicious_vins,
+    process_offers,
+)
+
+VINS = {
+    None: True,
+    "VF7LCBHZ6BS123456": False,
+    "wba3a5c51cf256985": False,
+    "AAAAAAAAAAAAAAAAA": True,
+    "1111": True,
+    "aA": False,
+    "zapytaj": True,
+    "WAUZZZ8VXXXXXXXXX": True,
+    "WAUZZZ8V5XX123456": False,
+    "VF1ABCIOQ12345678": True,
+    "VF7 LCBHZ6BS12345": True,
+    "123456789ABCDEFGH": True,
+    "TEL 600100200": True,
+    "": False,
+}
+
+
+@pytest.mark.parametrize("vin,expected", VINS.items())
+def test_is_suspicious_vin(vin, expected):
+    assert is_suspicious_vin(vin) is expected
+
+
+def test_label_suspicious_vins_matches_single_vin_rules():
+    assert label_suspicious_vins(list(VINS)).tolist() == list(VINS.values())
+
+
+def test_process_offers_labels_only_new_offers():
+    repository = InMemoryOfferRepository()
+    generator = SyntheticOfferGenerator(seed=5, suspicious_rate=0.5)
+    offers = [generator.offer() for _ in range(20)]
+
+    async def vin_labels() -> dict[int, bool]:
+        return {
+            label.clasfieds_id: label.is_suspicious
+            async for chunk in repository.iter_latest_offer_labels(LabelSource.vin)
+            for label in chunk
+        }
+
+    async def run():
+        for offer in offers:
+            await repository.upsert_offer(offer, offer.parameters[0], offer.location[0])
+        assert await process_offers(repository) == len(
+            await repository.select_training_offers()
+        )
+        labels = await vin_labels()
+        assert labels == {
+            offer.id: is_suspicious_vin(offer.vin)
+            for offer in offers
+            if offer.id in labels
+        }
+        assert any(labels.values()) and not all(labels.values())
+        assert await process_offers(repository) == 0
+
+    asyncio.run(run())
+
+
+def test_process_offers_labels_many_chunks_in_sqlite(tmp_path):
+    repository = SqliteOfferRepository(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'offers.db'}")
+    )
+    generator = SyntheticOfferGenerator(seed=7, missing_vin_rate=0.0)
+
+    async def run():
+        for _ in range(300):
+            offer = generator.offer()
+            await repository.upsert_offer(offer, offer.parameters[0], offer.location[0])
+        await repository.refresh_training_offers()
+        training_offers = len(await repository.select_training_offers())
+        assert training_offers > 50
+        assert await process_offers(repository, chunk_size=50) == training_offers
+        assert await process_offers(repository, chunk_size=50) == 0
+
+    asyncio.run(run())
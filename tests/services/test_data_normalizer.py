@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("spacy")
+
+from src.raw_offer_producer.synthetic import SyntheticOfferGenerator  # noqa: E402
+from src.services.helpers.data_normalizer import (  # noqa: E402
+    _prepare_text,
+    clean_text,
+    clean_texts,
+)
+
+
+def test_prepare_text_strips_markup_digits_and_punctuation():
+    assert _prepare_text("<p>Sprzedam AUDI A4,<br>2.0 TDI!</p>") == (
+        " sprzedam audi a  tdi "
+    )
+    assert _prepare_text("Cena&nbsp;do negocjacji") == "cena\xa0do negocjacji"
+
+
+def test_clean_texts_matches_clean_text():
+    pytest.importorskip("pl_core_news_sm")
+    generator = SyntheticOfferGenerator(seed=3)
+    texts = [
+        f"{offer.title} {offer.description}"
+        for offer in (generator.offer() for _ in range(20))
+    ] + ["", "<br />"]
+
+    assert clean_texts(texts, n_process=1) == [clean_text(text) for text in texts]
@@ -0,0 +1,55 @@
+import numpy as np
+
+from src.services.helpers.embedding_store import (
+    EmbeddingStore,
+    description_key,
+    normalize_description,
+)
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.encoded: list[str] = []
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        self.encoded.extend(texts)
+        return np.array([[len(text), text.count(" "), 1.0] for text in texts])
+
+
+def test_normalize_description():
+    assert (
+        normalize_description("Super  stan<br />\nOkazja &amp; ZAMIANA ")
+        == "super stan okazja & zamiana"
+    )
+    assert normalize_description(None) == ""
+
+
+def test_encodes_only_new_descriptions(tmp_path):
+    encoder = FakeEncoder()
+    store = EmbeddingStore(tmp_path, dtype="float32")
+
+    first = store.encode(["Super stan", "Okazja", "super  stan"], encoder)
+    assert encoder.encoded == ["super stan", "okazja"]
+    assert first.dtype == np.float32
+    np.testing.assert_array_equal(first[0], first[2])
+
+    store.encode(["okazja", "Zamiana"], encoder, batch_size=1)
+    assert encoder.encoded == ["super stan", "okazja", "zamiana"]
+
+    reopened = EmbeddingStore(tmp_path)
+    assert len(reopened) == 3
+    np.testing.assert_array_equal(
+        reopened.encode(["Super stan"], FakeEncoder()), first[:1]
+    )
+
+
+def test_drops_rows_of_an_interrupted_append(tmp_path):
+    store = EmbeddingStore(tmp_path, dtype="float16")
+    store.encode(["Super stan", "Okazja"], FakeEncoder())
+    with open(store.vectors_path, "ab") as vectors_file:
+        vectors_file.write(np.zeros(3, dtype=np.float16).tobytes())
+
+    reopened = EmbeddingStore(tmp_path)
+    assert len(reopened) == 2
+    assert description_key("okazja") in reopened
+    assert reopened.vectors_path.stat().st_size == 2 * 3 * 2
@@ -0,0 +1,195 @@
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+from PIL import Image
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.raw_offer_producer.synthetic import SyntheticOfferGenerator
+from src.repositories.image_store import ImageStore
+from src.repositories.offer.in_memory import InMemoryOfferRepository
+from src.repositories.offer.sqlite import SqliteOfferRepository
+from src.services.helpers.photo_hashes import PhotoHashIndex
+from src.services.image_fetcher import (
+    ImageDecodeError,
+    ImageFetcher,
+    fetch_offer_images,
+    process_image,
+)
+
+
+def _png(seed: int) -> bytes:
+    pixels = np.random.default_rng(seed).integers(0, 255, (48, 64, 3), np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).resize((640, 480)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+IMAGES = {"/red.png": _png(1), "/blue.png": _png(2), "/broken.png": b"not an image"}
+
+
+class ImageServer(ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), ImageHandler)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.requests = 0
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.requests += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(0.02)
+        with server.lock:
+            server.active -= 1
+        data = IMAGES.get(self.path.split("?")[0])
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ImageServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_offer_images_dedups_blobs_and_limits_hosts(server, tmp_path):
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    store = ImageStore(tmp_path / "images")
+    repository = InMemoryOfferRepository()
+    generator = SyntheticOfferGenerator()
+    photo_hashes = PhotoHashIndex(tmp_path / "photo_hashes")
+
+    async def run():
+        for _ in range(5):
+            offer = generator.offer()
+            image_links = [
+                f"{base_url}/red.png?offer={offer.id}",
+                f"{base_url}/blue.png?offer={offer.id}",
+                f"{base_url}/missing.png",
+            ]
+            await repository.upsert_offer(
+                replace(offer, image_links=image_links),
+                offer.parameters[0],
+                offer.location[0],
+            )
+        fetcher = ImageFetcher(store, ThreadPoolExecutor(2), per_host=2)
+        try:
+            return await fetch_offer_images(repository, fetcher, photo_hashes)
+        finally:
+            fetcher.close()
+
+    assert asyncio.run(run()) == 10
+    assert server.requests == 15
+    assert server.max_active <= 2
+
+    images = asyncio.run(repository.select_offer_images(1))
+    assert [image.position for image in images] == [0, 1, 2]
+    red, blue, missing = images
+    assert missing.sha256 is None
+    assert (red.width, red.height, red.size) == (640, 480, len(IMAGES["/red.png"]))
+    assert (
+        sum(path.is_file() for path in (tmp_path / "images" / "blobs").rglob("*")) == 2
+    )
+    with Image.open(store.thumbnail_path(red.sha256)) as thumbnail:
+        assert max(thumbnail.size) == 256
+
+    uses = asyncio.run(repository.select_offers_by_image([blue.sha256]))
+    assert sorted(use.clasfieds_id for use in uses) == [1, 2, 3, 4, 5]
+    assert not asyncio.run(_collect_offers_without_images(repository))
+    assert photo_hashes.similar(1) == {2: 0, 3: 0, 4: 0, 5: 0}
+    assert red.phash != blue.phash
+
+
+def test_fetch_offer_images_writes_many_chunks_in_sqlite(server, tmp_path):
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    repository = SqliteOfferRepository(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'offers.db'}")
+    )
+    generator = SyntheticOfferGenerator()
+
+    async def run():
+        for _ in range(5):
+            offer = generator.offer()
+            await repository.upsert_offer(
+                replace(offer, image_links=[f"{base_url}/red.png?offer={offer.id}"]),
+                offer.parameters[0],
+                offer.location[0],
+            )
+        fetcher = ImageFetcher(
+            ImageStore(tmp_path / "images"), ThreadPoolExecutor(2), per_host=2
+        )
+        try:
+            fetched = await fetch_offer_images(repository, fetcher, chunk_size=2)
+        finally:
+            fetcher.close()
+        return fetched, await _collect_offers_without_images(repository)
+
+    assert asyncio.run(run()) == (5, [])
+
+
+def test_offers_sharing_a_photo_render_its_thumbnail_concurrently(tmp_path):
+    blob_path = tmp_path / "blob"
+    blob_path.write_bytes(IMAGES["/red.png"])
+    thumbnail_path = tmp_path / "thumbnails" / "red.jpg"
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(
+                lambda _: process_image(blob_path, thumbnail_path, 256), range(16)
+            )
+        )
+
+    assert len(set(results)) == 1
+    assert [path.name for path in thumbnail_path.parent.iterdir()] == ["red.jpg"]
+
+
+def test_only_undecodable_images_are_recorded_without_digest(server, tmp_path):
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    store = ImageStore(tmp_path / "images")
+
+    with pytest.raises(ImageDecodeError):
+        blob_path = tmp_path / "broken"
+        blob_path.write_bytes(IMAGES["/broken.png"])
+        process_image(blob_path, tmp_path / "broken.jpg", 256)
+
+    async def fetch(url: str):
+        fetcher = ImageFetcher(store, ThreadPoolExecutor(1))
+        try:
+            return await fetcher.fetch_image(1, 0, url)
+        finally:
+            fetcher.close()
+
+    assert asyncio.run(fetch(f"{base_url}/broken.png")).sha256 is None
+
+    # a thumbnail that cannot be written is a local error, not a bad photo
+    (tmp_path / "images" / "thumbnails").write_bytes(b"")
+    with pytest.raises(OSError):
+        asyncio.run(fetch(f"{base_url}/red.png"))
+
+
+async def _collect_offers_without_images(repository) -> list:
+    return await repository.select_offers_without_images(0, 1000)
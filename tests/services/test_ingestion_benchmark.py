@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+from src.raw_offer_producer.synthetic import (
+    SyntheticOfferGenerator,
+    SyntheticRawOfferProducer,
+    SyntheticTrainingDataProducer,
+)
+from src.repositories.offer.in_memory import InMemoryOfferRepository
+from src.services.ingestion_benchmark import (
+    benchmark_ingestion,
+    percentile,
+    store_result,
+)
+
+
+def test_percentile():
+    assert percentile([], 0.99) == 0.0
+    assert percentile([float(value) for value in range(1, 101)], 0.99) == 99.0
+
+
+def test_benchmark_ingestion_reports_throughput(tmp_path):
+    repository = InMemoryOfferRepository()
+    generator = SyntheticOfferGenerator(seed=1)
+    result = asyncio.run(
+        benchmark_ingestion(
+            repository,
+            lambda: SyntheticRawOfferProducer(25, generator).get_offers(),
+            SyntheticTrainingDataProducer(10, generator).get_offers(),
+            batch_size=10,
+            spool_path=tmp_path / "offers.spool",
+        )
+    )
+
+    assert result["offers"]["write_path"] == "upsert_offer"
+    assert result["offers"]["rows"] == 25
+    assert result["offers_batched"]["write_path"] == "upsert_offers"
+    assert result["offers_batched"]["rows"] == 25
+    assert result["offers_spooled"]["append"]["rows"] == 25
+    assert result["offers_spooled"]["drain"]["rows"] == 25
+    assert result["labeling_data"]["rows"] == 10
+    offers = asyncio.run(repository.select_base_offers(list(range(1, 76))))
+    assert len(offers) == 75
+
+    store_result(result, tmp_path / "ingestion.jsonl")
+    record = json.loads((tmp_path / "ingestion.jsonl").read_text())
+    assert record["offers"]["rows_per_second"] > 0
@@ -0,0 +1,62 @@
+import numpy as np
+
+from src.services.helpers.near_duplicates import (
+    MinHasher,
+    NearDuplicateIndex,
+    shingle_hashes,
+)
+
+DESCRIPTION = (
+    "Sprzedam samochód w bardzo dobrym stanie, serwisowany w ASO, garażowany, "
+    "pierwszy właściciel w kraju, zadbane wnętrze, komplet opon zimowych."
+)
+
+
+def test_minhash_estimates_jaccard_similarity():
+    edited = DESCRIPTION.replace("pierwszy", "drugi")
+    shingles = set(shingle_hashes(DESCRIPTION).tolist())
+    edited_shingles = set(shingle_hashes(edited).tolist())
+    similarity = len(shingles & edited_shingles) / len(shingles | edited_shingles)
+
+    hasher = MinHasher(num_perm=256)
+    estimate = np.mean(hasher.signature(DESCRIPTION) == hasher.signature(edited))
+
+    assert abs(estimate - similarity) < 0.1
+    assert np.array_equal(
+        hasher.signature(DESCRIPTION), hasher.signature(DESCRIPTION.upper())
+    )
+
+
+def test_index_finds_near_duplicates_and_clusters(tmp_path):
+    index = NearDuplicateIndex(tmp_path)
+    index.add(1, DESCRIPTION)
+    index.add(2, DESCRIPTION.replace("ASO", "Warszawie") + "<br />")
+    index.add(3, "Auto po wypadku, do naprawy lub na części, cena do negocjacji.")
+    index.add(4, DESCRIPTION.replace("zimowych", "letnich").replace("ASO", "Warszawie"))
+
+    assert set(index.similar(1, threshold=0.7)) == {2, 4}
+    assert set(index.query(DESCRIPTION, threshold=0.99)) == {1}
+    assert index.cluster(4, threshold=0.7) == {1, 2, 4}
+    assert index.clusters(threshold=0.7) == [{1, 2, 4}]
+
+    index.add(2, "Auto po wypadku, do naprawy lub na części, cena do negocjacji!")
+    reopened = NearDuplicateIndex(tmp_path)
+    assert len(reopened) == 4
+    assert set(reopened.similar(3, threshold=0.9)) == {2}
+    assert set(reopened.similar(1, threshold=0.7)) == {4}
+
+
+def test_index_skips_descriptions_too_short_to_compare(tmp_path):
+    index = NearDuplicateIndex(tmp_path)
+    assert index.add(1, None) is None
+    assert index.add(2, "") is None
+    assert index.add(3, "<p><br /></p>") is None
+    index.add(4, DESCRIPTION)
+
+    assert len(index) == 1
+    assert index.query("") == {}
+    assert index.similar(1) == {}
+
+    assert index.add(4, "Polecam!") is None
+    assert 4 not in index
+    assert len(NearDuplicateIndex(tmp_path)) == 0
@@ -0,0 +1,55 @@
+import io
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from src.services.helpers.photo_hashes import PHASH_BITS, PhotoHashIndex, hamming, phash
+
+
+def _photo(seed: int) -> Image.Image:
+    pixels = np.random.default_rng(seed).integers(0, 255, (60, 80, 3), np.uint8)
+    return (
+        Image.fromarray(pixels).resize((800, 600)).filter(ImageFilter.GaussianBlur(8))
+    )
+
+
+def _recompressed(image: Image.Image) -> Image.Image:
+    buffer = io.BytesIO()
+    image.resize((400, 300)).save(buffer, "JPEG", quality=40)
+    return Image.open(buffer)
+
+
+def test_phash_survives_resizing_and_recompression():
+    photo_hash = phash(_photo(1))
+    distances = hamming(
+        photo_hash,
+        np.array([phash(_recompressed(_photo(1))), phash(_photo(2))], np.uint64),
+    )
+    assert distances[0] <= 4
+    assert distances[1] > 16
+
+
+def test_photo_hash_index_finds_offers_sharing_photos(tmp_path):
+    rng = np.random.default_rng(0)
+    photo_hashes = [int(value) for value in rng.integers(0, 1 << 63, 1000, np.uint64)]
+    index = PhotoHashIndex(tmp_path)
+    for clasfieds_id, photo_hash in enumerate(photo_hashes):
+        index.add(clasfieds_id, photo_hash)
+    index.add(1000, photo_hashes[5] ^ 0b1011)
+    index.add(1000, photo_hashes[7])
+    index.add(1001, photo_hashes[5] ^ ((1 << 12) - 1))
+    index.add(1000, photo_hashes[7])
+
+    assert index.similar(1000) == {5: 3, 7: 0}
+    assert index.similar(5) == {1000: 3}
+    assert index.features(1000) == {"photo_reuse_offers": 2, "photo_reuse_distance": 0}
+    assert index.features(6) == {
+        "photo_reuse_offers": 0,
+        "photo_reuse_distance": PHASH_BITS,
+    }
+
+    with open(index.ids_path, "ab") as ids_file:
+        ids_file.write(np.int64(1002).tobytes())
+    reopened = PhotoHashIndex(tmp_path)
+    assert len(reopened) == 1002
+    assert reopened.similar(1000) == {5: 3, 7: 0}
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from src.services.helpers.price_sketches import PriceSketches, price_segments
+
+
+def test_price_segments_fall_back_without_year_or_milage():
+    assert price_segments("citroen", "C4", 2015, 120000) == [
+        "Citroën|c4|2015|2",
+        "Citroën|c4|2",
+        "Citroën|c4",
+    ]
+    assert price_segments("Citroën", "C4", None, None) == [None, None, "Citroën|c4"]
+    assert price_segments(None, "C4", 2015, 0) == [None, None, None]
+
+
+def test_price_sketches_score_prices_within_segment(tmp_path):
+    rng = np.random.default_rng(0)
+    prices = np.exp(rng.normal(np.log(30000), 0.2, 500)).astype(int)
+    sketches = PriceSketches(tmp_path)
+    for clasfieds_id, price in enumerate(prices):
+        sketches.add(clasfieds_id, "Citroen", "C4", 2015, 120000, int(price))
+    sketches.add(1000, "Tesla", "Model 3", 2020, 30000, 150000)
+
+    score = sketches.score("Citroen", "C4", 2015, 110000, int(np.median(prices)))
+    assert score.segment == "Citroën|c4|2015|2"
+    assert score.offers == 500
+    assert score.median == pytest.approx(np.median(prices), rel=0.03)
+    assert score.mad == pytest.approx(0.2 * 0.6745, rel=0.2)
+    assert score.zscore == pytest.approx(0, abs=0.1)
+    assert score.percentile == pytest.approx(0.5, abs=0.03)
+
+    cheap = sketches.score("Citroen", "C4", 2015, 110000, 10000)
+    assert cheap.zscore < -4
+    assert cheap.percentile < 0.01
+    tesla = sketches.score("Tesla", "Model 3", 2020, 30000, 150000)
+    assert (tesla.segment, tesla.offers) == ("tesla|model 3", 1)
+    assert sketches.score("Tesla", "Model S", 2020, 30000, 150000) is None
+    assert sketches.features("Tesla", "Model S", 2020, 30000, 150000) == {
+        "price_zscore": 0.0,
+        "price_percentile": 0.5,
+        "price_segment_offers": 0,
+    }
+
+
+def test_price_sketches_move_repriced_offers_and_persist(tmp_path):
+    sketches = PriceSketches(tmp_path, min_offers=1)
+    sketches.add(1, "Citroen", "C4", 2015, 120000, 30000)
+    sketches.add(1, "Citroen", "C4", 2015, 120000, 20000)
+    sketches.add(2, "Citroen", "C4", None, 120000, 40000)
+    with open(sketches.observations_path, "ab") as observations_file:
+        observations_file.write(b"\0" * 5)
+
+    reopened = PriceSketches(tmp_path, min_offers=1)
+    assert len(reopened) == 2
+    assert reopened.score("Citroen", "C4", 2015, 120000, 20000).offers == 1
+    coarse = reopened.score("Citroen", "C4", None, 120000, 20000)
+    assert (coarse.segment, coarse.offers) == ("Citroën|c4|2", 2)
+    assert coarse.percentile == pytest.approx(0.25, abs=0.05)
+    assert np.array_equal(
+        reopened.counts[: len(reopened.segment_keys)],
+        sketches.counts[: len(sketches.segment_keys)],
+    )
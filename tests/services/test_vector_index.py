@@ -0,0 +1,59 @@
+import numpy as np
+
+from src.services.helpers.vector_index import (
+    ExactVectorIndex,
+    IVFVectorIndex,
+    build_vector_index,
+    normalize_rows,
+    similar_queries,
+)
+
+
+def _clustered(rng, centers, count):
+    return centers[rng.integers(0, len(centers), count)] + rng.normal(
+        scale=0.02, size=(count, centers.shape[1])
+    )
+
+
+def _pairs(matches) -> set:
+    query_ids, item_ids, _ = matches
+    return set(zip(query_ids.tolist(), item_ids.tolist()))
+
+
+def test_exact_index_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(300, 16))
+    queries = rng.normal(size=(40, 16))
+
+    index = ExactVectorIndex(vectors, block_size=64)
+    similarities = normalize_rows(queries) @ normalize_rows(vectors).T
+
+    assert _pairs(index.range_search(queries, 0.5)) == set(
+        zip(*(ids.tolist() for ids in np.nonzero(similarities > 0.5)))
+    )
+    _, _, scores = index.range_search(queries, 0.5)
+    assert (scores > 0.5).all()
+
+
+def test_ivf_index_finds_neighbours_of_clustered_vectors():
+    rng = np.random.default_rng(1)
+    centers = normalize_rows(rng.normal(size=(20, 32)))
+    vectors = _clustered(rng, centers, 2000)
+    queries = _clustered(rng, centers, 100)
+
+    exact = ExactVectorIndex(vectors).range_search(queries, 0.9)
+    approximate = IVFVectorIndex(vectors, n_lists=20, n_probes=2).range_search(
+        queries, 0.9
+    )
+
+    assert len(exact[0]) > 0
+    assert _pairs(approximate) == _pairs(exact)
+
+
+def test_similar_queries():
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0]])
+    queries = np.array([[0.0, 2.0], [-1.0, 0.0], [0.99, 0.1]])
+
+    for kind in ("exact", "ivf"):
+        index = build_vector_index(vectors, kind=kind)
+        assert similar_queries(index, queries, 0.8) == {0, 2}